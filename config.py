@@ -20,6 +20,21 @@ events = {
 
 controller = {
 		"volume_percent"		: 50  # Default volume as percentage (0-100% user range, maps to 20-60% servo)
+	,	"spin_ms"				: 2  # Duty onsets poll the clock for their last ms instead of trusting the event loop to wake up on time
+	,	"lead_compensation"		: True  # Issue finger, pump and stepper commands early by their flight time (see monica/lead_times.py)
+	,	"gentle_slack_ms"		: 100  # Cart moves with at least this much time to spare take all of it instead of rushing (0 never)
+	,	"gentle_margin_ms"		: 20  # How early gentle moves aim to arrive before the fingers need the cart
+	,	"retarget_ms"			: 20  # Worst time Stepper.set_target holds up playback, gentle moves included (see stepper_timer in the stats)
+}
+
+log = {
+		"level"					: "info"  # "debug", "info", "warning", "error" or "off" (see utils/log.py)
+	,	"capacity"				: 64  # Messages waiting to be printed, the oldest are lost past it
+	,	"drain_ms"				: 200  # How often pending messages are printed
+}
+
+telemetry = {
+		"capacity"				: 256  # Duty onsets kept for the telemetry command, 24 bytes each
 }
 
 pump = {
@@ -56,6 +71,8 @@ stepper = {
 	,	"cruise_speed"			: 35000
 	,	"accel"					: 250000
 	,	"interval_ms"			: 4
+	,	"cruise_interval_ms"	: 20
+	,	"schedule_ticks"		: 256
 }
 
 lower_limit_switch = {
@@ -103,6 +120,7 @@ wagon = {
 		"structure"				: [[0, 2], [4, 6], [8, 10], [12, 14], [1, 3], [5, 7], [9, 11]]
 	,	"valid_positions"		: RAIL_WAGON_INTERVALS + 1
 	,	"wagon_2_stepper"		: WAGON_2_STEPPER
+	,	"memo_size"				: 32  # Chords whose covering qualities and fingerings are kept (under 1 KB each)
 }
 
 keystra = {
@@ -110,5 +128,6 @@ keystra = {
 	,	"skid_bonus"			: 3
 	,	"move_penalty"			: 1
 	,	"time_penalty"			: 1
+	,	"mode"					: "compact"  # "choices", "compact" or "fixed" (integer scoring, see monica/keystra.py)
 }
 
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Microbenchmarks for Monica's linear kinematics (runs under CPython)
+Stepper.update runs on stepper_simulation.py's simulated clock, timer and PWM
+"""
+
+import time
+
+import firmware  # Registers the firmware modules before importing them
+import config
+from utils.linear_kinematics.simple_agent import SimpleAgent
+from utils.linear_kinematics.ik_agent import IKAgent
+from stepper_simulation import SimulatedStepper, clock
+
+def calls_per_second(function, args_list, min_time=0.5):
+    """Call function over args_list until min_time has passed and report the call rate"""
+    calls = 0
+    start_time = time.perf_counter()
+    elapsed = 0.0
+    while elapsed < min_time:
+        for args in args_list:
+            function(*args)
+        calls += len(args_list)
+        elapsed = time.perf_counter() - start_time
+    return calls / elapsed
+
+def benchmark_flight_time():
+    """Closed-form flight_time against the trajectory-based default"""
+    agent = SimpleAgent(config.stepper["cruise_speed"], config.stepper["accel"])
+    positions = [i * config.WAGON_2_STEPPER for i in range(config.wagon["valid_positions"])]
+    pairs = [(p0, p1) for p0 in positions for p1 in positions]
+    
+    trajectory_rate = calls_per_second(lambda p0, p1: IKAgent.flight_time(agent, p0, p1), pairs)
+    closed_rate = calls_per_second(agent.flight_time, pairs)
+    
+    print("SimpleAgent.flight_time")
+    print(f"  Trajectory based: {trajectory_rate:>12,.0f} calls/s")
+    print(f"  Closed form:      {closed_rate:>12,.0f} calls/s")
+    print(f"  Speedup:          {closed_rate / trajectory_rate:>12.1f}x")
+
+def update_seconds(simulation, moves, sampling=False):
+    """Time spent in Stepper.update over every timer tick of moves, and the number of ticks"""
+    stepper = simulation.stepper
+    timer = stepper._timer
+    interval_ms = config.stepper["interval_ms"]
+    seconds = 0.0
+    ticks = 0
+    for p0, p1 in moves:
+        stepper.disengage()
+        stepper.declare_position(p0)
+        stepper.set_target(p1)
+        if sampling:
+            # As update was before position_at: scanning the trajectory from its start on every tick
+            trajectory = stepper._trajectory
+            trajectory.position_at = lambda t: trajectory.sample(t).position
+        start_time = time.perf_counter()
+        while stepper.target is not None:
+            clock.now_ms += interval_ms
+            stepper.update(timer)
+            ticks += 1
+        seconds += time.perf_counter() - start_time
+    return seconds, ticks
+
+def benchmark_stepper_update():
+    """Stepper.update ticks per second on a simulated timer: sampling with sample(), with position_at, and the schedule"""
+    interval_ms = config.stepper["interval_ms"]
+    positions = [i * config.WAGON_2_STEPPER for i in range(0, config.wagon["valid_positions"], 3)]
+    moves = [(p0, p1) for p0 in positions for p1 in positions if p0 != p1]
+    variants = [
+        ("sample():", SimulatedStepper(schedule_ticks=0), True),
+        ("position_at():", SimulatedStepper(schedule_ticks=0), False),
+        ("Schedule:", SimulatedStepper(), False),
+    ]
+    
+    rates = []
+    for name, simulation, sampling in variants:
+        seconds, ticks = 0.0, 0
+        while seconds < 0.5:
+            more_seconds, more_ticks = update_seconds(simulation, moves, sampling)
+            seconds += more_seconds
+            ticks += more_ticks
+        rates.append((name, ticks / seconds))
+    
+    print(f"Stepper.update ({len(moves)} moves, {config.stepper['schedule_ticks']} tick schedule, ticks of {interval_ms} ms)")
+    for name, rate in rates:
+        print(f"  {name:<17} {rate:>12,.0f} ticks/s")
+    print(f"  Speedup:          {rates[-1][1] / rates[0][1]:>12.1f}x")
+
+if __name__ == "__main__":
+    benchmark_flight_time()
+    benchmark_stepper_update()
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Benchmark tool for Monica's local planning engines
+Measures planning time across song lengths
+"""
+
+import ast
+import os
+import random
+import sys
+import time
+import types
+from monica_pathing import Duty, Keystra, VectorKeystra, IncrementalKeystra, ParallelKeystra, Wagon
+from random_songs import create_random_song
+
+SONG_LENGTHS = [50, 200, 1000, 5000]
+
+def time_planning(keystra, duties, repeats=1):
+    """Best planning time in seconds over a few repeats"""
+    best = float('inf')
+    result = None
+    for _ in range(repeats):
+        start_time = time.perf_counter()
+        result = keystra.fill_and_explore(duties)
+        best = min(best, time.perf_counter() - start_time)
+    return best, result
+
+def benchmark_engines(lengths=SONG_LENGTHS):
+    """Compare the loop engine against the vectorized engine"""
+    print("Loop vs vectorized Keystra")
+    print(f"{'duties':>8} {'loop (ms)':>12} {'numpy (ms)':>12} {'speedup':>9} {'paths':>7}")
+    
+    wagon = Wagon()
+    loop_keystra = Keystra(wagon)
+    vector_keystra = VectorKeystra(wagon)
+    
+    for length in lengths:
+        duties = create_random_song(length, seed=length)
+        loop_time, (_, loop_path) = time_planning(loop_keystra, duties)
+        vector_time, (_, vector_path) = time_planning(vector_keystra, duties, repeats=3)
+        same = "same" if loop_path == vector_path else "DIFF"
+        print(f"{length:>8} {loop_time * 1000:>12.1f} {vector_time * 1000:>12.1f} {loop_time / vector_time:>8.1f}x {same:>7}")
+
+# MicroPython boxes every float and every int outside the small int range (31 bit signed on the RP2040)
+MICROPYTHON_SMALL_INT = 1 << 30
+
+
+class AllocationCounter(ast.NodeTransformer):
+    """CPython shim that wraps every arithmetic result of a module in a call that counts
+    the values MicroPython would have to allocate on its heap"""
+    
+    def __init__(self):
+        self.allocations = 0
+    
+    def count(self, value):
+        if type(value) is float or (type(value) is int and not -MICROPYTHON_SMALL_INT <= value < MICROPYTHON_SMALL_INT):
+            self.allocations += 1
+        return value
+    
+    def _wrap(self, node):
+        call = ast.Call(func=ast.Name(id='__count_allocation__', ctx=ast.Load()), args=[node], keywords=[])
+        return ast.copy_location(call, node)
+    
+    def visit_BinOp(self, node):
+        return self._wrap(self.generic_visit(node))
+    
+    def visit_UnaryOp(self, node):
+        return self._wrap(self.generic_visit(node))
+    
+    def visit_AugAssign(self, node):
+        node = self.generic_visit(node)
+        target = ast.copy_location(type(node.target)(**{**vars(node.target), 'ctx': ast.Load()}), node.target)
+        value = self._wrap(ast.copy_location(ast.BinOp(left=target, op=node.op, right=node.value), node))
+        return ast.copy_location(ast.Assign(targets=[node.target], value=value), node)
+    
+    def load(self, module_name, path, namespace=None):
+        """Execute a firmware source file with counted arithmetic and register it as a module"""
+        with open(path) as source:
+            tree = ast.fix_missing_locations(self.visit(ast.parse(source.read(), path)))
+        module = types.ModuleType(module_name)
+        module.__file__ = path
+        module.__dict__.update(namespace or {})
+        module.__dict__['__count_allocation__'] = self.count
+        sys.modules[module_name] = module
+        exec(compile(tree, path, 'exec'), module.__dict__)
+        return module
+
+
+def benchmark_fixed_point(lengths=(50, 200, 1000)):
+    """Compare float (compact) and fixed-point planning on the device Keystra, counting MicroPython allocations"""
+    from firmware import ROOT, build_wagon, config
+    from random_songs import create_device_song
+    
+    real_math = sys.modules['utils.math']
+    counter = AllocationCounter()
+    counter.load('utils.math', os.path.join(ROOT, 'utils', 'math.py'))
+    counted_keystra = counter.load('monica.keystra_counted', os.path.join(ROOT, 'monica', 'keystra.py'))
+    wagon = build_wagon()
+    
+    print("\nDevice Keystra: float vs fixed-point (allocations counted as MicroPython would box them)")
+    print(f"{'duties':>8} {'float (ms)':>11} {'fixed (ms)':>11} {'float allocs':>13} {'fixed allocs':>13} {'paths':>7}")
+    try:
+        for length in lengths:
+            duties = create_device_song(length, seed=length)
+            results = {}
+            for mode in ("compact", "fixed"):
+                settings = dict(config.keystra, mode=mode)
+                keystra = counted_keystra.Keystra(wagon, **settings)
+                counter.allocations = 0
+                start_time = time.perf_counter()
+                _, path = keystra.fill_and_explore(duties)
+                results[mode] = (time.perf_counter() - start_time, counter.allocations, path)
+            
+            float_time, float_allocs, float_path = results["compact"]
+            fixed_time, fixed_allocs, fixed_path = results["fixed"]
+            same = "same" if float_path == fixed_path else "diff"
+            print(f"{length:>8} {float_time * 1000:>11.1f} {fixed_time * 1000:>11.1f} {float_allocs:>13,} {fixed_allocs:>13,} {same:>7}")
+    finally:
+        # Restore the real modules for anyone importing them afterwards
+        sys.modules.pop('monica.keystra_counted', None)
+        sys.modules['utils.math'] = real_math
+
+def benchmark_reachability_band(rail_positions=(12, 24, 48), length=200):
+    """Compare banded and full-scan planning on the device Keystra as the rail gets more positions"""
+    from firmware import build_keystra, config, Keyboard, SimpleAgent, Wagon
+    from random_songs import create_device_song
+    
+    duties = create_device_song(length, seed=length)
+    ik_agent = SimpleAgent(config.stepper["cruise_speed"], config.stepper["accel"])
+    
+    print(f"\nDevice Keystra: full scan vs reachability band ({length} duties, compact mode)")
+    print(f"{'positions':>10} {'full (ms)':>10} {'band (ms)':>10} {'speedup':>9} {'paths':>7}")
+    for positions in rail_positions:
+        # A longer rail needs a longer keyboard, two semitones per white key is always enough
+        keyboard = Keyboard(config.keyboard["start"], config.keyboard["start"] + 2 * (positions + 14))
+        settings = dict(config.wagon, valid_positions=positions)
+        wagon = Wagon(keyboard, ik_agent.flight_time, **settings)
+        keystra = build_keystra(wagon, mode="compact")
+        
+        band_time, (_, band_path) = time_planning(keystra, duties)
+        # An instance attribute shadows the method, so every pair gets scored again
+        wagon.reach_radius = lambda duration_ms: positions - 1
+        full_time, (_, full_path) = time_planning(keystra, duties)
+        
+        same = "same" if band_path == full_path else "diff"
+        print(f"{positions:>10} {full_time * 1000:>10.1f} {band_time * 1000:>10.1f} {full_time / band_time:>8.1f}x {same:>7}")
+
+def benchmark_incremental_edits(lengths=SONG_LENGTHS, edits=20):
+    """Compare the latency of one duty edit against a full replan"""
+    from test_incremental_pathing import create_random_edit
+    
+    print(f"\nIncremental re-planning: one duty edit vs full replan (average of {edits} edits)")
+    print(f"{'duties':>8} {'replan (ms)':>12} {'edit (ms)':>10} {'speedup':>9} {'rows':>7} {'paths':>7}")
+    
+    wagon = Wagon()
+    for length in lengths:
+        rng = random.Random(length)
+        keystra = IncrementalKeystra(wagon)
+        replan_time, (duties, _) = time_planning(keystra, create_random_song(length, seed=length))
+        
+        edit_time = 0.0
+        recomputed = 0
+        for _ in range(edits):
+            index = rng.randrange(len(duties))
+            edit = create_random_edit(duties[index], rng)
+            start_time = time.perf_counter()
+            duties, path = keystra.replace_duty(index, edit)
+            edit_time += time.perf_counter() - start_time
+            recomputed += keystra.last_recomputed_rows
+        edit_time /= edits
+        
+        _, full_path = IncrementalKeystra(wagon).fill_and_explore(duties)
+        same = "same" if path == full_path else "DIFF"
+        print(f"{length:>8} {replan_time * 1000:>12.1f} {edit_time * 1000:>10.2f} {replan_time / edit_time:>8.1f}x {recomputed // edits:>7} {same:>7}")
+
+def benchmark_parallel(lengths=(5000, 20000), chunk_duties=1000):
+    """Compare the vectorized engine against the process pool engine on long songs"""
+    wagon = Wagon()
+    vector_keystra = VectorKeystra(wagon)
+    parallel_keystra = ParallelKeystra(wagon, chunk_duties=chunk_duties, always_chunk=True)
+    
+    # Chunking does more work than one pass, so it only pays off with at least as many workers as the work ratio
+    # (ParallelKeystra.MIN_WORKERS is set from it). On one worker the ratio is simply the inverse of the speedup
+    print(f"\nVectorized vs parallel Keystra ({parallel_keystra.workers} workers, {chunk_duties} duties per chunk)")
+    print(f"{'duties':>8} {'numpy (ms)':>12} {'parallel (ms)':>14} {'speedup':>9} {'pays off':>9}")
+    for length in lengths:
+        duties = create_random_song(length, seed=length)
+        vector_time, _ = time_planning(vector_keystra, duties)
+        parallel_time, _ = time_planning(parallel_keystra, duties)
+        pays_off = "yes" if ParallelKeystra.pays_off(len(Duty.fill_with_silence(duties)), parallel_keystra.workers, chunk_duties) else "no"
+        print(f"{length:>8} {vector_time * 1000:>12.1f} {parallel_time * 1000:>14.1f} {vector_time / parallel_time:>8.1f}x {pays_off:>9}")
+    if parallel_keystra.workers == 1:
+        print(f"  Work ratio {parallel_time / vector_time:.1f}: chunking needs at least that many workers to pay off")
+
+if __name__ == "__main__":
+    lengths = [int(arg) for arg in sys.argv[1:]] or SONG_LENGTHS
+    benchmark_engines(lengths)
+    benchmark_fixed_point()
+    benchmark_reachability_band()
+    benchmark_incremental_edits(lengths)
+    benchmark_parallel()
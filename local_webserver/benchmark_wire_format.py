@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Benchmark tool for the performance wire formats
+Compares payload size and the time to get from the received bytes to the DutyTable playback runs on, for JSON and packed
+performances. Times are CPython's: its json module is a C extension, while the Pico's parses in MicroPython's own
+runtime and builds every dict and string on its small heap, so the ratio here doesn't stand for the Pico's
+"""
+
+import json
+import sys
+import time
+from firmware import build_wagon
+from monica.duty import Duty
+from utils.music.chord import Chord
+from monica_pathing import Keystra, Wagon
+from performance_wire import encode_performance
+from monica.duty_table import DutyTable
+from random_songs import create_random_song
+
+def decode_json(data: bytes, wagon):
+    """What the command server does with a JSON performance: parse, build Duty objects from the dicts, then the table"""
+    command = json.loads(data.decode().strip())
+    duties = []
+    for duty_data in command['duties']:
+        chord = Chord.from_text(duty_data['chord']) if duty_data.get('chord') else None
+        duties.append(Duty(duty_data['start_ms'], duty_data['duration_ms'], chord, duty_data.get('skid', 0), duty_data.get('volume_percent')))
+    return DutyTable.from_duties(duties, command['path'], wagon)
+
+def best_time(function, data, wagon, repeats=20):
+    best = float('inf')
+    for _ in range(repeats):
+        start_time = time.perf_counter()
+        function(data, wagon)
+        best = min(best, time.perf_counter() - start_time)
+    return best
+
+def benchmark_wire_format(length=500):
+    """Size and decode time of one planned song in both formats"""
+    keystra = Keystra(Wagon())
+    duties, path = keystra.fill_and_explore(create_random_song(length, seed=length))
+    duties = duties[:length]
+    path = path[:length + 1]
+    duties_dict = [duty.to_dict() for duty in duties]
+    
+    json_data = (json.dumps({
+        "type": "play_performance_with_pathing",
+        "song": "benchmark",
+        "duties": duties_dict,
+        "path": path
+    }) + "\n").encode()
+    packed_data = encode_performance(duties_dict, path)
+    wagon = build_wagon()  # The firmware's, which playback keys the table to
+    
+    json_time = best_time(decode_json, json_data, wagon)
+    packed_time = best_time(DutyTable.from_packed, packed_data, wagon)
+    
+    print(f"Performance wire formats ({length} duties, bytes to DutyTable on CPython, not representative of the Pico)")
+    print(f"{'format':>8} {'bytes':>8} {'decode (ms)':>12}")
+    print(f"{'json':>8} {len(json_data):>8,} {json_time * 1000:>12.2f}")
+    print(f"{'packed':>8} {len(packed_data):>8,} {packed_time * 1000:>12.2f}")
+    ratio = json_time / packed_time
+    speed = f"{ratio:.1f}x faster" if ratio >= 1 else f"{1 / ratio:.1f}x slower"
+    print(f"packed is {len(json_data) / len(packed_data):.1f}x smaller and decodes {speed}")
+
+if __name__ == "__main__":
+    benchmark_wire_format(int(sys.argv[1]) if len(sys.argv) > 1 else 500)
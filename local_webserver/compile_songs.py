@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Compiles the songwriter songs and their plans into monica/compiled_songs.py
+Each song becomes a bytes constant in the packed performance format (monica/wire.py), planned with the device Keystra.
+Frozen into the firmware, the constants stay in flash, so the Pico plays them with no planning delay and next to no RAM.
+
+Usage: python compile_songs.py [--check]
+With --check nothing is written, and the exit code tells whether monica/compiled_songs.py is up to date.
+"""
+
+import os
+import sys
+from firmware import ROOT, build_keystra
+from monica import songwriter, wire
+from monica.planner import plan_settings
+
+OUTPUT_PATH = os.path.join(ROOT, 'monica', 'compiled_songs.py')
+BYTES_PER_LINE = 24
+
+
+def compile_song(keystra, song_function) -> bytes:
+    """Plan a songwriter song with the device Keystra and pack it"""
+    duties, path = keystra.fill_and_explore(song_function())
+    return wire.pack_duties(duties, path)
+
+
+def bytes_literal(data: bytes, indent: str) -> str:
+    """A bytes constant split over lines, as implicitly concatenated literals"""
+    lines = [repr(data[i:i + BYTES_PER_LINE]) for i in range(0, len(data), BYTES_PER_LINE)]
+    return ('\n' + indent).join(lines)
+
+
+def compile_songs() -> str:
+    """Source of the compiled songs module"""
+    keystra = build_keystra()
+    settings = plan_settings()
+    lines = [
+        "# Generated by local_webserver/compile_songs.py from monica/songwriter.py, do not edit.",
+        "# Songs planned on the host in the packed performance format (monica/wire.py), played by monica.planner.plan_table_by_name",
+        "# while the config matches PLANNED_WITH",
+        "",
+        f"PLANNED_WITH = {settings!r}",
+        "",
+        "SONGS = {",
+    ]
+    for name, song_function in songwriter.SONGS.items():
+        data = compile_song(keystra, song_function)
+        lines.append(f"\t\t{name!r}: (")
+        lines.append("\t\t\t" + bytes_literal(data, "\t\t\t"))
+        lines.append("\t\t),")
+    lines.append("}")
+    return '\n'.join(lines) + '\n'
+
+
+def main(check: bool = False) -> int:
+    # The songwriter prints every song it builds, which is just noise here
+    stdout = sys.stdout
+    sys.stdout = open(os.devnull, 'w')
+    try:
+        source = compile_songs()
+    finally:
+        sys.stdout.close()
+        sys.stdout = stdout
+
+    try:
+        with open(OUTPUT_PATH) as f:
+            current = f.read()
+    except OSError:
+        current = None
+
+    if check:
+        if source == current:
+            print(f"{OUTPUT_PATH} is up to date")
+            return 0
+        print(f"{OUTPUT_PATH} is out of date, run compile_songs.py")
+        return 1
+
+    with open(OUTPUT_PATH, 'w') as f:
+        f.write(source)
+    print(f"Compiled {len(songwriter.SONGS)} songs into {OUTPUT_PATH} ({len(source):,} characters)")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main(check='--check' in sys.argv[1:]))
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Host loader for Monica's pure-Python firmware modules
+monica/__init__.py builds the device (pins, timers, servos), so the package is registered here without running it.
+That lets the planning modules (duty, wagon, keystra, songwriter) and utils run under CPython for tests and tools.
+"""
+
+import os
+import sys
+import types
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+if 'monica' not in sys.modules:
+    _package = types.ModuleType('monica')
+    _package.__path__ = [os.path.join(ROOT, 'monica')]
+    sys.modules['monica'] = _package
+
+import config
+from utils.music.keyboard import Keyboard
+from utils.linear_kinematics.simple_agent import SimpleAgent
+from utils.linear_kinematics.stepper_agent import stepper_agent
+from monica.wagon import Wagon
+from monica.keystra import Keystra
+
+
+def build_wagon(**overrides) -> Wagon:
+    """Build the device Wagon from config, as monica/__init__.py does, optionally overriding some of its settings"""
+    keyboard = Keyboard(**config.keyboard)
+    ik_agent = stepper_agent(config.stepper["cruise_speed"], config.stepper["accel"], config.stepper.get("jerk"))
+    settings = dict(config.wagon)
+    settings.update(overrides)
+    return Wagon(keyboard, ik_agent.flight_time, **settings)
+
+
+def build_keystra(wagon: Wagon = None, **overrides) -> Keystra:
+    """Build the device Keystra from config, optionally overriding some of its settings"""
+    settings = dict(config.keystra)
+    settings.update(overrides)
+    return Keystra(wagon or build_wagon(), **settings)
@@ -7,13 +7,18 @@ Runs on your computer and communicates with Pico over network
 from flask import Flask, render_template, request, jsonify
 import socket
 import json
+import logging
 import threading
 import time
 import os
+import struct
 from werkzeug.utils import secure_filename
 from monica_pathing import song_planner
 from midi_processor import midi_processor
 from local_duty_calculator import local_duty_calculator
+from plan_cache import plan_cache
+from performance_wire import FORMAT_NAME, encode_performance
+from monica.telemetry import FIELDS as TELEMETRY_FIELDS, unpack_rows
 
 app = Flask(__name__)
 
@@ -31,10 +36,14 @@ class PicoClient:
     def __init__(self, pico_ip, pico_port):
         self.pico_ip = pico_ip
         self.pico_port = pico_port
+        self._capabilities = None
     
-    def send_command(self, command, retries=2):
-        """Send command to Pico and get response with optimized speed"""
+    def send_command(self, command, retries=2, payload=None):
+        """Send command to Pico and get response with optimized speed
+        A binary payload goes right after the JSON line, announced by its payload_size"""
         last_error = None
+        if payload is not None:
+            command = dict(command, payload_size=len(payload))
         
         for attempt in range(retries):
             try:
@@ -46,7 +55,9 @@ class PicoClient:
                 
                 # Send command
                 command_str = json.dumps(command) + "\n"
-                sock.send(command_str.encode())
+                sock.sendall(command_str.encode())
+                if payload is not None:
+                    sock.sendall(payload)
                 
                 # Receive response with optimized timeout
                 response_data = b""
@@ -91,6 +102,41 @@ class PicoClient:
                 print(f"Quick retry {attempt + 1}/{retries} after error: {last_error}")
         
         return {"error": f"Connection failed after {retries} attempts: {last_error}"}
+    
+    def get_capabilities(self):
+        """Formats the Pico understands, asked once per client. Firmware without the command only takes JSON"""
+        if self._capabilities is None:
+            response = self.send_command({"type": "capabilities"})
+            if response.get("success"):
+                self._capabilities = response
+            elif "Unknown command type" in response.get("error", ""):
+                self._capabilities = {"formats": ["json"]}
+            else:
+                # Unreachable Pico, ask again next time
+                return {"formats": ["json"]}
+        return self._capabilities
+    
+    def send_performance(self, song_name, duties_dict, path):
+        """Send a planned performance in the most compact format the Pico supports, falling back to JSON"""
+        capabilities = self.get_capabilities()
+        if FORMAT_NAME in capabilities.get("formats", []):
+            try:
+                payload = encode_performance(duties_dict, path)
+            except (ValueError, struct.error) as e:
+                print(f"Packed encoding failed, sending JSON: {e}")
+            else:
+                return self.send_command({
+                    "type": "play_performance_packed",
+                    "song": song_name,
+                    "format": FORMAT_NAME
+                }, payload=payload)
+        
+        return self.send_command({
+            "type": "play_performance_with_pathing",
+            "song": song_name,
+            "duties": duties_dict,
+            "path": path
+        })
 
 pico_client = PicoClient(PICO_IP, PICO_PORT)
 
@@ -113,6 +159,33 @@ def get_status():
     response = pico_client.send_command({"type": "status"})
     return jsonify(response)
 
+@app.route('/api/playback_stats')
+def get_playback_stats():
+    """Get onset lateness of the last song the Pico played"""
+    response = pico_client.send_command({"type": "playback_stats"})
+    return jsonify(response)
+
+@app.route('/api/telemetry')
+def get_telemetry():
+    """Get playback telemetry rows from the Pico, decoded, with the lateness of each onset"""
+    after = request.args.get('after', -1, type=int)
+    limit = request.args.get('limit', 64, type=int)
+    response = pico_client.send_command({"type": "telemetry", "after": after, "limit": limit})
+    if not response.get("success"):
+        return jsonify(response)
+    
+    dump = response["telemetry"]
+    rows = [dict(zip(TELEMETRY_FIELDS, row)) for row in unpack_rows(dump)]
+    for row in rows:
+        row["lateness_ms"] = row["actual_ms"] - row["planned_ms"]
+    return jsonify({
+        "success": True,
+        "first": dump["first"],
+        "recorded": dump["recorded"],
+        "lost": dump["lost"],
+        "rows": rows
+    })
+
 @app.route('/api/list_songs')
 def list_songs():
     """Get list of available songs"""
@@ -133,12 +206,7 @@ def start_performance():
             duties_dict, path = song_planner.plan_song_by_name(song_name)
             
             # Send pre-processed pathing to Pico
-            response = pico_client.send_command({
-                "type": "play_performance_with_pathing",
-                "song": song_name,
-                "duties": duties_dict,
-                "path": path
-            })
+            response = pico_client.send_performance(song_name, duties_dict, path)
             return jsonify(response)
         except Exception as e:
             print(f"Local pathing failed: {e}")
@@ -324,6 +392,14 @@ def local_duty_status():
     except Exception as e:
         return jsonify({"success": False, "error": str(e)})
 
+@app.route('/api/plan_cache', methods=['GET'])
+def plan_cache_status():
+    """Get hit/miss metrics of the plan cache"""
+    try:
+        return jsonify({"success": True, "stats": plan_cache.get_stats()})
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)})
+
 @app.route('/api/set_cart_position', methods=['POST'])
 def set_cart_position():
     """Set cart position (for local duty calculation)"""
@@ -433,13 +509,8 @@ def play_midi():
     try:
         midi_data = processed_midi_data[filename]
         
-        # Send MIDI performance to Pico using existing command type
-        response = pico_client.send_command({
-            "type": "play_performance_with_pathing",
-            "song": f"midi_{filename}",  # Use filename as song identifier
-            "duties": midi_data['duties'],
-            "path": midi_data['path']
-        })
+        # Send MIDI performance to Pico, using the filename as song identifier
+        response = pico_client.send_performance(f"midi_{filename}", midi_data['duties'], midi_data['path'])
         
         return jsonify(response)
         
@@ -515,4 +586,5 @@ if __name__ == '__main__':
     print("Config: http://localhost:5000/config")
     print("\nStarting server...")
     
+    logging.basicConfig(level=logging.INFO, format="%(name)s: %(message)s")
     app.run(host='0.0.0.0', port=5000, debug=True)
@@ -5,13 +5,18 @@ Converts MIDI files to Monica Duty objects for pathing
 """
 
 import math
+import os
 from typing import List, Dict, Tuple, Optional, Set
 from dataclasses import dataclass
 from collections import defaultdict
 import json
+import logging
 
 # Import Monica's existing classes
-from monica_pathing import Chord, Duty, SongPlanner
+from monica_pathing import Chord, Duty, SongPlanner, numpy_available
+from plan_cache import PlanCache, plan_cache
+
+logger = logging.getLogger(__name__)
 
 
 @dataclass
@@ -346,9 +351,8 @@ class MIDIToDutyConverter:
                 # Shorten the duty by the overlap amount, but keep minimum 50ms
                 new_duration = max(50, duty.duration_ms - overlap)
                 
-                print(f"MIDI Processing: Resolved overlap for duty {i+1}: "
-                      f"start {duty.start_ms}ms -> {current_time}ms, "
-                      f"duration {duty.duration_ms}ms -> {new_duration}ms")
+                logger.debug("Resolved overlap for duty %d: start %dms -> %dms, duration %dms -> %dms",
+                             i + 1, duty.start_ms, current_time, duty.duration_ms, new_duration)
                 
                 duty = Duty(
                     start_ms=current_time,
@@ -371,7 +375,7 @@ class MIDIToDutyConverter:
         if len(duties) <= target_count:
             return duties
         
-        print(f"MIDI Processing: Optimizing {len(duties)} duties to {target_count} for Pico memory limits")
+        logger.info("Optimizing %d duties to %d for Pico memory limits", len(duties), target_count)
         
         # Strategy: Keep most important duties based on volume and duration
         # 1. Calculate importance score for each duty
@@ -411,17 +415,18 @@ class MIDIToDutyConverter:
         # 4. Sort by time to maintain chronological order
         optimized_duties.sort(key=lambda d: d.start_ms)
         
-        print(f"MIDI Processing: Reduced from {len(duties)} to {len(optimized_duties)} duties")
-        print(f"MIDI Processing: Kept {(len(optimized_duties)/len(duties)*100):.1f}% of original duties")
+        logger.info("Reduced from %d to %d duties", len(duties), len(optimized_duties))
+        logger.info("Kept %.1f%% of original duties", len(optimized_duties) / len(duties) * 100)
         
         return optimized_duties
 
 
 class MIDIProcessor:
-    """Main interface for MIDI processing"""
+    """Main interface for MIDI processing. Plans go through the shared plan cache unless given another one"""
     
-    def __init__(self):
+    def __init__(self, cache: Optional[PlanCache] = None):
         self.converter = MIDIToDutyConverter()
+        self.cache = plan_cache if cache is None else cache
     
     def process_midi_file(self, midi_file_path: str) -> Tuple[List[Duty], List[int], Dict]:
         """
@@ -433,21 +438,30 @@ class MIDIProcessor:
         
         # Final safety check - if still too many duties, apply emergency optimization
         if len(duties) > 500:
-            print(f"MIDI Processing: Emergency optimization - {len(duties)} duties still too many")
+            logger.warning("Emergency optimization - %d duties still too many", len(duties))
             duties = self.converter._optimize_duties(duties, 200)  # Emergency reduction
             metadata['total_duties'] = len(duties)
             metadata['optimized'] = True
         
         # Generate pathing using existing Monica pathing system
-        song_planner = SongPlanner()
-        duties_dict, path = song_planner.keystra.fill_and_explore(duties)
-        
-        # Convert duties to serializable format
-        duties_dict = [duty.to_dict() for duty in duties_dict]
+        # Uploads are capped at 500 duties, far below where the parallel engine pays off (see ParallelKeystra.pays_off)
+        song_planner = SongPlanner(engine="numpy" if numpy_available() else "loop", cache=self.cache)
+        
+        # Identical uploads convert to identical duties, so their plan comes straight from the cache
+        key = self.cache.plan_key(duties, song_planner.keystra)
+        cached = self.cache.get(key)
+        if cached is not None:
+            duties_dict, path = cached
+        else:
+            duties_dict, path = song_planner.keystra.fill_and_explore(duties)
+            
+            # Convert duties to serializable format
+            duties_dict = [duty.to_dict() for duty in duties_dict]
+            self.cache.put(key, duties_dict, path)
         
         # Final check on final duties count
         if len(duties_dict) > 500:
-            print(f"MIDI Processing: WARNING - Final duty count {len(duties_dict)} may cause Pico memory issues")
+            logger.warning("Final duty count %d may cause Pico memory issues", len(duties_dict))
         
         return duties_dict, path, metadata
     
@@ -474,6 +488,7 @@ midi_processor = MIDIProcessor()
 if __name__ == "__main__":
     # Example usage
     import sys
+    logging.basicConfig(level=logging.INFO, format="MIDI Processing: %(message)s")
     
     if len(sys.argv) != 2:
         print("Usage: python midi_processor.py <midi_file>")
@@ -6,8 +6,20 @@ Processes song pathing locally instead of on the Pico for better performance
 
 import json
 import math
+import os
+from concurrent.futures import ProcessPoolExecutor
 from typing import List, Optional, Tuple, Union
 from dataclasses import dataclass
+from plan_cache import PlanCache, plan_cache
+import firmware
+from utils.music.chord import Chord as DeviceChord
+from utils.music.notes import name_2_note
+
+# The Pico plans with config.keystra, so the host does too unless told otherwise
+NOTES_BONUS = firmware.config.keystra['notes_bonus']
+SKID_BONUS = firmware.config.keystra['skid_bonus']
+MOVE_PENALTY = firmware.config.keystra['move_penalty']
+TIME_PENALTY = firmware.config.keystra['time_penalty']
 
 
 @dataclass
@@ -84,52 +96,74 @@ class Duty:
 
 
 class Wagon:
-    """Represents Monica's wagon system for position management"""
+    """Monica's wagon on the host: the device Wagon (monica/wagon.py) built from config exactly as the Pico builds it,
+    with the same stepper IK agent flight times and finger spans, so host plans are the plans the Pico would compute.
+    Host chords hold note names, which are translated to the device's MIDI note numbers on the way in."""
+    
+    def __init__(self, valid_positions: Optional[int] = None):
+        settings = {} if valid_positions is None else {'valid_positions': valid_positions}
+        self._device_wagon = firmware.build_wagon(**settings)
+        self._fingers = len(firmware.config.wagon['structure'])
+        self._device_chords = {}
+        
+        self._settings = {
+            'keyboard': firmware.config.keyboard,
+            'wagon': dict(firmware.config.wagon, **settings),
+            'cruise_speed': firmware.config.stepper['cruise_speed'],
+            'accel': firmware.config.stepper['accel'],
+        }
+        if firmware.config.stepper.get('jerk') is not None:
+            self._settings['jerk'] = firmware.config.stepper['jerk']
+    
+    @property
+    def valid_positions(self) -> int:
+        return self._device_wagon.valid_positions
     
-    def __init__(self, valid_positions: int = 12):
-        self.valid_positions = valid_positions
+    def _device_chord(self, chord: Optional[Chord]):
+        """Device Chord for a host Chord, or None for silences and chords with no known note names"""
+        if not chord or not chord.notes:
+            return None
+        
+        key = tuple(chord.notes)
+        if key not in self._device_chords:
+            notes = []
+            for name in chord.notes:
+                try:
+                    notes.append(name_2_note(name))
+                except ValueError:
+                    pass  # Placeholder names (like the local duty calculator's) cover no keys
+            self._device_chords[key] = DeviceChord(notes) if notes else None
+        return self._device_chords[key]
     
     def flight_time(self, from_pos: int, to_pos: int) -> float:
-        """Calculate time needed to move between positions (simplified)"""
-        distance = abs(to_pos - from_pos)
-        # Simplified flight time calculation (adjust based on actual Monica specs)
-        return distance * 50.0  # 50ms per position
+        """Precomputed time (s) needed to move between positions"""
+        return self._device_wagon.flight_time(from_pos, to_pos)
+    
+    def settings(self) -> dict:
+        """Everything that changes planning results, for cache keys"""
+        return self._settings
+    
+    def reach_radius(self, duration_ms: int) -> int:
+        """Largest position distance that might be flown within duration_ms"""
+        return self._device_wagon.reach_radius(duration_ms)
     
     def covering_qualities(self, chord: Optional[Chord]) -> List[float]:
-        """Calculate covering quality for each position (simplified)"""
-        if not chord or not chord.notes:
+        """Number of chord notes each position can press"""
+        device_chord = self._device_chord(chord)
+        if device_chord is None:
             return [0.0] * self.valid_positions
-        
-        # Simplified quality calculation - in real Monica this would be more complex
-        # For now, return a basic quality distribution
-        qualities = []
-        for pos in range(self.valid_positions):
-            # Basic quality based on position (higher positions for higher notes)
-            base_quality = 1.0 - (abs(pos - self.valid_positions // 2) / (self.valid_positions // 2))
-            qualities.append(max(0.1, base_quality))
-        
-        return qualities
+        return self._device_wagon.covering_qualities(device_chord)
     
     def calculate_fingerings(self, chord: Optional[Chord], position: int) -> List[Optional[int]]:
-        """Calculate optimal fingerings for a chord at a given position (simplified)"""
-        if not chord or not chord.notes:
-            return [None] * 7  # 7 fingers, all at home
-        
-        # Simplified fingering calculation
-        # In reality, this would be much more complex
-        fingerings = [None] * 7
-        
-        # For now, just assign fingers based on chord notes
-        for i, note in enumerate(chord.notes[:7]):  # Max 7 fingers
-            if i < 7:
-                fingerings[i] = 0  # Left position for all fingers
-        
-        return fingerings
+        """Key index each finger should press for a chord at a given position, None for fingers staying home"""
+        device_chord = self._device_chord(chord)
+        if device_chord is None:
+            return [None] * self._fingers
+        return self._device_wagon.calculate_fingerings(device_chord, position)
     
     def calculate_steps(self, position: int) -> float:
-        """Calculate stepper steps for a given position (simplified)"""
-        # Simplified calculation - in reality this would use wagon_2_stepper ratio
-        return position * 100.0  # 100 steps per position
+        """Stepper steps for a given position"""
+        return self._device_wagon.calculate_steps(position)
 
 
 class Choice:
@@ -143,8 +177,8 @@ class Choice:
 class Keystra:
     """Pathfinding optimizer for Monica"""
     
-    def __init__(self, wagon: Wagon, notes_bonus: float = 1.0, skid_bonus: float = 0.5, 
-                 move_penalty: float = 0.1, time_penalty: float = 0.01):
+    def __init__(self, wagon: Wagon, notes_bonus: float = NOTES_BONUS, skid_bonus: float = SKID_BONUS, 
+                 move_penalty: float = MOVE_PENALTY, time_penalty: float = TIME_PENALTY):
         self._wagon = wagon
         self._positions = wagon.valid_positions
         self._silence_quality = [0.0] * self._positions
@@ -154,6 +188,17 @@ class Keystra:
         self._move_penalty = move_penalty
         self._time_penalty = time_penalty
     
+    def settings(self) -> dict:
+        """Engine, weights and wagon settings, everything that changes the planned path, for cache keys"""
+        return {
+            'engine': type(self).__name__,
+            'notes_bonus': self._notes_bonus,
+            'skid_bonus': self._skid_bonus,
+            'move_penalty': self._move_penalty,
+            'time_penalty': self._time_penalty,
+            'wagon': self._wagon.settings(),
+        }
+    
     def choice_quality(self, prev_time_ms: int, next_time_ms: int, prev_pos: int, 
                       next_pos: int, covering_quality: float, skid: int) -> float:
         """Calculate quality of a path choice"""
@@ -162,7 +207,9 @@ class Keystra:
         # Bias towards balanced trajectories across time
         delta_time = (next_time_ms - prev_time_ms) / 1000.0
         delta_pos = next_pos - prev_pos
-        quality -= math.sqrt(self._move_penalty * delta_pos**2 + self._time_penalty * delta_time**2)
+        move = self._move_penalty * delta_pos
+        time = self._time_penalty * delta_time
+        quality -= math.sqrt(move * move + time * time)
         
         flight_time = self._wagon.flight_time(prev_pos, next_pos)
         if flight_time > delta_time:
@@ -185,12 +232,14 @@ class Keystra:
         for duty in duties:
             next_choices = []
             covering_qualities = self._wagon.covering_qualities(duty.chord)
+            # Moves farther than the reach radius are too slow for this duty, so only the band around next_pos is scored
+            radius = self._wagon.reach_radius(duty.duration_ms)
             
             for next_pos in range(self._positions):
                 max_path = -1
                 max_quality = -float('inf')
                 
-                for prev_pos in range(self._positions):
+                for prev_pos in range(max(0, next_pos - radius), min(self._positions, next_pos + radius + 1)):
                     choice_quality = self.choice_quality(
                         duty.start_ms, duty.end_ms, prev_pos, next_pos, 
                         covering_qualities[prev_pos], duty.skid
@@ -215,12 +264,311 @@ class Keystra:
         return duties, path
 
 
+class IncrementalKeystra(Keystra):
+    """Keystra that keeps its forward tables, so editing one duty of a planned song only recomputes what it affects.
+    
+    Every forward row is stored shifted so its best position is 0, along with its backpointers. An edit to duty k
+    leaves rows 0..k alone and recomputes rows k+1 onwards, stopping at the first row whose shifted qualities and
+    backpointers come out bit-for-bit as before: every later row is a function of that one and of unchanged duties.
+    fill_and_explore builds its path from the same shifted rows, so replace_duty always gives exactly the path a full replan would.
+    """
+    
+    def __init__(self, wagon: Wagon, notes_bonus: float = NOTES_BONUS, skid_bonus: float = SKID_BONUS, 
+                 move_penalty: float = MOVE_PENALTY, time_penalty: float = TIME_PENALTY):
+        super().__init__(wagon, notes_bonus, skid_bonus, move_penalty, time_penalty)
+        self._duties: List[Duty] = []
+        self._rows: List[List[float]] = []
+        self._backpointers: List[List[int]] = []
+        self.last_recomputed_rows = 0
+    
+    @property
+    def duties(self) -> List[Duty]:
+        return self._duties
+    
+    def _step(self, qualities: List[float], duty: Duty) -> Tuple[List[float], List[int]]:
+        """Next shifted row of qualities and its backpointers, scored as in Keystra.fill_and_explore"""
+        covering_qualities = self._wagon.covering_qualities(duty.chord)
+        radius = self._wagon.reach_radius(duty.duration_ms)
+        next_qualities = []
+        backpointers = []
+        
+        for next_pos in range(self._positions):
+            max_path = -1
+            max_quality = -float('inf')
+            
+            for prev_pos in range(max(0, next_pos - radius), min(self._positions, next_pos + radius + 1)):
+                choice_quality = self.choice_quality(
+                    duty.start_ms, duty.end_ms, prev_pos, next_pos, 
+                    covering_qualities[prev_pos], duty.skid
+                )
+                path_quality = qualities[prev_pos] + choice_quality
+                
+                if path_quality > max_quality:
+                    max_path = prev_pos
+                    max_quality = path_quality
+            
+            next_qualities.append(max_quality)
+            backpointers.append(max_path)
+        
+        row_max = max(next_qualities)
+        return [quality - row_max for quality in next_qualities], backpointers
+    
+    def _backtrace(self) -> List[int]:
+        rows = self._rows
+        path = [-1] * len(rows)
+        path[-1] = max(range(self._positions), key=lambda pos: rows[-1][pos])
+        for i in range(len(rows) - 1, 0, -1):
+            path[i - 1] = self._backpointers[i - 1][path[i]]
+        return path
+    
+    def fill_and_explore(self, duties: List[Duty]) -> Tuple[List[Duty], List[int]]:
+        """Complete sequence with silences, find optimal path and keep the tables for later edits"""
+        self._duties = Duty.fill_with_silence(duties)
+        self._rows = [[0.0] * self._positions]
+        self._backpointers = []
+        for duty in self._duties:
+            row, backpointers = self._step(self._rows[-1], duty)
+            self._rows.append(row)
+            self._backpointers.append(backpointers)
+        self.last_recomputed_rows = len(self._duties)
+        
+        return self._duties, self._backtrace()
+    
+    def replace_duty(self, index: int, duty: Duty) -> Tuple[List[Duty], List[int]]:
+        """Replace duty index (in the filled sequence) and return the new optimal path.
+        
+        The new duty has to keep the start and duration of the old one, as retiming changes the silences around it
+        and that needs a full replan with fill_and_explore.
+        """
+        if not 0 <= index < len(self._duties):
+            raise IndexError(f"No planned duty at index {index}, {len(self._duties)} duties planned")
+        
+        old_duty = self._duties[index]
+        if duty.start_ms != old_duty.start_ms or duty.duration_ms != old_duty.duration_ms:
+            raise ValueError(f"Edited duty must keep its timing ({old_duty.start_ms} ms, {old_duty.duration_ms} ms), "
+                             f"got ({duty.start_ms} ms, {duty.duration_ms} ms). Replan the song instead")
+        
+        self._duties[index] = duty
+        recomputed = 0
+        for i in range(index, len(self._duties)):
+            row, backpointers = self._step(self._rows[i], self._duties[i])
+            recomputed += 1
+            if row == self._rows[i + 1] and backpointers == self._backpointers[i]:
+                break
+            self._rows[i + 1] = row
+            self._backpointers[i] = backpointers
+        self.last_recomputed_rows = recomputed
+        
+        return self._duties, self._backtrace()
+
+
+def _require_numpy():
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError("numpy library required for the vectorized planner. Install with: pip install numpy")
+    return numpy
+
+
+def numpy_available() -> bool:
+    """Check whether the vectorized planner can be used"""
+    try:
+        _require_numpy()
+        return True
+    except ImportError:
+        return False
+
+
+class VectorKeystra(Keystra):
+    """Keystra engine that runs every duty step as one broadcast max/argmax over a P×P transition matrix.
+    
+    Transition qualities are built with the same float operations, in the same order, as
+    Keystra.choice_quality, and argmax keeps the first maximum just like the loop's strict comparison,
+    so both engines return identical paths.
+    """
+    
+    def __init__(self, wagon: Wagon, notes_bonus: float = NOTES_BONUS, skid_bonus: float = SKID_BONUS, 
+                 move_penalty: float = MOVE_PENALTY, time_penalty: float = TIME_PENALTY):
+        super().__init__(wagon, notes_bonus, skid_bonus, move_penalty, time_penalty)
+        np = _require_numpy()
+        self._np = np
+        
+        # Matrices are indexed [prev_pos, next_pos]
+        positions = np.arange(self._positions)
+        self._delta_pos = positions[None, :] - positions[:, None]
+        self._no_skid = self._delta_pos == 0
+        move = self._move_penalty * self._delta_pos
+        self._move_term = move * move
+        self._flight_times = np.array([
+            [wagon.flight_time(prev_pos, next_pos) for next_pos in range(self._positions)]
+            for prev_pos in range(self._positions)
+        ], dtype=float)
+        
+        # Movement penalty and feasibility only depend on the duty duration, and songs reuse a few durations
+        self._duration_cache = {}
+    
+    def __getstate__(self):
+        # Modules can't be pickled, so engines sent to worker processes import numpy again on arrival
+        state = self.__dict__.copy()
+        del state['_np']
+        return state
+    
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._np = _require_numpy()
+    
+    def _duration_terms(self, duration_ms: int):
+        """Movement penalty matrix, infeasibility mask and delta time (s) for a duty duration"""
+        terms = self._duration_cache.get(duration_ms)
+        if terms is None:
+            np = self._np
+            delta_time = duration_ms / 1000.0
+            time = self._time_penalty * delta_time
+            penalty = -np.sqrt(self._move_term + time * time)
+            infeasible = self._flight_times > delta_time
+            terms = (penalty, infeasible, delta_time)
+            self._duration_cache[duration_ms] = terms
+        return terms
+    
+    def transition_qualities(self, duty: Duty):
+        """P×P matrix of choice_quality for every (prev_pos, next_pos) pair of a duty"""
+        np = self._np
+        penalty, infeasible, delta_time = self._duration_terms(duty.end_ms - duty.start_ms)
+        covering = np.array(self._wagon.covering_qualities(duty.chord), dtype=float)
+        
+        wanted_skid = self._delta_pos == duty.skid
+        valid = (wanted_skid | self._no_skid) & (covering > 0)[:, None]
+        bonus = (delta_time + 1) * (self._notes_bonus * (covering + 1)[:, None] + wanted_skid * self._skid_bonus)
+        
+        qualities = np.where(valid, penalty + bonus, penalty)
+        qualities[infeasible] = -np.inf
+        return qualities
+    
+    def forward(self, duties: List[Duty], quality):
+        """Run the forward pass over already filled duties from a row of starting qualities.
+        Returns the final row of qualities and the backpointers (one row per duty)"""
+        np = self._np
+        backpointers = np.empty((len(duties), self._positions), dtype=np.int8)
+        for i, duty in enumerate(duties):
+            path_qualities = quality[:, None] + self.transition_qualities(duty)
+            best = path_qualities.argmax(axis=0)
+            quality = path_qualities[best, np.arange(self._positions)]
+            # Keep the loop's -1 marker for unreachable positions
+            backpointers[i] = np.where(quality == -np.inf, -1, best)
+        return quality, backpointers
+    
+    def fill_and_explore(self, duties: List[Duty]) -> Tuple[List[Duty], List[int]]:
+        """Complete sequence with silences and find optimal path, one matrix step per duty"""
+        duties = Duty.fill_with_silence(duties)
+        quality, backpointers = self.forward(duties, self._np.zeros(self._positions))
+        
+        # Backtrace to find optimal path
+        path = [-1] * (len(duties) + 1)
+        path[-1] = int(quality.argmax())
+        for i in range(len(duties), 0, -1):
+            path[i - 1] = int(backpointers[i - 1][path[i]])
+        
+        return duties, path
+
+
+def _chunk_transfer(keystra: VectorKeystra, duties: List[Duty]):
+    """Worker task: P×P max-plus transfer matrix of a chunk of duties"""
+    return keystra.transfer_matrix(duties)
+
+
+def _chunk_forward(keystra: VectorKeystra, duties: List[Duty], quality):
+    """Worker task: forward pass of a chunk of duties, given the qualities the chunk starts from"""
+    return keystra.forward(duties, quality)
+
+
+class ParallelKeystra(VectorKeystra):
+    """Keystra engine that spreads long songs over a process pool.
+    
+    Each duty is a P×P max-plus matrix, and the whole forward pass is their max-plus product, which is associative.
+    The filled duties are split into chunks, and workers reduce each chunk but the last to one transfer matrix.
+    Propagating the starting row through those matrices (a short scan over C ≪ D chunks) gives the qualities every
+    chunk starts from, then workers rerun each chunk from its starting row for backpointers, and the path is traced
+    back through all of them from the best end of the last chunk.
+    
+    Chunked sums round differently from one long pass, so among equally good paths this engine may pick another one
+    than VectorKeystra. Songs where chunking doesn't pay off (see pays_off) are planned in-process with identical results.
+    """
+    
+    # The transfer matrices are P³ per duty, and benchmark_pathing.py measures the chunked pass at 3 to 5 times the work
+    # of one plain pass (0.2x-0.3x on a single worker), so with fewer workers than this it can only be slower
+    MIN_WORKERS = 6
+    
+    def __init__(self, wagon: Wagon, notes_bonus: float = NOTES_BONUS, skid_bonus: float = SKID_BONUS, 
+                 move_penalty: float = MOVE_PENALTY, time_penalty: float = TIME_PENALTY,
+                 workers: Optional[int] = None, chunk_duties: int = 500, always_chunk: bool = False):
+        super().__init__(wagon, notes_bonus, skid_bonus, move_penalty, time_penalty)
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_duties = chunk_duties
+        self.always_chunk = always_chunk  # Chunk songs longer than a chunk even where it doesn't pay off, to measure it
+    
+    @classmethod
+    def pays_off(cls, filled_duties: int, workers: Optional[int] = None, chunk_duties: int = 500) -> bool:
+        """Whether spreading this many filled duties over the pool beats one in-process pass: there have to be enough
+        workers to make up for the extra work, and at least two chunks per worker to make up for starting the pool"""
+        workers = workers or os.cpu_count() or 1
+        return workers >= cls.MIN_WORKERS and filled_duties >= 2 * workers * chunk_duties
+    
+    def transfer_matrix(self, duties: List[Duty]):
+        """Best quality from each position before the duties to each position after them"""
+        matrix = self.transition_qualities(duties[0])
+        for duty in duties[1:]:
+            # Max-plus product: matrix[i, j] = max over k of matrix[i, k] + transition[k, j]
+            matrix = (matrix[:, :, None] + self.transition_qualities(duty)[None, :, :]).max(axis=1)
+        return matrix
+    
+    def fill_and_explore(self, duties: List[Duty]) -> Tuple[List[Duty], List[int]]:
+        """Complete sequence with silences and find optimal path, chunk by chunk across worker processes"""
+        np = self._np
+        duties = Duty.fill_with_silence(duties)
+        if len(duties) <= self.chunk_duties or not (self.always_chunk or self.pays_off(len(duties), self.workers, self.chunk_duties)):
+            return super().fill_and_explore(duties)
+        
+        chunks = [duties[i:i + self.chunk_duties] for i in range(0, len(duties), self.chunk_duties)]
+        
+        with ProcessPoolExecutor(max_workers=min(self.workers, len(chunks))) as executor:
+            matrices = executor.map(_chunk_transfer, [self] * (len(chunks) - 1), chunks[:-1])
+            
+            # Starting row of every chunk
+            starts = [np.zeros(self._positions)]
+            for matrix in matrices:
+                starts.append((starts[-1][:, None] + matrix).max(axis=0))
+            
+            forwards = list(executor.map(_chunk_forward, [self] * len(chunks), chunks, starts))
+        
+        path = [-1] * (len(duties) + 1)
+        path[-1] = int(forwards[-1][0].argmax())
+        i = len(duties)
+        for _, chunk_backpointers in reversed(forwards):
+            for row in reversed(chunk_backpointers):
+                path[i - 1] = int(row[path[i]])
+                i -= 1
+        
+        return duties, path
+
+
+PLANNING_ENGINES = {
+    "loop": Keystra,
+    "numpy": VectorKeystra,
+    "incremental": IncrementalKeystra,
+    "parallel": ParallelKeystra,
+}
+
+
 class SongPlanner:
-    """Local song planner for Monica"""
+    """Local song planner for Monica. Plans go through the shared plan cache unless given another one"""
     
-    def __init__(self):
+    def __init__(self, engine: str = "loop", cache: Optional[PlanCache] = None):
+        self.cache = plan_cache if cache is None else cache
+        if engine not in PLANNING_ENGINES:
+            raise ValueError(f"Unknown planning engine '{engine}'. Available: {list(PLANNING_ENGINES.keys())}")
+        
         self.wagon = Wagon()
-        self.keystra = Keystra(self.wagon)
+        self.keystra = PLANNING_ENGINES[engine](self.wagon)
     
     def plan_song_by_name(self, song_name: str = "showcase") -> Tuple[List[dict], List[int]]:
         """Plan a specific song by name and return serialized data"""
@@ -240,6 +588,13 @@ class SongPlanner:
         s = song_func()
         print(f"Song length: {len(s)} duties")
         
+        key = self.cache.plan_key(s, self.keystra)
+        cached = self.cache.get(key)
+        if cached is not None:
+            duties_dict, path = cached
+            print(f"Plan cache hit: {len(duties_dict)} duties, {len(path)} positions")
+            return duties_dict, path
+        
         duties, path = self.keystra.fill_and_explore(s)
         print(f"Planned: {len(duties)} duties, {len(path)} positions")
         print(f"Performance time: ~{duties[-1].end_ms/1000:.1f} seconds")
@@ -247,6 +602,7 @@ class SongPlanner:
         
         # Convert duties to serializable format
         duties_dict = [duty.to_dict() for duty in duties]
+        self.cache.put(key, duties_dict, path)
         
         return duties_dict, path
     
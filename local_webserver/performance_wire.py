@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Packed performance encoding for the local webserver
+Uses the Pico's own monica/wire.py, so both ends always agree on the layout
+"""
+
+from typing import List, Tuple
+import firmware  # Registers the firmware modules before importing them
+from monica import wire
+from utils.music.chord import Chord
+
+FORMAT_NAME = wire.FORMAT_NAME
+
+
+def encode_performance(duties_dict: List[dict], path: List[int]) -> bytes:
+    """Pack serialized duties (as SongPlanner returns them) and their path, dropping notes off the keyboard"""
+    chords = [Chord.from_text(duty['chord']) if duty.get('chord') else None for duty in duties_dict]
+    base = wire.KEYBOARD_BASE
+    records = [
+        (
+            duty['start_ms'],
+            duty['duration_ms'],
+            chord.mask(base) if chord else 0,
+            duty.get('skid', 0),
+            duty.get('volume_percent'),
+        )
+        for duty, chord in zip(duties_dict, chords)
+    ]
+    return wire.pack_records(records, path, base)
+
+
+def decode_performance(data: bytes) -> Tuple[List[dict], List[int]]:
+    """Unpack a packed performance back into serialized duties, mostly for tests and tools"""
+    duties, path = wire.unpack_duties(data)
+    duties_dict = [
+        {
+            'start_ms': duty.start_ms,
+            'duration_ms': duty.duration_ms,
+            'chord': str(duty.chord) if duty.chord else None,
+            'skid': duty.skid,
+            'volume_percent': duty.volume_percent,
+        }
+        for duty in duties
+    ]
+    return duties_dict, path
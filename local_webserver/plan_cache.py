@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Content-addressed plan cache for Monica
+Plans are keyed by a hash of the duties plus the planner and wagon settings, kept in memory with LRU eviction
+and written to disk, so replaying a known song or reprocessing an identical upload skips Keystra entirely.
+The disk keeps the most recently used max_disk_entries plans, going by file modification times
+"""
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+# Bump when the planner changes in a way its settings don't show, so old plans stop matching
+CACHE_VERSION = 1
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'plan_cache')
+
+
+class PlanCache:
+    """LRU plan cache in memory, backed by one JSON file per plan on disk
+    Plans are copied in and out, so callers own what they pass to put and what get returns"""
+
+    def __init__(self, directory: Optional[str] = DEFAULT_CACHE_DIR, max_entries: int = 64, max_disk_entries: int = 1024):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.disk_evictions = 0
+
+    @staticmethod
+    def plan_key(duties: list, keystra) -> str:
+        """Hash of the duties (before filling silences) and of everything the planner scores them with"""
+        content = {
+            'version': CACHE_VERSION,
+            'planner': keystra.settings(),
+            'duties': [duty.to_dict() for duty in duties],
+        }
+        encoded = json.dumps(content, sort_keys=True, separators=(',', ':')).encode()
+        return hashlib.sha256(encoded).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    @staticmethod
+    def _copy(plan: Tuple[List[dict], List[int]]) -> Tuple[List[dict], List[int]]:
+        duties_dict, path = plan
+        return [dict(duty) for duty in duties_dict], list(path)
+
+    def _trim_disk(self, kept_key: str):
+        """Remove the least recently used plans past max_disk_entries, never kept_key's (just written)"""
+        filenames = [filename for filename in os.listdir(self.directory) if filename.endswith('.json')]
+        if len(filenames) <= self.max_disk_entries:
+            return
+        paths = sorted((os.path.join(self.directory, filename) for filename in filenames if filename != f"{kept_key}.json"),
+                       key=os.path.getmtime)
+        for path in paths[:len(filenames) - self.max_disk_entries]:
+            os.remove(path)
+            self.disk_evictions += 1
+
+    def _remember(self, key: str, plan: Tuple[List[dict], List[int]]):
+        self._entries[key] = plan
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def get(self, key: str) -> Optional[Tuple[List[dict], List[int]]]:
+        """Cached (duties_dict, path) for a key, or None"""
+        with self._lock:
+            plan = self._entries.get(key)
+            if plan is not None:
+                self._entries.move_to_end(key)
+                self.memory_hits += 1
+                return self._copy(plan)
+
+            if self.directory:
+                try:
+                    with open(self._path(key)) as f:
+                        data = json.load(f)
+                    plan = (data['duties'], data['path'])
+                    os.utime(self._path(key))  # Recently used, so the last to be trimmed
+                except (OSError, ValueError, KeyError):
+                    plan = None
+                if plan is not None:
+                    self._remember(key, plan)
+                    self.disk_hits += 1
+                    return self._copy(plan)
+
+            self.misses += 1
+            return None
+
+    def put(self, key: str, duties_dict: List[dict], path: List[int]):
+        """Store a plan in memory and on disk"""
+        with self._lock:
+            self._remember(key, self._copy((duties_dict, path)))
+            if not self.directory:
+                return
+            try:
+                os.makedirs(self.directory, exist_ok=True)
+                # Write then rename, so a crash never leaves a half written plan behind
+                temporary_path = self._path(key) + '.tmp'
+                with open(temporary_path, 'w') as f:
+                    json.dump({'duties': duties_dict, 'path': path}, f)
+                os.replace(temporary_path, self._path(key))
+                self._trim_disk(key)
+            except OSError as e:
+                print(f"Plan cache: could not write {key[:12]} to disk: {e}")
+
+    def clear(self, disk: bool = False):
+        """Forget every plan in memory, and on disk too if asked"""
+        with self._lock:
+            self._entries.clear()
+            if disk and self.directory and os.path.isdir(self.directory):
+                for filename in os.listdir(self.directory):
+                    if filename.endswith('.json'):
+                        os.remove(os.path.join(self.directory, filename))
+
+    def get_stats(self) -> dict:
+        """Hit/miss metrics for the API"""
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            requests = hits + self.misses
+            disk_entries = 0
+            if self.directory and os.path.isdir(self.directory):
+                disk_entries = sum(1 for filename in os.listdir(self.directory) if filename.endswith('.json'))
+            return {
+                'hits': hits,
+                'memory_hits': self.memory_hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'hit_rate': hits / requests if requests else 0.0,
+                'evictions': self.evictions,
+                'disk_evictions': self.disk_evictions,
+                'memory_entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'disk_entries': disk_entries,
+                'max_disk_entries': self.max_disk_entries,
+                'directory': self.directory,
+            }
+
+
+# Global instance
+plan_cache = PlanCache()
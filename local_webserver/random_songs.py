@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Random songs for the pathing tests and benchmarks
+A seed gives the same song to the host planners (monica_pathing Duties) and to the device Keystra (monica.duty Duties)
+"""
+
+import random
+from monica_pathing import Duty, Chord
+from monica.duty import Duty as DeviceDuty
+from utils.music.chord import Chord as DeviceChord
+
+NOTE_NAMES = ["F3", "G3", "A3", "B3", "C4", "D4", "E4", "F4", "G4", "A4", "B4", "C5", "D5", "E5", "F5", "G5", "A5", "B5", "C6"]
+
+def random_chord_text(rng):
+    """One to three keyboard notes, as Chord.from_text takes them"""
+    return '_'.join(rng.sample(NOTE_NAMES, rng.randint(1, 3)))
+
+def random_duties(count, seed=0):
+    """(start_ms, duration_ms, chord text or None, skid, volume_percent) of a song with chords, silences and skids"""
+    rng = random.Random(seed)
+    duties = []
+    start_ms = 0
+    for _ in range(count):
+        start_ms += rng.choice([0, 0, 50, 200])
+        duration_ms = rng.choice([50, 100, 300, 600, 1200])
+        chord = None if rng.random() < 0.2 else random_chord_text(rng)
+        skid = rng.choice([0, 0, 0, 7, -7, 1])
+        duties.append((start_ms, duration_ms, chord, skid, rng.choice([None, 50, 80])))
+        start_ms += duration_ms
+    return duties
+
+def create_random_song(count, seed=0):
+    """Random song of host Duties"""
+    return [Duty(start_ms, duration_ms, Chord.from_text(chord) if chord else None, skid, volume_percent)
+            for start_ms, duration_ms, chord, skid, volume_percent in random_duties(count, seed)]
+
+def create_device_song(count, seed=0):
+    """The same random song as device Duties"""
+    return [DeviceDuty(start_ms, duration_ms, DeviceChord.from_text(chord) if chord else None, skid, volume_percent)
+            for start_ms, duration_ms, chord, skid, volume_percent in random_duties(count, seed)]
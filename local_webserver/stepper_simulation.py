@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Host simulation of Monica's Stepper peripheral, for tests and benchmarks of its timer callback
+machine, uasyncio and MicroPython's time.ticks_* are stood in for by a simulated millisecond clock, so the firmware's
+Stepper runs unchanged under CPython, its timer firing as the Pico's would and the cart moving at the PWM's velocity.
+"""
+
+import asyncio
+import sys
+import time
+import types
+
+import firmware
+import config
+
+
+class Clock:
+    """Simulated ticks_ms, advanced only by the simulation"""
+    def __init__(self):
+        self.now_ms = 0
+
+clock = Clock()
+
+
+class Pin:
+    IN = 0
+    OUT = 1
+    PULL_UP = 1
+    PULL_DOWN = 2
+    IRQ_RISING = 4
+    IRQ_FALLING = 8
+
+    def __init__(self, *args, **kwargs):
+        self._value = 0
+
+    def __call__(self, value=None):
+        if value is None:
+            return self._value
+        self._value = value
+
+    def value(self, value=None):
+        return self(value)
+
+    def init(self, *args, **kwargs):
+        pass
+
+    def irq(self, *args, **kwargs):
+        pass
+
+
+class PWM:
+    def __init__(self, pin):
+        self.frequency = 0
+        self.duty = 0
+
+    def freq(self, value):
+        self.frequency = value
+
+    def duty_u16(self, value):
+        self.duty = value
+
+    def deinit(self):
+        pass
+
+
+class Timer:
+    """A periodic timer on the simulated clock, firing period_ms after init and then every period_ms"""
+    PERIODIC = 1
+    ONE_SHOT = 0
+
+    def __init__(self, *args, **kwargs):
+        self.callback = None
+
+    def init(self, mode=PERIODIC, period=1000, callback=None):
+        self.period_ms = period
+        self.callback = callback
+        self.next_ms = clock.now_ms + period
+
+    def deinit(self):
+        self.callback = None
+
+
+class ADC:
+    def __init__(self, pin):
+        pass
+
+    def read_u16(self):
+        return 0
+
+
+def _install():
+    """Register the stand-ins, only where the real thing is missing"""
+    if 'machine' not in sys.modules:
+        machine = types.ModuleType('machine')
+        machine.Pin, machine.PWM, machine.Timer, machine.ADC = Pin, PWM, Timer, ADC
+        sys.modules['machine'] = machine
+    if 'uasyncio' not in sys.modules:
+        uasyncio = types.ModuleType('uasyncio')
+        uasyncio.Event = asyncio.Event
+        uasyncio.sleep = asyncio.sleep
+        uasyncio.sleep_ms = lambda ms: asyncio.sleep(ms / 1000)
+        uasyncio.create_task = lambda coroutine: coroutine.close()  # Background tasks (keep_awake) never run here
+        sys.modules['uasyncio'] = uasyncio
+    import utils.log  # Before time has ticks_ms, so the log keeps the host's clock
+    if not hasattr(time, 'ticks_ms'):
+        time.ticks_ms = lambda: clock.now_ms
+        time.ticks_add = lambda ticks, delta: ticks + delta
+        time.ticks_diff = lambda after, before: after - before
+
+_install()
+
+from peripherals.abstractions import peripheral
+from peripherals.stepper import Stepper
+
+# CPython mangles the list's name inside Peripheral, MicroPython doesn't
+peripheral._Peripheral__peripherals_list = getattr(peripheral, '__peripherals_list')
+
+
+class SimulatedStepper:
+    """A Stepper from config on the simulated clock, with the cart's true position and velocity tracked every ms"""
+    def __init__(self, **overrides):
+        settings = dict(config.stepper)
+        settings.update(overrides)
+        self.stepper = Stepper(**settings)
+        self.stepper.declare_position(0)
+        self.position = 0.0
+        self.velocities = []  # The cart's velocity over every simulated ms
+        self.reached = False
+        self.stepper.register_callback("ReachedTarget", self._reached, True)
+
+    def _reached(self, *args):
+        self.reached = True
+
+    def set_target(self, target, arrival_s=None):
+        self.reached = False
+        self.stepper.set_target(target, arrival_s)
+
+    def run(self, ms, late_ms=0):
+        """Advance the clock ms milliseconds, the timer's callbacks coming late_ms after they are due"""
+        stepper = self.stepper
+        timer = stepper._timer
+        for _ in range(ms):
+            velocity = stepper.velocity
+            self.position += velocity / 1000
+            self.velocities.append(velocity)
+            clock.now_ms += 1
+            if timer.callback is not None and clock.now_ms >= timer.next_ms + late_ms:
+                timer.next_ms += timer.period_ms
+                timer.callback(timer)
+
+    def run_until_reached(self, timeout_ms=10000):
+        """Advance until the stepper reports ReachedTarget, returning False if it doesn't within timeout_ms"""
+        for _ in range(timeout_ms):
+            if self.reached:
+                return True
+            self.run(1)
+        return self.reached
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Test script for bitmask chords and the bitmask Wagon
+Checks coverings and fingerings against the set-based implementation, and chord interning
+"""
+
+import random
+import time
+from firmware import build_wagon, config, Keyboard
+from utils.music.chord import Chord
+from utils.music.notes import Note
+from monica import songwriter
+
+SMALL_INT_BITS = 30  # Non-negative ints MicroPython keeps unboxed on the Pico
+
+def set_spans(keyboard, structure, valid_positions):
+    """Note spans of each finger at each position, as the set-based Wagon sampled them"""
+    return [
+        [
+            [note for key in finger if isinstance(note := keyboard.get_note(2 * position + key), Note)]
+            for finger in structure
+        ] for position in range(valid_positions)
+    ]
+
+def set_covering_qualities(spans, chord):
+    return [sum(chord.overlaps(set(finger)) for finger in span) for span in spans]
+
+def set_fingerings(spans, chord, position):
+    def fingering(finger):
+        for i, note in enumerate(finger):
+            if note in chord:
+                return i
+        return None
+    return [fingering(finger) for finger in spans[position]]
+
+def random_chords(count, seed=0):
+    """Random chords over the keyboard and a few notes past both ends"""
+    rng = random.Random(seed)
+    low = config.keyboard["start"] - 3
+    high = config.keyboard["end"] + 3
+    return [Chord(rng.sample(range(low, high + 1), rng.randint(1, 5))) for _ in range(count)]
+
+def test_chord_bitmask():
+    """Test bitmask coverings and fingerings on random chords"""
+    print("Testing bitmask chords...")
+    
+    wagon = build_wagon()
+    keyboard = Keyboard(**config.keyboard)
+    spans = set_spans(keyboard, config.wagon["structure"], wagon.valid_positions)
+    chords = random_chords(500)
+    success = True
+    
+    mismatches = 0
+    for chord in chords:
+        if wagon.covering_qualities(chord) != set_covering_qualities(spans, chord):
+            mismatches += 1
+        for position in range(wagon.valid_positions):
+            if wagon.calculate_fingerings(chord, position) != set_fingerings(spans, chord, position):
+                mismatches += 1
+    if mismatches == 0:
+        print(f"✓ Coverings and fingerings of {len(chords)} chords match the set-based Wagon")
+    else:
+        print(f"✗ {mismatches} coverings or fingerings differ from the set-based Wagon")
+        success = False
+    
+    base = keyboard.first_note
+    in_range = [Chord([n for n in chord.notes if n >= base] or [base]) for chord in chords]
+    if all(Chord.from_mask(chord.mask(base), base) == chord for chord in in_range):
+        print("✓ Chords round trip through their masks")
+    else:
+        print("✗ Mask round trip failed")
+        success = False
+    
+    if Chord.from_text("C4_E4_G4") is Chord.from_text("C4_E4_G4") and Chord.from_text("C4_E4_G4") == Chord(60, 64, 67):
+        print("✓ Parsed chords are interned")
+    else:
+        print("✗ Parsed chords are not interned")
+        success = False
+    
+    start_time = time.perf_counter()
+    for chord in chords:
+        set_covering_qualities(spans, chord)
+    set_time = time.perf_counter() - start_time
+    start_time = time.perf_counter()
+    for chord in chords:
+        wagon.covering_qualities(chord)
+    mask_time = time.perf_counter() - start_time
+    print(f"  covering_qualities: {set_time / len(chords) * 1e6:.1f} µs with sets, {mask_time / len(chords) * 1e6:.1f} µs with masks")
+    
+    # B5 and C6 take bits 30 and 31, boxed on the Pico: how much of the real songs pays for that while planning
+    songs = [songwriter.monica_showcase(), songwriter.por_lo_que_yo_te_quiero(), songwriter.song1(), songwriter.song5(), songwriter.song6()]
+    chords = [duty.chord for song in songs for duty in song if duty.chord]
+    boxed = [chord for chord in chords if chord.mask(base) >> SMALL_INT_BITS]
+    print(f"  boxed masks: {len(boxed)} of {len(chords)} chorded duties, {len({chord.mask(base) for chord in boxed})} of {len({chord.mask(base) for chord in chords})} distinct chords")
+    
+    return success
+
+if __name__ == "__main__":
+    success = test_chord_bitmask()
+    exit(0 if success else 1)
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Test script for the compact (array-backed) planning mode of the device Keystra
+Checks that it produces exactly the same paths as the Choice-based mode
+"""
+
+from firmware import build_wagon, build_keystra
+from monica import songwriter
+from random_songs import create_device_song
+
+def songwriter_songs():
+    """All songs from the songwriter plus a few random ones"""
+    songs = {
+        "showcase": songwriter.monica_showcase(),
+        "original": songwriter.por_lo_que_yo_te_quiero(),
+        "simple": songwriter.song1(),
+        "range_test": songwriter.song6(),
+        "song5": songwriter.song5(),
+    }
+    for seed in range(4):
+        songs[f"random_{seed}"] = create_device_song(100, seed)
+    return songs
+
+def test_compact_keystra():
+    """Test that compact and choices modes agree on every song"""
+    print("Testing compact Keystra planning mode...")
+    
+    wagon = build_wagon()
+    choices_keystra = build_keystra(wagon, mode="choices")
+    compact_keystra = build_keystra(wagon, mode="compact")
+    success = True
+    
+    for name, song in songwriter_songs().items():
+        _, choices_path = choices_keystra.fill_and_explore(song)
+        _, compact_path = compact_keystra.fill_and_explore(song)
+        if choices_path == compact_path:
+            print(f"✓ {name}: {len(compact_path)} positions, identical paths")
+        else:
+            print(f"✗ {name}: paths differ")
+            print(f"  choices: {choices_path}")
+            print(f"  compact: {compact_path}")
+            success = False
+    
+    return success
+
+if __name__ == "__main__":
+    success = test_compact_keystra()
+    exit(0 if success else 1)
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Test script for the songwriter songs compiled into monica/compiled_songs.py
+Checks the compiled constants against the songs interpreted and planned now, and that the module is up to date
+"""
+
+import array
+import os
+import sys
+import struct
+from firmware import build_wagon, build_keystra
+import monica
+from monica import songwriter, compiled_songs, planner, wire
+from monica.duty_table import DutyTable
+from compile_songs import compile_songs
+from test_duty_table import keyboard_notes
+
+def quietly(function, *args):
+    """Call a songwriter function without its printing"""
+    stdout = sys.stdout
+    sys.stdout = open(os.devnull, 'w')
+    try:
+        return function(*args)
+    finally:
+        sys.stdout.close()
+        sys.stdout = stdout
+
+def test_compiled_songs():
+    """Test compiled songs against interpreted ones"""
+    print("Testing compiled songs...")
+    
+    wagon = build_wagon()
+    keystra = build_keystra(wagon)
+    success = True
+    
+    if set(compiled_songs.SONGS) == set(songwriter.SONGS):
+        print(f"✓ All {len(songwriter.SONGS)} songwriter songs are compiled")
+    else:
+        print(f"✗ Compiled {sorted(compiled_songs.SONGS)}, songwriter has {sorted(songwriter.SONGS)}")
+        success = False
+    
+    for name, song_function in songwriter.SONGS.items():
+        duties, path = keystra.fill_and_explore(quietly(song_function))
+        data = compiled_songs.SONGS.get(name, b"")
+        try:
+            compiled_duties, compiled_path = wire.unpack_duties(data)
+        except ValueError as e:
+            print(f"✗ {name}: compiled song does not unpack: {e}")
+            success = False
+            continue
+        
+        interpreted = DutyTable.from_duties(duties, path, wagon)
+        compiled = DutyTable.from_packed(data, wagon)
+        same_duties = [(d.start_ms, d.duration_ms, keyboard_notes(d.chord), d.skid, d.volume_percent) for d in duties] == \
+            [(d.start_ms, d.duration_ms, keyboard_notes(d.chord), d.skid, d.volume_percent) for d in compiled_duties]
+        same_table = all(getattr(interpreted, column) == getattr(compiled, column) for column in DutyTable.__slots__)
+        if same_duties and compiled_path == path and same_table:
+            print(f"✓ {name}: {len(duties)} compiled duties and path match the interpreted plan ({len(data):,} bytes)")
+        else:
+            print(f"✗ {name}: compiled song differs (duties {same_duties}, path {compiled_path == path}, table {same_table})")
+            success = False
+    
+    if quietly(compile_songs) == open(compiled_songs.__file__).read():
+        print("✓ monica/compiled_songs.py is up to date")
+    else:
+        print("✗ monica/compiled_songs.py is out of date, run local_webserver/compile_songs.py")
+        success = False
+    
+    # The planner plays compiled songs only while the config matches, with slack for single precision floats
+    settings = planner.plan_settings()
+    drifted = planner.plan_settings()
+    drifted["wagon"]["wagon_2_stepper"] = struct.unpack('f', struct.pack('f', drifted["wagon"]["wagon_2_stepper"] * (1 + 1e-7)))[0]
+    changed = planner.plan_settings()
+    changed["keystra"] = dict(changed["keystra"], move_penalty=changed["keystra"]["move_penalty"] + 1)
+    if (planner._same_settings(compiled_songs.PLANNED_WITH, settings)
+            and planner._same_settings(compiled_songs.PLANNED_WITH, drifted)
+            and not planner._same_settings(compiled_songs.PLANNED_WITH, changed)):
+        print("✓ Compiled songs match the current config, and would be refused after a planner change")
+    else:
+        print("✗ Compiled songs settings check is wrong")
+        success = False
+    
+    # And through the planner, which needs the device wagon
+    monica.wagon = wagon
+    try:
+        table = planner.compiled_table("original")
+    finally:
+        del monica.wagon
+    if table is not None and isinstance(table.masks, array.array) and len(table) == wire.unpack_header(compiled_songs.SONGS["original"])[1]:
+        print(f"✓ planner.compiled_table plays 'original' with no planning ({table.memory_size():,} bytes)")
+    else:
+        print("✗ planner.compiled_table did not use the compiled song")
+        success = False
+    
+    return success
+
+if __name__ == "__main__":
+    success = test_compiled_songs()
+    exit(0 if success else 1)
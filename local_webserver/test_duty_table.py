@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Test script for the columnar DutyTable the Pico plays from
+Checks rows, steps and fingering codes against the Duty list they come from, packed payloads, and the memory saved
+"""
+
+import sys
+from firmware import build_wagon, build_keystra, config
+from monica import wire
+from monica.duty import Duty
+from monica.duty_table import DutyTable, FINGERING_BITS
+from utils.music.chord import Chord
+from random_songs import create_device_song
+from test_compact_keystra import songwriter_songs
+
+def keyboard_notes(chord):
+    """Notes of a chord on the keyboard, all that tables and packed performances keep of it (None if there are none)"""
+    notes = {note for note in chord.notes if config.keyboard["start"] <= note <= config.keyboard["end"]} if chord else None
+    return notes or None
+
+def decode_fingerings(code, fingers):
+    """Inverse of fingering_code, as FingersRig.play_code reads it"""
+    fingerings = []
+    for _ in range(fingers):
+        value = code & ((1 << FINGERING_BITS) - 1)
+        fingerings.append(None if value == 0 else value - 1)
+        code >>= FINGERING_BITS
+    return fingerings
+
+def table_mismatches(table, duties, path, wagon):
+    """Rows of a table that don't play like the duties and path they were built from"""
+    fingers = len(config.wagon["structure"])
+    mismatches = []
+    for i, duty in enumerate(duties):
+        row = (duty.start_ms, duty.duration_ms, table.masks[i], duty.skid, duty.volume_percent)
+        expected_fingerings = wagon.calculate_fingerings(duty.chord, path[i]) if duty.chord else [None] * fingers
+        if (table[i] != row or table.end_ms(i) != duty.end_ms
+                or (table.chord(i).notes if table.chord(i) else None) != keyboard_notes(duty.chord)
+                or decode_fingerings(table.fingerings[i], fingers) != expected_fingerings):
+            mismatches.append(i)
+    if list(table.path) != path or list(table.steps) != [wagon.calculate_steps(position) for position in path]:
+        mismatches.append("path")
+    return mismatches
+
+def object_size(duties):
+    """Rough CPython size of a Duty list with its chords, each chord counted once"""
+    size = sys.getsizeof(duties)
+    chords = set()
+    for duty in duties:
+        size += sys.getsizeof(duty)
+        if duty.chord is not None and id(duty.chord) not in chords:
+            chords.add(id(duty.chord))
+            size += sys.getsizeof(duty.chord) + sys.getsizeof(duty.chord.notes)
+    return size
+
+def test_duty_table():
+    """Test building DutyTables from duties and from packed payloads"""
+    print("Testing DutyTable...")
+
+    wagon = build_wagon()
+    keystra = build_keystra(wagon)
+    success = True
+
+    songs = songwriter_songs()
+    songs["random_500"] = create_device_song(500, seed=7)
+    for name, song in songs.items():
+        duties, path = keystra.fill_and_explore(song)
+        table = DutyTable.from_duties(duties, path, wagon)
+        packed_table = DutyTable.from_packed(wire.pack_duties(duties, path), wagon)
+        mismatches = table_mismatches(table, duties, path, wagon)
+        packed_mismatches = table_mismatches(packed_table, duties, path, wagon)
+        if not mismatches and not packed_mismatches:
+            print(f"✓ {name}: {len(table)} rows play like the duties, from duties and from packed ({table.memory_size():,} bytes)")
+        else:
+            print(f"✗ {name}: rows {mismatches[:5]} (duties) and {packed_mismatches[:5]} (packed) differ")
+            success = False
+
+    # Back to duties
+    duties, path = keystra.fill_and_explore(songs["original"])
+    round_duties, round_path = DutyTable.from_duties(duties, path, wagon).to_duties()
+    if [(d.start_ms, d.duration_ms, keyboard_notes(d.chord), d.skid, d.volume_percent) for d in duties] == \
+            [(d.start_ms, d.duration_ms, keyboard_notes(d.chord), d.skid, d.volume_percent) for d in round_duties] and round_path == path:
+        print("✓ to_duties gives back the original duties")
+    else:
+        print("✗ to_duties changed the duties")
+        success = False
+
+    # Performances wider than a mask, reaching past both ends of the keyboard, still play what is on it either way
+    wide = [Duty(0, 500, Chord.from_text("C3")), Duty(500, 500, Chord.from_text("C6")),
+            Duty(1000, 500, Chord.from_text("C3_G4_C6_C7")), Duty(1500, 500, Chord.from_text("C7"))]
+    wide_path = [0, 0, wagon.valid_positions - 1, wagon.valid_positions - 1, 0]
+    try:
+        table = DutyTable.from_duties(wide, wide_path, wagon)
+        packed_table = DutyTable.from_packed(wire.pack_duties(wide, wide_path), wagon)
+    except ValueError as e:
+        print(f"✗ A performance from C3 to C7 was refused: {e}")
+        success = False
+    else:
+        mismatches = table_mismatches(table, wide, wide_path, wagon) + table_mismatches(packed_table, wide, wide_path, wagon)
+        if not mismatches:
+            print("✓ A performance from C3 to C7 plays its keyboard notes, from duties and from packed")
+        else:
+            print(f"✗ A performance from C3 to C7: rows {mismatches} differ")
+            success = False
+
+    # A bad path or duration is refused
+    for problem, build in {
+        "short path": lambda: DutyTable.from_duties(duties, path[:-1], wagon),
+        "truncated payload": lambda: DutyTable.from_packed(wire.pack_duties(duties, path)[:-1], wagon),
+    }.items():
+        try:
+            build()
+            print(f"✗ {problem} was accepted")
+            success = False
+        except ValueError as e:
+            print(f"✓ {problem} rejected: {e}")
+
+    # The point of it all: a long song in a few KB
+    duties, path = keystra.fill_and_explore(songs["random_500"])
+    table = DutyTable.from_duties(duties, path, wagon)
+    objects = object_size(duties)
+    if table.memory_size() * 4 < objects:
+        print(f"✓ {len(table)} duties take {table.memory_size():,} bytes as a table, {objects:,} as objects")
+    else:
+        print(f"✗ Table of {table.memory_size():,} bytes is not much smaller than {objects:,} bytes of objects")
+        success = False
+
+    return success
+
+if __name__ == "__main__":
+    success = test_duty_table()
+    exit(0 if success else 1)
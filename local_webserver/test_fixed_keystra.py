@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Test script for the fixed-point (integer) planning mode of the device Keystra
+Checks that its paths stay within the documented tolerance of the float planner, held chords of a minute included
+"""
+
+import random
+from firmware import build_wagon, build_keystra
+from monica.duty import Duty
+from monica.keystra import QUALITY_SCALE
+from utils.music.chord import Chord
+from random_songs import random_chord_text, create_device_song
+from test_compact_keystra import songwriter_songs
+
+# Every fixed-point step rounds down by less than 3 units of 1/QUALITY_SCALE
+TOLERANCE_PER_DUTY = 3 / QUALITY_SCALE
+
+def path_quality(keystra, wagon, duties, path):
+    """Float quality of a given path, as the float planner scores it"""
+    quality = 0.0
+    for i, duty in enumerate(duties):
+        covering = wagon.covering_qualities(duty.chord) if duty.chord else [0.0] * wagon.valid_positions
+        quality += keystra.choice_quality(duty.start_ms, duty.end_ms, path[i], path[i + 1], covering[path[i]], duty.skid)
+    return quality
+
+def create_long_song(count, seed=0):
+    """Held chords of 10 to 60 s, long enough for the fixed-point products to outgrow MicroPython's small ints"""
+    rng = random.Random(seed)
+    duties = []
+    start_ms = 0
+    for _ in range(count):
+        duration_ms = rng.randint(10000, 60000)
+        chord = Chord.from_text(random_chord_text(rng))
+        duties.append(Duty(start_ms, duration_ms, chord, rng.choice([0, 0, 7, -7, 1])))
+        start_ms += duration_ms
+    return duties
+
+def test_fixed_keystra():
+    """Test that fixed-point paths are within tolerance of the float optimum"""
+    print("Testing fixed-point Keystra planning mode...")
+    
+    wagon = build_wagon()
+    float_keystra = build_keystra(wagon, mode="choices")
+    fixed_keystra = build_keystra(wagon, mode="fixed")
+    success = True
+    
+    songs = songwriter_songs()
+    for seed in range(10, 16):
+        songs[f"random_{seed}"] = create_device_song(300, seed)
+    for seed in range(3):
+        songs[f"long_{seed}"] = create_long_song(40, seed)
+    
+    for name, song in songs.items():
+        duties, float_path = float_keystra.fill_and_explore(song)
+        _, fixed_path = fixed_keystra.fill_and_explore(song)
+        
+        float_quality = path_quality(float_keystra, wagon, duties, float_path)
+        fixed_quality = path_quality(float_keystra, wagon, duties, fixed_path)
+        gap = float_quality - fixed_quality
+        tolerance = TOLERANCE_PER_DUTY * len(duties)
+        
+        if gap > tolerance:
+            print(f"✗ {name}: fixed path is {gap:.4f} worse than the float optimum (tolerance {tolerance:.4f})")
+            success = False
+        elif fixed_path == float_path:
+            print(f"✓ {name}: {len(duties)} duties, identical paths")
+        else:
+            print(f"✓ {name}: {len(duties)} duties, paths differ by {gap:.4f} quality (tolerance {tolerance:.4f})")
+    
+    return success
+
+if __name__ == "__main__":
+    success = test_fixed_keystra()
+    exit(0 if success else 1)
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Test script for host/device planning parity
+Checks that the host Wagon and planners give exactly the plans the Pico computes, so offloading planning is safe
+"""
+
+from firmware import build_wagon, build_keystra, config
+from utils.linear_kinematics.stepper_agent import stepper_agent
+from monica import songwriter
+from monica_pathing import Duty, Chord, Wagon, SongPlanner, PLANNING_ENGINES
+from plan_cache import PlanCache
+from test_compact_keystra import songwriter_songs
+
+# Engines whose paths are exact, the others only promise equally good ones
+EXACT_ENGINES = ["loop", "numpy"]
+
+# Songs the host SongPlanner ships, by the songwriter function they copy
+PLANNER_SONGS = {
+    "showcase": songwriter.monica_showcase,
+    "original": songwriter.por_lo_que_yo_te_quiero,
+    "simple": songwriter.song1,
+    "range_test": songwriter.song6,
+}
+
+def to_host_duties(device_duties):
+    """Host Duties (note name chords) for a list of device Duties (MIDI number chords)"""
+    return [
+        Duty(duty.start_ms, duty.duration_ms, Chord.from_text(str(duty.chord)) if duty.chord else None, duty.skid, duty.volume_percent)
+        for duty in device_duties
+    ]
+
+def check_wagon(host_wagon, device_wagon, songs):
+    """Flights, steps, coverings and fingerings must match the device Wagon, and flights the IK agent itself"""
+    agent = stepper_agent(config.stepper["cruise_speed"], config.stepper["accel"], config.stepper.get("jerk"))
+    positions = device_wagon.valid_positions
+    if host_wagon.valid_positions != positions:
+        return "valid positions differ"
+    for prev_pos in range(positions):
+        for next_pos in range(positions):
+            expected = agent.flight_time(device_wagon.calculate_steps(next_pos), device_wagon.calculate_steps(prev_pos))
+            if device_wagon.flight_time(prev_pos, next_pos) != expected:
+                return f"flight {prev_pos} -> {next_pos} is {device_wagon.flight_time(prev_pos, next_pos)!r}, the agent says {expected!r}"
+            if host_wagon.flight_time(prev_pos, next_pos) != device_wagon.flight_time(prev_pos, next_pos):
+                return f"flight {prev_pos} -> {next_pos} differs"
+        if host_wagon.calculate_steps(prev_pos) != device_wagon.calculate_steps(prev_pos):
+            return f"steps at {prev_pos} differ"
+    
+    for song in songs.values():
+        for duty in song:
+            if duty.chord is None:
+                continue
+            host_chord = Chord.from_text(str(duty.chord))
+            if list(host_wagon.covering_qualities(host_chord)) != list(device_wagon.covering_qualities(duty.chord)):
+                return f"covering of {duty.chord} differs"
+            for position in range(positions):
+                if host_wagon.calculate_fingerings(host_chord, position) != device_wagon.calculate_fingerings(duty.chord, position):
+                    return f"fingerings of {duty.chord} at {position} differ"
+    return None
+
+def test_host_device_parity():
+    """Test that host and device plans are identical"""
+    print("Testing host/device planning parity...")
+    
+    host_wagon = Wagon()
+    device_wagon = build_wagon()
+    songs = songwriter_songs()
+    success = True
+    
+    error = check_wagon(host_wagon, device_wagon, songs)
+    if error:
+        print(f"✗ Wagon: {error}")
+        success = False
+    else:
+        print("✓ Wagon: flights, steps, coverings and fingerings match the device")
+    
+    device_keystra = build_keystra(device_wagon)
+    for name, song in songs.items():
+        device_duties, device_path = device_keystra.fill_and_explore(song)
+        for engine in EXACT_ENGINES:
+            host_duties, host_path = PLANNING_ENGINES[engine](host_wagon).fill_and_explore(to_host_duties(song))
+            if host_path == device_path and len(host_duties) == len(device_duties):
+                print(f"✓ {name} ({engine}): identical {len(host_path)} positions")
+            else:
+                print(f"✗ {name} ({engine}): host path differs from the device")
+                print(f"  host:   {host_path}")
+                print(f"  device: {device_path}")
+                success = False
+    
+    # End to end, the songs the web server offloads
+    planner = SongPlanner(cache=PlanCache(directory=None))  # In memory only, out of the real plan cache directory
+    for name, song_function in PLANNER_SONGS.items():
+        _, host_path = planner.plan_song_by_name(name)
+        _, device_path = device_keystra.fill_and_explore(song_function())
+        if host_path == device_path:
+            print(f"✓ SongPlanner {name}: identical to the Pico's plan")
+        else:
+            print(f"✗ SongPlanner {name}: differs from the Pico's plan")
+            success = False
+    
+    return success
+
+if __name__ == "__main__":
+    success = test_host_device_parity()
+    exit(0 if success else 1)
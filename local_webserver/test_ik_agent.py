@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Property test for the closed-form IK agent flight times, and for trajectories of a given duration
+Compares SimpleAgent.flight_time against the duration of the full trajectory, and checks calculate_trajectory_in
+arrives on time, gently, from rest and from moving
+"""
+
+import random
+
+import firmware  # Registers the firmware modules before importing them
+import config
+from utils.linear_kinematics.simple_agent import SimpleAgent
+from utils.linear_kinematics.stepper_agent import SCurveAgent
+
+def random_agents(count, rng):
+    """The configured agent plus a few random ones"""
+    agents = [SimpleAgent(config.stepper["cruise_speed"], config.stepper["accel"])]
+    for _ in range(count):
+        agents.append(SimpleAgent(rng.uniform(100, 100000), rng.uniform(100, 1000000)))
+    return agents
+
+def test_flight_time_matches_trajectory():
+    """flight_time(p0, p1) should be exactly calculate_trajectory(p0, p1, 0, 0).time"""
+    print("Testing closed-form flight_time...")
+    
+    rng = random.Random(3)
+    success = True
+    checks = 0
+    moving = within_tolerance = 0
+    
+    for agent in random_agents(20, rng):
+        positions = [0, 1, -1, config.WAGON_2_STEPPER, config.RAIL_STEPPER_STEPS]
+        positions += [rng.uniform(-30000, 30000) for _ in range(20)]
+        positions += [rng.randint(-30000, 30000) for _ in range(20)]
+        
+        for p0 in positions:
+            for p1 in positions:
+                expected = agent.calculate_trajectory(p0, p1, 0, 0).time
+                actual = agent.flight_time(p0, p1)
+                checks += 1
+                if actual != expected or not isinstance(actual, float):
+                    print(f"✗ {agent}: p0={p0}, p1={p1}, expected {expected!r}, got {actual!r}")
+                    success = False
+    
+    if success:
+        print(f"✓ {checks} flights match their trajectories exactly")
+    return success
+
+def peak_accel(trajectory):
+    """Largest acceleration along a trajectory"""
+    return max((abs(n.acceleration) for n in trajectory), default=0)
+
+def count_tries(agent):
+    """Records the k of every slowed down agent calculate_trajectory_in asks for, from now on"""
+    tries = []
+    scaled = type(agent).scaled
+    agent.scaled = lambda k: tries.append(k) or scaled(agent, k)
+    return tries
+
+def test_trajectory_in():
+    """calculate_trajectory_in should land on p1 at rest before the deadline, never after, within tolerance from rest,
+    no harder than the fastest trajectory, building at most max_tries trajectories when moving,
+    and fall back to the fastest when there is no time to spare"""
+    print("Testing fixed-duration trajectories...")
+    
+    rng = random.Random(6)
+    success = True
+    cruise_speed = config.stepper["cruise_speed"]
+    accel = config.stepper["accel"]
+    checks = 0
+    moving = within_tolerance = 0
+    
+    for agent in [SimpleAgent(cruise_speed, accel), SCurveAgent(cruise_speed, accel, 2 * accel / 0.02)]:
+        for _ in range(150):
+            p0, p1 = rng.uniform(-20000, 20000), rng.uniform(-20000, 20000)
+            v0 = rng.choice([0, rng.uniform(-cruise_speed, cruise_speed)])
+            fastest = agent.calculate_trajectory(p0, p1, v0, 0)
+            duration = fastest.time * rng.uniform(0.5, 4)
+            tries = count_tries(agent)
+            trajectory = agent.calculate_trajectory_in(p0, p1, v0, 0, duration)
+            final = trajectory.final_state
+            checks += 1
+            
+            problems = []
+            if abs(final.position - p1) > 1e-6 or abs(final.velocity) > 1e-6:
+                problems.append(f"ends at {final}")
+            if duration <= fastest.time:
+                if trajectory.time != fastest.time:
+                    problems.append(f"took {trajectory.time} s instead of the fastest {fastest.time} s")
+            elif not fastest.time <= trajectory.time <= duration + 1e-9:
+                problems.append(f"took {trajectory.time} s for {duration} s")
+            elif v0 == 0 and trajectory.time < duration - 0.001:
+                problems.append(f"took {trajectory.time} s for {duration} s from rest")
+            elif v0 != 0:
+                moving += 1
+                within_tolerance += trajectory.time >= duration - 0.001
+            if len(tries) > 6:
+                problems.append(f"built {len(tries)} trajectories")
+            if peak_accel(trajectory) > peak_accel(fastest) * (1 + 1e-9):
+                problems.append(f"peaks at {peak_accel(trajectory)} over the fastest {peak_accel(fastest)}")
+            if problems:
+                print(f"✗ {agent}: p0={p0}, p1={p1}, v0={v0}, duration={duration}: {', '.join(problems)}")
+                success = False
+        
+        # Between rests it is the fastest move slowed down, so the effort drops with the square of the slowdown
+        trajectory = agent.calculate_trajectory_in(0, 5000, 0, 0, 2 * agent.flight_time(0, 5000))
+        if abs(peak_accel(trajectory) * 4 - peak_accel(agent.calculate_trajectory(0, 5000, 0, 0))) > 1e-6 * accel:
+            print(f"✗ {agent}: taking twice as long peaks at {peak_accel(trajectory)}")
+            success = False
+    
+    if success:
+        print(f"✓ {checks} trajectories arrive on time, never late and never harder than the fastest, "
+              f"{within_tolerance} of {moving} from moving within 1 ms")
+    return success
+
+if __name__ == "__main__":
+    success = test_flight_time_matches_trajectory()
+    success = test_trajectory_in() and success
+    exit(0 if success else 1)
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Test script for incremental re-planning after duty edits
+Checks that every edit gives exactly the path of a full replan, and as good a path as the loop engine
+"""
+
+import random
+from monica_pathing import Duty, Chord, Keystra, IncrementalKeystra, Wagon
+from random_songs import random_chord_text, create_random_song
+
+EDITS_PER_SONG = 25
+
+def create_random_edit(duty, rng):
+    """Same slot as the given duty, with a new chord (or silence), skid and volume"""
+    if rng.random() < 0.2:
+        chord = None
+    else:
+        chord = Chord.from_text(random_chord_text(rng))
+    return Duty(duty.start_ms, duty.duration_ms, chord, rng.choice([0, 0, 7, -7, 1]), rng.choice([None, 50, 80]))
+
+def path_quality(keystra, wagon, duties, path):
+    """Total quality of a given path, as the loop engine scores it"""
+    quality = 0.0
+    for i, duty in enumerate(duties):
+        covering = wagon.covering_qualities(duty.chord)
+        quality += keystra.choice_quality(duty.start_ms, duty.end_ms, path[i], path[i + 1], covering[path[i]], duty.skid)
+    return quality
+
+def test_incremental_pathing():
+    """Test edits against full replans on random songs"""
+    print("Testing incremental Keystra re-planning...")
+    
+    wagon = Wagon()
+    loop_keystra = Keystra(wagon)
+    success = True
+    
+    for seed in range(3):
+        rng = random.Random(seed)
+        keystra = IncrementalKeystra(wagon)
+        duties, path = keystra.fill_and_explore(create_random_song(300, seed))
+        recomputed = 0
+        
+        for _ in range(EDITS_PER_SONG):
+            index = rng.randrange(len(duties))
+            duties, path = keystra.replace_duty(index, create_random_edit(duties[index], rng))
+            recomputed += keystra.last_recomputed_rows
+            
+            _, full_path = IncrementalKeystra(wagon).fill_and_explore(duties)
+            _, loop_path = loop_keystra.fill_and_explore(duties)
+            if path != full_path:
+                print(f"✗ random_{seed}: edit at {index} differs from a full replan")
+                success = False
+                break
+            # Shifted rows round differently, so among equally good paths the loop engine may settle on another one
+            if abs(path_quality(loop_keystra, wagon, duties, path) - path_quality(loop_keystra, wagon, duties, loop_path)) > 1e-6:
+                print(f"✗ random_{seed}: edit at {index} is worse than the loop engine's path")
+                success = False
+                break
+        else:
+            print(f"✓ random_{seed}: {EDITS_PER_SONG} edits match full replans, {recomputed / EDITS_PER_SONG:.1f} of {len(duties)} rows recomputed per edit")
+    
+    # Retiming a duty moves the silences around it, which needs a full replan
+    keystra = IncrementalKeystra(wagon)
+    duties, _ = keystra.fill_and_explore(create_random_song(20))
+    try:
+        keystra.replace_duty(3, Duty(duties[3].start_ms, duties[3].duration_ms + 1, None))
+        print("✗ Retimed edit was accepted")
+        success = False
+    except ValueError:
+        print("✓ Retimed edit rejected")
+    
+    return success
+
+if __name__ == "__main__":
+    success = test_incremental_pathing()
+    exit(0 if success else 1)
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Test script for actuator lead-time compensation during playback
+Checks on planned songs that commands arrive as their duties start, and that the safety ordering always holds
+"""
+
+import math
+from firmware import build_wagon, build_keystra, config
+from monica.duty_table import DutyTable, FINGERING_BITS
+from monica.lead_times import LeadTimes
+from monica.wire import VOLUME_NONE
+from test_compact_keystra import songwriter_songs
+
+# Same named positions and flight model as peripherals/standard_servo.py, which needs the Pico's machine module
+CODE_TARGETS = ("Home", "Left", "Right", "Home")
+
+def flight_ms(seconds):
+    return math.ceil(seconds * 1000)
+
+def finger_flight_ms(from_code, to_code):
+    """Slowest finger between two packed fingering codes, as FingersRig.code_flight_time"""
+    slowest = 0
+    for finger in config.fingers:
+        positions = finger["named_positions"]
+        origin = positions[CODE_TARGETS[from_code & 3]]
+        target = positions[CODE_TARGETS[to_code & 3]]
+        slowest = max(slowest, finger["max_flight_time"] * abs(target - origin))
+        from_code >>= FINGERING_BITS
+        to_code >>= FINGERING_BITS
+    return flight_ms(slowest)
+
+def pump_position(volume_percent):
+    return 0.0 if volume_percent <= 0 else (20 + volume_percent * 40 / 100) / 100
+
+def pump_flight_ms(from_volume, to_volume):
+    return flight_ms(config.pump["max_flight_time"] * abs(pump_position(to_volume) - pump_position(from_volume)))
+
+def ordering_violations(table, lead_times, stepper_flight_ms, retarget_ms=0):
+    """Duties whose commands break the safety ordering or go backwards"""
+    violations = []
+    previous_code = 0
+    for i in range(len(table)):
+        code = lead_times.codes[i]
+        fingers_ms = lead_times.fingers_ms[i]
+        stepper_ms = lead_times.stepper_ms[i]
+        checks = [
+            stepper_ms >= table.start_ms[i],
+            stepper_ms >= fingers_ms,
+            code != 0 or stepper_ms >= fingers_ms + finger_flight_ms(previous_code, 0),
+        ]
+        if i:
+            arrival_ms = lead_times.stepper_ms[i - 1] + retarget_ms + stepper_flight_ms(table.path[i - 1], table.path[i])
+            checks += [
+                fingers_ms >= arrival_ms,
+                fingers_ms >= lead_times.fingers_ms[i - 1],
+                stepper_ms >= lead_times.stepper_ms[i - 1],
+            ]
+        if lead_times.pump_volumes[i] != VOLUME_NONE:
+            checks.append(lead_times.pump_ms[i] <= table.start_ms[i])
+        if not all(checks):
+            violations.append(i)
+        previous_code = code
+    return violations
+
+def test_lead_times():
+    """Test lead-time compensation on planned songs"""
+    print("Testing actuator lead times...")
+    
+    wagon = build_wagon()
+    keystra = build_keystra(wagon)
+    stepper_flight_ms = lambda from_pos, to_pos: flight_ms(wagon.flight_time(from_pos, to_pos))
+    volume = config.controller["volume_percent"]
+    retarget_ms = config.controller["retarget_ms"]  # Fingers wait for the stepper command itself too
+    success = True
+    
+    for name, song in songwriter_songs().items():
+        table = DutyTable.from_duties(*keystra.fill_and_explore(song), wagon)
+        lead_times = LeadTimes(table, volume, finger_flight_ms, pump_flight_ms, stepper_flight_ms, retarget_ms)
+        
+        violations = ordering_violations(table, lead_times, stepper_flight_ms, retarget_ms)
+        on_time = 0
+        late_ms = 0
+        previous_code = 0
+        for i in range(len(table)):
+            arrival_ms = lead_times.fingers_ms[i] + finger_flight_ms(previous_code, lead_times.codes[i])
+            late_ms += max(0, arrival_ms - table.start_ms[i])
+            on_time += arrival_ms <= table.start_ms[i]
+            previous_code = lead_times.codes[i]
+        earliest_ms = min(min(lead_times.fingers_ms), min(lead_times.pump_ms), 0)
+        
+        if violations or late_ms != lead_times.shortfall_ms or lead_times.preroll_ms < -earliest_ms:
+            print(f"✗ {name}: ordering broken at duties {violations[:5]}, late {late_ms} ms against {lead_times.shortfall_ms} ms reported")
+            success = False
+        else:
+            print(f"✓ {name}: fingers on time for {on_time} of {len(table)} duties, {late_ms} ms late in total, {lead_times.preroll_ms} ms preroll")
+    
+    # Without flight estimates every command goes out at its duty's start, as playback did before
+    no_flight = lambda origin, target: 0
+    table = DutyTable.from_duties(*keystra.fill_and_explore(songwriter_songs()["original"]), wagon)
+    lead_times = LeadTimes(table, volume, no_flight, no_flight, no_flight)
+    changes = [i for i in range(len(table)) if lead_times.pump_volumes[i] != VOLUME_NONE]
+    if (list(lead_times.fingers_ms) == list(table.start_ms) and list(lead_times.stepper_ms) == list(table.start_ms)
+            and all(lead_times.pump_ms[i] == table.start_ms[i] for i in changes) and lead_times.preroll_ms == 0):
+        print(f"✓ Without compensation commands go out at duty starts ({len(changes)} volume changes)")
+    else:
+        print("✗ Without compensation commands are not at duty starts")
+        success = False
+    
+    # A silence right after a chord brings the fingers home before the cart leaves
+    with_compensation = LeadTimes(table, volume, finger_flight_ms, pump_flight_ms, stepper_flight_ms)
+    silences = [i for i in range(1, len(table)) if table.masks[i] == 0 and table.masks[i - 1] and table.path[i] != table.path[i + 1]]
+    if silences and all(with_compensation.fingers_ms[i] < table.start_ms[i] <= with_compensation.stepper_ms[i] for i in silences):
+        print(f"✓ Fingers leave early and the cart waits for them in {len(silences)} silences with a move")
+    else:
+        print(f"✗ Silences with a move don't send the fingers home early: {silences}")
+        success = False
+    
+    return success
+
+if __name__ == "__main__":
+    success = test_lead_times()
+    exit(0 if success else 1)
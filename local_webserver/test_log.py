@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Test script for the firmware logging ring (utils/log.py)
+Checks levels, lazy formatting, overflow and that nothing is formatted or output before draining
+"""
+
+import firmware  # Registers the firmware modules before importing them
+from utils.log import Logger, DEBUG, INFO, WARNING, ERROR, OFF
+
+class Formatted:
+    """Counts how often it is turned into text"""
+    def __init__(self):
+        self.count = 0
+    
+    def __str__(self):
+        self.count += 1
+        return "formatted"
+
+def test_log():
+    """Test the logging ring"""
+    print("Testing firmware logging...")
+    success = True
+    
+    lines = []
+    clock = iter(range(1000)).__next__
+    logger = Logger(capacity=4, level="info", clock=clock, output=lines.append)
+    argument = Formatted()
+    logger.debug("hidden %s", argument)
+    logger.info("Volume %d%% on %s", 40, argument)
+    logger.warning("No arguments, 100% literal")
+    logger.error("Nothing %s", None)
+    if lines == [] and argument.count == 0 and logger.pending == 3:
+        print("✓ Logging below the level stores nothing, and nothing is formatted before draining")
+    else:
+        print(f"✗ Before draining: {lines}, formatted {argument.count} times, {logger.pending} pending")
+        success = False
+    
+    drained = logger.drain()
+    expected = ["[0] INFO: Volume 40% on formatted", "[1] WARNING: No arguments, 100% literal", "[2] ERROR: Nothing None"]
+    if drained == 3 and lines == expected and argument.count == 1 and logger.pending == 0:
+        print(f"✓ Drained in order: {lines}")
+    else:
+        print(f"✗ Drained {drained}: {lines}")
+        success = False
+    
+    # Overflow keeps the newest messages and reports the lost ones
+    lines.clear()
+    for i in range(7):
+        logger.info("message %d", i)
+    logger.drain(limit=2)
+    logger.drain()
+    if lines == ["[log] 3 messages lost, the ring was full"] + [f"[{i + 3}] INFO: message {i}" for i in range(3, 7)]:
+        print("✓ A full ring drops the oldest messages and says so")
+    else:
+        print(f"✗ Overflow: {lines}")
+        success = False
+    
+    # Bad format strings still come out, and levels can change at runtime
+    lines.clear()
+    logger.set_level(DEBUG)
+    logger.debug("%d items", "many")
+    logger.set_level(OFF)
+    logger.error("silenced")
+    logger.drain()
+    if len(lines) == 1 and lines[0].endswith("%d items ('many',)") and logger.enabled(OFF) and not logger.enabled(ERROR):
+        print(f"✓ Runtime levels and unformattable messages: {lines}")
+    else:
+        print(f"✗ Runtime levels: {lines}")
+        success = False
+    
+    for bad in [lambda: Logger(capacity=0), lambda: Logger(level="loud")]:
+        try:
+            bad()
+            print("✗ Bad logger settings accepted")
+            success = False
+        except ValueError as e:
+            print(f"✓ Bad settings rejected: {e}")
+    
+    return success
+
+if __name__ == "__main__":
+    success = test_log()
+    exit(0 if success else 1)
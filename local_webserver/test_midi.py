@@ -6,7 +6,11 @@ Test script for MIDI processing functionality
 import os
 import sys
 import json
-from midi_processor import midi_processor, MIDIToDutyConverter, MIDINoteMapper
+from midi_processor import MIDIProcessor, MIDIToDutyConverter, MIDINoteMapper
+from plan_cache import PlanCache
+
+# Plans are cached in memory only, so testing doesn't fill the real plan cache directory
+midi_processor = MIDIProcessor(cache=PlanCache(directory=None))
 
 def create_test_midi():
     """Create a simple test MIDI file using mido"""
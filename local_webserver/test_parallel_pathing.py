@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Test script for the process pool (max-plus scan) Keystra planning engine
+Checks that chunked planning finds paths as good as the vectorized engine, and identical ones where chunking doesn't pay off
+"""
+
+from monica_pathing import VectorKeystra, ParallelKeystra, Wagon
+from random_songs import create_random_song
+from test_incremental_pathing import path_quality
+
+def test_parallel_pathing():
+    """Test that chunked and single pass planning agree"""
+    print("Testing parallel Keystra engine...")
+    
+    wagon = Wagon()
+    vector_keystra = VectorKeystra(wagon)
+    success = True
+    
+    # Short songs, and any song with too few workers, are planned in-process, exactly as VectorKeystra does
+    for name, length, keystra in [
+        ("Single chunk", 200, ParallelKeystra(wagon, workers=8, chunk_duties=500)),
+        ("Two workers", 400, ParallelKeystra(wagon, workers=2, chunk_duties=50)),
+    ]:
+        duties = create_random_song(length, seed=1)
+        filled, vector_path = vector_keystra.fill_and_explore(duties)
+        _, parallel_path = keystra.fill_and_explore(duties)
+        if parallel_path == vector_path and not keystra.pays_off(len(filled), keystra.workers, keystra.chunk_duties):
+            print(f"✓ {name}: planned in-process, identical paths")
+        else:
+            print(f"✗ {name}: paths differ")
+            success = False
+    
+    if ParallelKeystra.pays_off(20000, workers=8) and not ParallelKeystra.pays_off(20000, workers=3) \
+            and not ParallelKeystra.pays_off(1000, workers=8):
+        print("✓ Chunking pays off for long songs on enough workers only")
+    else:
+        print("✗ Chunking crossover is off")
+        success = False
+    
+    for chunk_duties in [1, 25, 50]:
+        parallel_keystra = ParallelKeystra(wagon, workers=ParallelKeystra.MIN_WORKERS, chunk_duties=chunk_duties)
+        for seed in range(2):
+            duties = create_random_song(400, seed)
+            filled, vector_path = vector_keystra.fill_and_explore(duties)
+            parallel_filled, parallel_path = parallel_keystra.fill_and_explore(duties)
+            vector_quality = path_quality(vector_keystra, wagon, filled, vector_path)
+            parallel_quality = path_quality(vector_keystra, wagon, parallel_filled, parallel_path)
+            
+            # Chunked sums round differently, so only equally good paths can be told apart
+            if len(parallel_path) == len(vector_path) and abs(parallel_quality - vector_quality) <= 1e-6 * max(1.0, abs(vector_quality)):
+                print(f"✓ {chunk_duties} duties per chunk, random_{seed}: quality {parallel_quality:.2f}")
+            else:
+                print(f"✗ {chunk_duties} duties per chunk, random_{seed}: quality {parallel_quality:.2f}, expected {vector_quality:.2f}")
+                success = False
+    
+    return success
+
+if __name__ == "__main__":
+    success = test_parallel_pathing()
+    exit(0 if success else 1)
@@ -3,7 +3,11 @@
 Test script for local Monica pathing processing
 """
 
-from monica_pathing import song_planner
+from monica_pathing import SongPlanner
+from plan_cache import PlanCache
+
+# Plans are cached in memory only, so testing doesn't fill the real plan cache directory
+song_planner = SongPlanner(cache=PlanCache(directory=None))
 
 def test_pathing():
     """Test the local pathing functionality"""
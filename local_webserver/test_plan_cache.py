@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Test script for the content-addressed plan cache
+Checks keys, memory hits, LRU eviction, reloading plans from disk, trimming the disk and handing out copies
+"""
+
+import os
+import tempfile
+import time
+from monica_pathing import Keystra, Wagon
+from plan_cache import PlanCache
+from random_songs import create_random_song
+
+def plan(keystra, duties):
+    """Plan and serialize like SongPlanner does"""
+    filled, path = keystra.fill_and_explore(duties)
+    return [duty.to_dict() for duty in filled], path
+
+def test_plan_cache():
+    """Test the plan cache on random songs"""
+    print("Testing plan cache...")
+    
+    wagon = Wagon()
+    keystra = Keystra(wagon)
+    song = create_random_song(1000, seed=1)
+    success = True
+    
+    with tempfile.TemporaryDirectory() as directory:
+        cache = PlanCache(directory, max_entries=2)
+        key = cache.plan_key(song, keystra)
+        
+        # Keys follow content, not identity
+        same_key = cache.plan_key(create_random_song(1000, seed=1), Keystra(Wagon()))
+        other_song_key = cache.plan_key(create_random_song(1000, seed=2), keystra)
+        other_weights_key = cache.plan_key(song, Keystra(wagon, notes_bonus=2.0))
+        if key == same_key and len({key, other_song_key, other_weights_key}) == 3:
+            print("✓ Keys depend on the duties and the planner settings")
+        else:
+            print("✗ Unexpected plan keys")
+            success = False
+        
+        if cache.get(key) is not None:
+            print("✗ Empty cache returned a plan")
+            success = False
+        
+        start_time = time.perf_counter()
+        duties_dict, path = plan(keystra, song)
+        plan_time = time.perf_counter() - start_time
+        cache.put(key, duties_dict, path)
+        
+        start_time = time.perf_counter()
+        cached = cache.get(key)
+        hit_time = time.perf_counter() - start_time
+        if cached == (duties_dict, path):
+            print(f"✓ Memory hit in {hit_time * 1000:.3f} ms (planning took {plan_time * 1000:.1f} ms)")
+        else:
+            print("✗ Memory hit returned another plan")
+            success = False
+        
+        cached[0][0]['chord'] = "C4"
+        cached[1][0] += 1
+        if cache.get(key) == (duties_dict, path):
+            print("✓ Changing a returned plan leaves the cached one alone")
+        else:
+            print("✗ A returned plan shares its lists with the cache")
+            success = False
+        
+        # Two more plans push the first one out of memory, but it is still on disk
+        other_keys = []
+        for seed in (2, 3):
+            other_song = create_random_song(50, seed)
+            other_keys.append(cache.plan_key(other_song, keystra))
+            cache.put(other_keys[-1], *plan(keystra, other_song))
+        
+        reloaded = PlanCache(directory).get(key)
+        cached = cache.get(key)
+        stats = cache.get_stats()
+        if cached == (duties_dict, path) and reloaded == cached and stats['evictions'] == 2 and stats['disk_hits'] == 1:
+            print(f"✓ Evicted plan reloaded from disk, stats: {stats['hits']} hits, {stats['misses']} misses")
+        else:
+            print(f"✗ Disk reload failed, stats: {stats}")
+            success = False
+        
+        # Past max_disk_entries the least recently used plans leave the disk, reading one counts as using it
+        for age, old_key in enumerate(other_keys, 1):
+            os.utime(os.path.join(directory, f"{old_key}.json"), (age, age))
+        small_cache = PlanCache(directory, max_disk_entries=3)
+        small_cache.get(key)
+        newest_song = create_random_song(50, seed=4)
+        newest_key = small_cache.plan_key(newest_song, keystra)
+        small_cache.put(newest_key, *plan(keystra, newest_song))
+        on_disk = {filename[:-len('.json')] for filename in os.listdir(directory) if filename.endswith('.json')}
+        if on_disk == {key, other_keys[1], newest_key} and small_cache.get_stats()['disk_evictions'] == 1:
+            print("✓ The disk keeps the most recently used plans")
+        else:
+            print(f"✗ The disk kept {len(on_disk)} plans, not the most recently used ones")
+            success = False
+        
+        cache.clear(disk=True)
+        if cache.get(key) is None and cache.get_stats()['disk_entries'] == 0:
+            print("✓ Cleared memory and disk")
+        else:
+            print("✗ Clear left plans behind")
+            success = False
+    
+    return success
+
+if __name__ == "__main__":
+    success = test_plan_cache()
+    exit(0 if success else 1)
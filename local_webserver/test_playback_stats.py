@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Test script for the lateness samples the playback scheduler records
+Checks min/mean/max/p95 against straightforward computations, and the capacity limit
+"""
+
+import math
+import random
+import firmware  # Registers the firmware modules before importing them
+from utils.stats import Samples
+
+def nearest_rank(values, p):
+    """Textbook nearest rank percentile"""
+    ordered = sorted(values)
+    return ordered[math.ceil(p / 100 * len(ordered)) - 1]
+
+def test_playback_stats():
+    """Test Samples summaries"""
+    print("Testing playback lateness stats...")
+    success = True
+    
+    rng = random.Random(5)
+    for count in [1, 2, 19, 20, 21, 100, 751]:
+        values = [rng.choice([0, 0, 0, 1, 2, -1, rng.randint(0, 40)]) for _ in range(count)]
+        samples = Samples(count)
+        for value in values:
+            samples.record(value)
+        summary = samples.summary("ms")
+        expected = {
+            "count": count,
+            "dropped": 0,
+            "min_ms": min(values),
+            "mean_ms": sum(values) / count,
+            "max_ms": max(values),
+            "p95_ms": nearest_rank(values, 95),
+        }
+        if summary == expected and samples.count_above(0) == sum(1 for value in values if value > 0):
+            print(f"✓ {count} samples: {summary}")
+        else:
+            print(f"✗ {count} samples: {summary}, expected {expected}")
+            success = False
+    
+    samples = Samples(3)
+    for value in [5, 1, 3, 9, 9]:
+        samples.record(value)
+    if len(samples) == 3 and samples.summary()["dropped"] == 2 and samples.summary()["max"] == 5:
+        print("✓ Samples past capacity are dropped and counted")
+    else:
+        print(f"✗ Capacity not respected: {samples.summary()}")
+        success = False
+    
+    samples.clear()
+    if samples.summary() == {"count": 0, "dropped": 0} and samples.percentile(95) is None:
+        print("✓ Cleared samples summarize as empty")
+    else:
+        print(f"✗ Cleared samples: {samples.summary()}")
+        success = False
+    
+    return success
+
+if __name__ == "__main__":
+    success = test_playback_stats()
+    exit(0 if success else 1)
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Test script for the reachability band of the device Keystra
+Checks that the band never cuts a feasible move, and that banded planning gives the same paths as a full scan
+"""
+
+from firmware import build_wagon, build_keystra
+from monica.keystra import PLANNING_MODES
+from test_compact_keystra import songwriter_songs
+
+DURATIONS_MS = [1, 50, 100, 150, 200, 300, 600, 1200, 5000]
+
+def check_reach_radius(wagon):
+    """Every move farther than the reach radius must be slower than the duty"""
+    positions = wagon.valid_positions
+    for duration_ms in DURATIONS_MS:
+        radius = wagon.reach_radius(duration_ms)
+        for prev_pos in range(positions):
+            for next_pos in range(positions):
+                if abs(next_pos - prev_pos) > radius and wagon.flight_time(prev_pos, next_pos) <= duration_ms / 1000.:
+                    print(f"✗ {duration_ms}ms: radius {radius} cuts the feasible move {prev_pos} -> {next_pos}")
+                    return False
+        print(f"✓ {duration_ms}ms: radius {radius}")
+    return True
+
+def test_reachability_band():
+    """Test the band bounds and compare banded paths with full scans in every mode"""
+    print("Testing Keystra reachability band...")
+    
+    wagon = build_wagon()
+    full_wagon = build_wagon()
+    # An instance attribute shadows the method, so every pair gets scored
+    full_wagon.reach_radius = lambda duration_ms: full_wagon.valid_positions - 1
+    success = check_reach_radius(wagon)
+    
+    for mode in PLANNING_MODES:
+        banded_keystra = build_keystra(wagon, mode=mode)
+        full_keystra = build_keystra(full_wagon, mode=mode)
+        for name, song in songwriter_songs().items():
+            _, banded_path = banded_keystra.fill_and_explore(song)
+            _, full_path = full_keystra.fill_and_explore(song)
+            if banded_path == full_path:
+                print(f"✓ {mode} {name}: identical paths")
+            else:
+                print(f"✗ {mode} {name}: banded path differs from full scan")
+                success = False
+    
+    return success
+
+if __name__ == "__main__":
+    success = test_reachability_band()
+    exit(0 if success else 1)
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Test script for the jerk-limited SCurveAgent
+Checks the IKAgent contract and the S-curve bounds, and simulates how closely the rotor tracks the commanded steps,
+against SimpleAgent at equal flight time
+"""
+
+import math
+import random
+from array import array
+
+import firmware  # Registers the firmware modules before importing them
+import config
+from utils.linear_kinematics.simple_agent import SimpleAgent
+from utils.linear_kinematics.stepper_agent import SCurveAgent
+
+def tracking_error(trajectory, interval_ms, natural_hz=60, damping=0.05, dt=1e-5):
+    """Peak lag (steps) of a rotor following the stepper's commanded steps through a spring-damper,
+    the commanded velocity being the velocity schedule Stepper.update plays"""
+    velocities = array('i', bytes(4 * 2000))
+    ticks = trajectory.fill_velocities(velocities, interval_ms)
+    w = 2 * math.pi * natural_hz
+    commanded = position = trajectory.sample(trajectory.start).position
+    velocity = 0.0
+    peak = 0.0
+    for i in range(int((ticks * interval_ms / 1000 + 0.1) / dt)):
+        tick = int(i * dt * 1000 / interval_ms)
+        commanded_velocity = velocities[tick] if tick < ticks else 0
+        commanded += commanded_velocity * dt
+        velocity += (w * w * (commanded - position) + 2 * damping * w * (commanded_velocity - velocity)) * dt
+        position += velocity * dt
+        peak = max(peak, abs(commanded - position))
+    return peak
+
+def equal_time_accel(simple, p0, p1, ramp):
+    """Accel of an SCurveAgent with the configured cruise speed and a ramp of ramp seconds, as fast as simple from p0 to p1"""
+    cruise_speed = config.stepper["cruise_speed"]
+    low, high = config.stepper["accel"], 20 * config.stepper["accel"]
+    for _ in range(60):
+        accel = (low + high) / 2
+        if SCurveAgent(cruise_speed, accel, 2 * accel / ramp).flight_time(p0, p1) > simple.flight_time(p0, p1):
+            low = accel
+        else:
+            high = accel
+    return high
+
+def test_scurve_contract():
+    """Trajectories should match flight_time, land exactly, and keep within accel, cruise_speed and jerk"""
+    print("Testing SCurveAgent trajectories...")
+    
+    rng = random.Random(4)
+    success = True
+    cruise_speed = config.stepper["cruise_speed"]
+    accel = config.stepper["accel"]
+    agent = SCurveAgent(cruise_speed, accel, 2 * accel / 0.02)
+    
+    checks = 0
+    for _ in range(500):
+        p0, p1 = rng.uniform(-30000, 30000), rng.uniform(-30000, 30000)
+        v0 = rng.choice([0, rng.uniform(-cruise_speed, cruise_speed)])
+        trajectory = agent.calculate_trajectory(p0, p1, v0, 0)
+        final = trajectory.final_state
+        problems = []
+        if abs(final.position - p1) > 1e-6 or abs(final.velocity) > 1e-6:
+            problems.append(f"ends at {final}")
+        if v0 == 0 and abs(trajectory.time - agent.flight_time(p0, p1)) > 1e-9:
+            problems.append(f"takes {trajectory.time} s, flight_time says {agent.flight_time(p0, p1)} s")
+        if any(abs(n.acceleration) > accel * (1 + 1e-9) or abs(n.velocity) > cruise_speed * (1 + 1e-9) for n in trajectory):
+            problems.append("exceeds accel or cruise_speed")
+        # Segments are halves of steps of up to ramp/2, holding the acceleration 2/3 of a step apart at most
+        if any(abs(b.acceleration - a.acceleration) > 2 * accel / 3 * (1 + 1e-9) for a, b in zip(trajectory, trajectory[1:])):
+            problems.append("jumps in acceleration")
+        checks += 1
+        if problems:
+            print(f"✗ p0={p0}, p1={p1}, v0={v0}: {', '.join(problems)}")
+            success = False
+            break
+    if success:
+        print(f"✓ {checks} trajectories land exactly, take flight_time and keep within accel, cruise_speed and jerk")
+    
+    if agent.flight_time(100, 100) == 0 and agent.calculate_trajectory(100, 100, 0, 0).time == 0:
+        print("✓ Moves nowhere take no time")
+    else:
+        print("✗ Moves nowhere take time")
+        success = False
+    
+    return success
+
+def test_scurve_tracking():
+    """At equal flight time, the rotor should lag the S-curve less than SimpleAgent's profile"""
+    print("Testing S-curve tracking in simulation...")
+    
+    success = True
+    interval_ms = config.stepper["interval_ms"]
+    simple = SimpleAgent(config.stepper["cruise_speed"], config.stepper["accel"])
+    for positions in (1, 3, 8):
+        p1 = positions * config.WAGON_2_STEPPER
+        accel = equal_time_accel(simple, 0, p1, ramp=0.02)
+        scurve = SCurveAgent(config.stepper["cruise_speed"], accel, 2 * accel / 0.02)
+        simple_error = tracking_error(simple.calculate_trajectory(0, p1, 0, 0), interval_ms)
+        scurve_error = tracking_error(scurve.calculate_trajectory(0, p1, 0, 0), interval_ms)
+        summary = (f"{positions} positions in {simple.flight_time(0, p1):.3f} s: peak lag {simple_error:.2f} steps with SimpleAgent, "
+                   f"{scurve_error:.2f} with the S-curve at accel {accel:,.0f}")
+        if scurve_error < simple_error:
+            print(f"✓ {summary}")
+        else:
+            print(f"✗ {summary}")
+            success = False
+    
+    return success
+
+if __name__ == "__main__":
+    success = test_scurve_contract()
+    success = test_scurve_tracking() and success
+    exit(0 if success else 1)
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Test script for the Stepper's timer callback, run on a simulated clock (see stepper_simulation.py)
+Checks that retargeting mid-move, wherever it falls between the timer's ticks and with the callbacks running late,
+still lands on the target without the velocity jumping further than the acceleration allows
+"""
+
+from stepper_simulation import SimulatedStepper
+import config
+
+# Moves retargeted mid-move: further on, back, and to a stop
+MOVES = [(30000, 40000), (30000, 12000), (5000, 0)]
+
+# The velocity changes at most accel over a tick, plus once as much to make up for a late callback
+MAX_JUMP = 2 * config.stepper["accel"] * config.stepper["interval_ms"] / 1000
+
+def retarget(first, second, after_ms, late_ms):
+    """Head for first, and after_ms for second, returning the cart's error at arrival and its largest velocity jump"""
+    simulation = SimulatedStepper()
+    simulation.set_target(first)
+    simulation.run(after_ms, late_ms)
+    simulation.set_target(second)
+    if not simulation.run_until_reached():
+        return None, None
+    velocities = simulation.velocities
+    jump = max(abs(after - before) for before, after in zip(velocities, velocities[1:]))
+    return simulation.position - second, jump
+
+def test_stepper_retarget():
+    """Retargets off the timer's phase should be corrected, not carried to the end of the move"""
+    print("Testing Stepper retargeting...")
+
+    success = True
+    interval_ms = config.stepper["interval_ms"]
+    for late_ms in (0, interval_ms // 2):
+        worst_error = worst_jump = 0
+        for first, second in MOVES:
+            for phase_ms in range(interval_ms):
+                error, jump = retarget(first, second, 150 + phase_ms, late_ms)
+                if error is None:
+                    print(f"✗ {first} -> {second} retargeted {phase_ms} ms off the ticks never reached its target")
+                    success = False
+                elif abs(error) > 0.5 or jump > MAX_JUMP:
+                    print(f"✗ {first} -> {second} retargeted {phase_ms} ms off the ticks: {error:.2f} steps off, jumping {jump} steps/s")
+                    success = False
+                else:
+                    worst_error = max(worst_error, abs(error))
+                    worst_jump = max(worst_jump, jump)
+        if success:
+            print(f"✓ Callbacks {late_ms} ms late: at most {worst_error:.2f} steps off, jumping at most {worst_jump} steps/s")
+
+    return success
+
+if __name__ == "__main__":
+    success = test_stepper_retarget()
+    exit(0 if success else 1)
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Test script for the fixed-lag streaming planner of the device Keystra
+Checks that a lag covering the whole song gives the full plan, and that short lags still give feasible paths
+"""
+
+from firmware import build_wagon, build_keystra
+from test_compact_keystra import songwriter_songs
+from test_fixed_keystra import path_quality
+
+LAGS = [1, 2, 4, 8, 16]
+
+def stream_song(keystra, song, lag):
+    """Stream a song from a generator and split the committed pairs back into duties and a path"""
+    duties = []
+    path = []
+    for duty, position in keystra.stream(iter(song), lag):
+        if duty is not None:
+            duties.append(duty)
+        path.append(position)
+    return duties, path
+
+def timings(duties):
+    """Duty timings, since silences are new Duty objects on every pass"""
+    return [(duty.start_ms, duty.duration_ms) for duty in duties]
+
+def is_feasible(wagon, duties, path):
+    """Check that every move fits in the duty it happens during"""
+    return all(
+        wagon.flight_time(path[i], path[i + 1]) <= duty.duration_ms / 1000.
+        for i, duty in enumerate(duties)
+    )
+
+def test_streaming_keystra():
+    """Test streaming against fill_and_explore on every song"""
+    print("Testing streaming Keystra planner...")
+    
+    wagon = build_wagon()
+    keystra = build_keystra(wagon, mode="compact")
+    success = True
+    
+    for name, song in songwriter_songs().items():
+        full_duties, full_path = keystra.fill_and_explore(song)
+        full_quality = path_quality(keystra, wagon, full_duties, full_path)
+        
+        duties, path = stream_song(keystra, song, len(full_duties))
+        if timings(duties) == timings(full_duties) and path == full_path:
+            print(f"✓ {name}: full lag reproduces the {len(path)} positions of fill_and_explore")
+        else:
+            print(f"✗ {name}: full lag differs from fill_and_explore")
+            success = False
+        
+        for lag in LAGS:
+            duties, path = stream_song(keystra, song, lag)
+            if timings(duties) != timings(full_duties) or len(path) != len(full_path) or not is_feasible(wagon, duties, path):
+                print(f"✗ {name}: lag {lag} gives an invalid plan")
+                success = False
+                continue
+            quality = path_quality(keystra, wagon, duties, path)
+            if quality > full_quality + 1e-6:
+                print(f"✗ {name}: lag {lag} beats the optimum ({quality:.2f} > {full_quality:.2f})")
+                success = False
+                continue
+            print(f"✓ {name}: lag {lag} feasible, quality {quality:.2f} of {full_quality:.2f}")
+    
+    return success
+
+if __name__ == "__main__":
+    success = test_streaming_keystra()
+    exit(0 if success else 1)
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Test script for the playback telemetry ring buffer
+Checks recording past capacity, incremental dumps and decoding them on the host
+"""
+
+import json
+import firmware  # Registers the firmware modules before importing them
+from monica.telemetry import Telemetry, FIELDS, RECORD_SIZE, unpack_rows
+
+def fake_row(i):
+    """A recognizable row for onset i"""
+    return (i, 100 * i, 100 * i + i % 3, -5 * i, 7 * i, 120000 - i)
+
+def test_telemetry():
+    """Test the telemetry ring buffer and its dumps"""
+    print("Testing playback telemetry...")
+    success = True
+    
+    telemetry = Telemetry(capacity=16)
+    for i in range(10):
+        telemetry.record(*fake_row(i))
+    dump = json.loads(json.dumps(telemetry.dump()))  # As it travels from the Pico
+    if unpack_rows(dump) == [fake_row(i) for i in range(10)] and dump["first"] == 0 and dump["lost"] == 0 and dump["fields"] == list(FIELDS):
+        print(f"✓ 10 rows dump and decode unchanged ({len(dump['data'])} base64 characters, {10 * RECORD_SIZE} bytes)")
+    else:
+        print(f"✗ Dump of 10 rows decodes to {unpack_rows(dump)}")
+        success = False
+    
+    # Polling: only rows after the last one seen
+    for i in range(10, 40):
+        telemetry.record(*fake_row(i))
+    dump = telemetry.dump(after=29)
+    if unpack_rows(dump) == [fake_row(i) for i in range(30, 40)] and dump["first"] == 30 and dump["lost"] == 0:
+        print("✓ Dump after row 29 returns rows 30 to 39")
+    else:
+        print(f"✗ Dump after row 29: first {dump['first']}, {dump['count']} rows")
+        success = False
+    
+    # A slow poller misses the rows the ring overwrote, and is told how many
+    dump = telemetry.dump(after=9)
+    if dump["first"] == 24 and dump["lost"] == 14 and unpack_rows(dump) == [fake_row(i) for i in range(24, 40)]:
+        print("✓ Overwritten rows are reported as lost")
+    else:
+        print(f"✗ Dump after row 9: first {dump['first']}, lost {dump['lost']}")
+        success = False
+    
+    dump = telemetry.dump(limit=5)
+    if unpack_rows(dump) == [fake_row(i) for i in range(24, 29)] and dump["recorded"] == 40:
+        print("✓ Dumps respect their limit, oldest rows first")
+    else:
+        print(f"✗ Limited dump: {unpack_rows(dump)}")
+        success = False
+    
+    telemetry.clear()
+    dump = telemetry.dump()
+    if dump["count"] == 0 and dump["recorded"] == 0 and unpack_rows(dump) == []:
+        print("✓ A new song starts with empty telemetry")
+    else:
+        print(f"✗ Cleared telemetry dumps {dump['count']} rows")
+        success = False
+    
+    try:
+        Telemetry(capacity=0)
+        print("✗ Empty telemetry was accepted")
+        success = False
+    except ValueError:
+        print("✓ Empty telemetry rejected")
+    
+    return success
+
+if __name__ == "__main__":
+    success = test_telemetry()
+    exit(0 if success else 1)
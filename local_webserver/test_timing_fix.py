@@ -5,7 +5,11 @@ Test script to verify the timing overlap fix works correctly
 
 import mido
 from mido import MidiFile, MidiTrack, Message
-from midi_processor import midi_processor
+from midi_processor import MIDIProcessor
+from plan_cache import PlanCache
+
+# Plans are cached in memory only, so testing doesn't fill the real plan cache directory
+midi_processor = MIDIProcessor(cache=PlanCache(directory=None))
 
 def create_overlapping_midi():
     """Create a MIDI file with overlapping notes to test timing resolution"""
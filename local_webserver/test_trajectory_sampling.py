@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Test script for the cursor-based Trajectory.position_at the stepper timer samples with, and the velocity schedules built from it
+Checks position_at against sample() on forward tick sequences, going back in time, and past the end of the trajectory,
+and fill_velocities against the ticks Stepper.update would compute one by one
+"""
+
+import random
+from array import array
+from math import trunc
+
+import firmware  # Registers the firmware modules before importing them
+import config
+from utils.linear_kinematics.simple_agent import SimpleAgent
+
+def random_trajectories(count, rng):
+    """Trajectories of the configured agent, from rest and from moving, as when retargeting mid-move"""
+    agent = SimpleAgent(config.stepper["cruise_speed"], config.stepper["accel"])
+    trajectories = []
+    for _ in range(count):
+        p0 = rng.uniform(-30000, 30000)
+        p1 = rng.uniform(-30000, 30000)
+        v0 = rng.choice([0, rng.uniform(-1, 1) * config.stepper["cruise_speed"]])
+        trajectories.append(agent.calculate_trajectory(p0, p1, v0, 0))
+    return trajectories
+
+def test_trajectory_sampling():
+    """position_at(t) should be exactly sample(t).position, however t moves"""
+    print("Testing Trajectory.position_at...")
+    
+    rng = random.Random(5)
+    success = True
+    interval_s = config.stepper["interval_ms"] / 1000
+    
+    checks = 0
+    for trajectory in random_trajectories(200, rng):
+        # Timer ticks through the whole move and past its end, as Stepper.update does
+        times = [trajectory.start + i * interval_s for i in range(int(trajectory.time / interval_s) + 10)]
+        times += [trajectory.start, trajectory.time, trajectory.time + 1] + [n.time for n in trajectory]
+        times += [rng.uniform(trajectory.start, trajectory.time) for _ in range(50)]  # Back and forth
+        for t in times:
+            checks += 1
+            if trajectory.position_at(t) != trajectory.sample(t).position:
+                print(f"✗ position_at({t}) = {trajectory.position_at(t)!r}, sample gives {trajectory.sample(t).position!r} for {trajectory}")
+                success = False
+                break
+    if success:
+        print(f"✓ {checks} samples match sample() exactly")
+    
+    try:
+        trajectory.position_at(trajectory.start - 1)
+        print("✗ Sampling before the start was accepted")
+        success = False
+    except ValueError:
+        print("✓ Sampling before the start is refused")
+    
+    return success
+
+def tick_velocities(trajectory, interval_ms, min_velocity=8):
+    """Velocities Stepper.update computes tick by tick with perfect timing until the trajectory ends, and where each tick starts
+    in thousandths of a step"""
+    position = trajectory.sample(trajectory.start).position
+    velocities = []
+    positions = []
+    while len(velocities) * interval_ms / 1000 <= trajectory.time - trajectory.start:
+        next_position = trajectory.sample(trajectory.start + (len(velocities) + 1) * interval_ms / 1000).position
+        vel = trunc((next_position - position) * 1000 / interval_ms)
+        if abs(vel) < min_velocity:
+            vel = 0
+        velocities.append(vel)
+        positions.append(round(position * 1000))
+        position += vel * interval_ms / 1000
+    return velocities, positions, position
+
+def test_velocity_schedule():
+    """fill_velocities should give the same ticks Stepper.update computes, and land on the target"""
+    print("Testing velocity schedules...")
+    
+    rng = random.Random(8)
+    success = True
+    interval_ms = config.stepper["interval_ms"]
+    schedule = array('i', bytes(4 * config.stepper["schedule_ticks"]))
+    schedule_positions = array('i', bytes(4 * config.stepper["schedule_ticks"]))
+    
+    worst_error = 0
+    for trajectory in random_trajectories(200, rng):
+        expected, expected_positions, position = tick_velocities(trajectory, interval_ms)
+        count = trajectory.fill_velocities(schedule, interval_ms, positions=schedule_positions)
+        if len(expected) > len(schedule):
+            if count != -1:
+                print(f"✗ A {len(expected)} tick move was written into {len(schedule)} ticks")
+                success = False
+            continue
+        if count != len(expected) or list(schedule[:count]) != expected or list(schedule_positions[:count]) != expected_positions:
+            print(f"✗ Schedule of {count} ticks differs from the {len(expected)} computed tick by tick for {trajectory}")
+            success = False
+            break
+        worst_error = max(worst_error, abs(position - trajectory.final_state.position))
+    if success:
+        print(f"✓ Schedules and their positions match the ticks of Stepper.update, ending at most {worst_error:.2f} steps off the target")
+    
+    # The whole rail from rest fits in the configured schedule
+    agent = SimpleAgent(config.stepper["cruise_speed"], config.stepper["accel"])
+    rail = agent.calculate_trajectory(0, config.RAIL_STEPPER_STEPS, 0, 0)
+    if rail.fill_velocities(schedule, interval_ms) > 0:
+        print(f"✓ Crossing the rail ({rail.time:.2f} s) fits in {len(schedule)} ticks")
+    else:
+        print(f"✗ Crossing the rail ({rail.time:.2f} s) doesn't fit in {len(schedule)} ticks")
+        success = False
+    
+    return success
+
+if __name__ == "__main__":
+    success = test_trajectory_sampling()
+    success = test_velocity_schedule() and success
+    exit(0 if success else 1)
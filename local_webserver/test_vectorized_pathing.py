@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Test script for the vectorized (NumPy) Keystra planning engine
+Checks that it produces exactly the same paths as the loop engine
+"""
+
+from monica_pathing import SongPlanner, Keystra, VectorKeystra, Wagon
+from random_songs import create_random_song
+
+def test_vectorized_pathing():
+    """Test that both engines agree on every song"""
+    print("Testing vectorized Keystra engine...")
+    
+    wagon = Wagon()
+    loop_keystra = Keystra(wagon)
+    vector_keystra = VectorKeystra(wagon)
+    success = True
+    
+    # Built-in songs
+    planner = SongPlanner()
+    songs = {
+        "showcase": planner._monica_showcase(),
+        "original": planner._por_lo_que_yo_te_quiero(),
+        "simple": planner._song1(),
+        "range_test": planner._song6(),
+    }
+    for seed in range(5):
+        songs[f"random_{seed}"] = create_random_song(120, seed)
+    
+    for name, song in songs.items():
+        loop_duties, loop_path = loop_keystra.fill_and_explore(song)
+        vector_duties, vector_path = vector_keystra.fill_and_explore(song)
+        
+        if loop_path == vector_path and len(loop_duties) == len(vector_duties):
+            print(f"✓ {name}: {len(loop_duties)} duties, identical paths")
+        else:
+            print(f"✗ {name}: paths differ")
+            print(f"  loop:   {loop_path}")
+            print(f"  vector: {vector_path}")
+            success = False
+    
+    # Different weights should agree as well
+    weighted_loop = Keystra(wagon, 10, 3, 1, 1)
+    weighted_vector = VectorKeystra(wagon, 10, 3, 1, 1)
+    song = create_random_song(200, 42)
+    if weighted_loop.fill_and_explore(song)[1] == weighted_vector.fill_and_explore(song)[1]:
+        print("✓ Custom weights: identical paths")
+    else:
+        print("✗ Custom weights: paths differ")
+        success = False
+    
+    return success
+
+if __name__ == "__main__":
+    success = test_vectorized_pathing()
+    exit(0 if success else 1)
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Test script for the Wagon's per-chord memo of covering qualities and fingerings
+Checks memoized results against fresh ones, LRU eviction, and the hit rate while planning and playing songs
+"""
+
+from firmware import build_wagon, build_keystra, config, Keyboard
+from test_chord_bitmask import set_spans, set_covering_qualities, set_fingerings, random_chords
+from test_compact_keystra import songwriter_songs
+
+def test_wagon_memo():
+    """Test the chord memo on random chords and songs"""
+    print("Testing Wagon chord memo...")
+    
+    keyboard = Keyboard(**config.keyboard)
+    success = True
+    
+    # A tiny memo evicts all the time, results must not change
+    wagon = build_wagon(memo_size=4)
+    spans = set_spans(keyboard, config.wagon["structure"], wagon.valid_positions)
+    chords = random_chords(40, seed=1)
+    mismatches = 0
+    for _ in range(3):
+        for chord in chords:
+            if wagon.covering_qualities(chord) != set_covering_qualities(spans, chord):
+                mismatches += 1
+            for position in range(wagon.valid_positions):
+                if wagon.calculate_fingerings(chord, position) != set_fingerings(spans, chord, position):
+                    mismatches += 1
+    stats = wagon.memo_stats()
+    if mismatches == 0 and stats["size"] <= 4:
+        print(f"✓ Memoized results match fresh ones with evictions ({stats['size']} of {stats['max_size']} entries)")
+    else:
+        print(f"✗ {mismatches} memoized results differ, {stats['size']} entries")
+        success = False
+    
+    # The least recently used chord is the one evicted
+    wagon = build_wagon(memo_size=2)
+    first, second, third = chords[:3]
+    wagon.covering_qualities(first)
+    wagon.covering_qualities(second)
+    wagon.covering_qualities(first)
+    wagon.covering_qualities(third)
+    hits = wagon.memo_hits
+    wagon.covering_qualities(first)
+    if wagon.memo_hits == hits + 1:
+        print("✓ Recently used chords survive eviction")
+    else:
+        print("✗ Recently used chord was evicted")
+        success = False
+    
+    # Planning and playing the songwriter songs, as the controller does (random songs barely repeat chords)
+    wagon = build_wagon()
+    keystra = build_keystra(wagon)
+    for name, song in songwriter_songs().items():
+        if name.startswith("random"):
+            continue
+        duties, path = keystra.fill_and_explore(song)
+        for i, duty in enumerate(duties):
+            if duty.chord is not None:
+                wagon.calculate_fingerings(duty.chord, path[i])
+    stats = wagon.memo_stats()
+    print(f"✓ Songs: {stats['hits']} hits, {stats['misses']} misses, hit rate {stats['hit_rate']:.0%}")
+    
+    return success
+
+if __name__ == "__main__":
+    success = test_wagon_memo()
+    exit(0 if success else 1)
@@ -56,7 +56,9 @@ def test_midi_endpoints():
     try:
         # Test MIDI processing
         print("\n2. Testing MIDI processing...")
-        from midi_processor import midi_processor
+        from midi_processor import MIDIProcessor
+        from plan_cache import PlanCache
+        midi_processor = MIDIProcessor(cache=PlanCache(directory=None))  # In memory only, out of the real plan cache directory
         
         duties, path, metadata = midi_processor.process_midi_file(test_file)
         print(f"✅ Processed MIDI file successfully")
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Test script for the packed performance wire format
+Checks round trips against the planned duties, header validation, and the PicoClient framing over a loopback socket
+"""
+
+import json
+import socket
+import struct
+import threading
+from monica_pathing import SongPlanner
+from plan_cache import PlanCache
+from monica import wire
+from performance_wire import FORMAT_NAME, encode_performance, decode_performance
+from random_songs import create_random_song
+from test_duty_table import keyboard_notes
+from utils.music.chord import Chord
+
+def comparable(duties_dict):
+    """Duties with chords as sets of their notes on the keyboard, since packing keeps those but not their spelling order"""
+    return [dict(duty, chord=keyboard_notes(Chord.from_text(duty['chord']) if duty.get('chord') else None)) for duty in duties_dict]
+
+def serve_once(server_socket, responses):
+    """Minimal stand-in for the Pico command server: one JSON line, then payload_size bytes"""
+    client, _ = server_socket.accept()
+    data = b""
+    while b"\n" not in data:
+        data += client.recv(512)
+    line, payload = data.split(b"\n", 1)
+    command = json.loads(line)
+    while len(payload) < command.get("payload_size", 0):
+        payload += client.recv(1024)
+    
+    if command["type"] == "capabilities":
+        response = {"success": True, "formats": ["json", FORMAT_NAME], "wire_version": wire.FORMAT_VERSION}
+    else:
+        duties, path = wire.unpack_duties(payload)
+        response = {"success": True, "type": command["type"], "duties": len(duties), "path": len(path)}
+    responses.append(response)
+    client.sendall((json.dumps(response) + "\n").encode())
+    client.close()
+
+def test_wire_format():
+    """Test packing and unpacking performances"""
+    print("Testing packed performance format...")
+    success = True
+    
+    song_planner = SongPlanner(cache=PlanCache(directory=None))  # In memory only, out of the real plan cache directory
+    songs = {name: song_planner.plan_song_by_name(name) for name in ["showcase", "original", "simple", "range_test"]}
+    keystra = song_planner.keystra
+    duties, path = keystra.fill_and_explore(create_random_song(500, seed=3))
+    songs["random_500"] = ([duty.to_dict() for duty in duties], path)
+    
+    for name, (duties_dict, path) in songs.items():
+        data = encode_performance(duties_dict, path)
+        decoded_duties, decoded_path = decode_performance(data)
+        if comparable(decoded_duties) == comparable(duties_dict) and decoded_path == path and len(data) == wire.packed_size(len(duties_dict)):
+            print(f"✓ {name}: {len(duties_dict)} duties round trip in {len(data):,} bytes (JSON: {len(json.dumps(duties_dict)):,})")
+        else:
+            print(f"✗ {name}: round trip changed the performance")
+            success = False
+    
+    # Wider than a mask: packed like it goes through JSON, notes off the keyboard dropped
+    wide = [{"start_ms": 500 * i, "duration_ms": 500, "chord": chord, "skid": 0, "volume_percent": None}
+            for i, chord in enumerate(["C3", "C6", "C3_G4_C6_C7", "C7"])]
+    try:
+        decoded_duties, _ = decode_performance(encode_performance(wide, [0] * (len(wide) + 1)))
+        if comparable(decoded_duties) == comparable(wide):
+            print("✓ A performance from C3 to C7 packs its keyboard notes")
+        else:
+            print("✗ A performance from C3 to C7 packed wrong")
+            success = False
+    except ValueError as e:
+        print(f"✗ A performance from C3 to C7 was refused: {e}")
+        success = False
+    
+    data = bytearray(encode_performance(*songs["simple"]))
+    broken = {
+        "truncated": bytes(data[:-1]),
+        "bad magic": b"XYZ" + bytes(data[3:]),
+        "future version": bytes(data[:3]) + bytes([wire.FORMAT_VERSION + 1]) + bytes(data[4:]),
+    }
+    for problem, payload in broken.items():
+        try:
+            wire.unpack_duties(payload)
+            print(f"✗ {problem} payload was accepted")
+            success = False
+        except ValueError as e:
+            print(f"✓ {problem} payload rejected: {e}")
+    
+    # PicoClient negotiates the format, then sends the payload right after the JSON line
+    from local_web_server import PicoClient
+    server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server_socket.bind(("127.0.0.1", 0))
+    server_socket.listen(1)
+    responses = []
+    server = threading.Thread(target=lambda: [serve_once(server_socket, responses) for _ in range(2)])
+    server.start()
+    
+    client = PicoClient("127.0.0.1", server_socket.getsockname()[1])
+    duties_dict, path = songs["random_500"]
+    response = client.send_performance("random_500", duties_dict, path)
+    server.join(5)
+    server_socket.close()
+    if response.get("type") == "play_performance_packed" and response.get("duties") == len(duties_dict) and response.get("path") == len(path):
+        print(f"✓ PicoClient negotiated {FORMAT_NAME} and sent the whole payload")
+    else:
+        print(f"✗ PicoClient exchange failed: {response}")
+        success = False
+    
+    return success
+
+if __name__ == "__main__":
+    success = test_wire_format()
+    exit(0 if success else 1)
@@ -2,6 +2,8 @@ import device
 import monica
 import uasyncio
 import gc
+import config
+from utils import log
 from emergency_cleanup import safe_shutdown, emergency_network_cleanup
 
 # Lazy imports to save memory
@@ -17,6 +19,10 @@ async def main():
 	print("=== Monica Robotic Harmonica Starting ===")
 	print("Free memory:", gc.mem_free())
 	
+	# Log messages are printed from here, off the playback and command paths
+	log.configure(**config.log)
+	uasyncio.create_task(log.logger.drain_task())
+	
 	# Run network command server mode by default
 	print("Starting network command server...")
 	mode = "2"
@@ -0,0 +1,73 @@
+# Generated by local_webserver/compile_songs.py from monica/songwriter.py, do not edit.
+# Songs planned on the host in the packed performance format (monica/wire.py), played by monica.planner.plan_table_by_name
+# while the config matches PLANNED_WITH
+
+PLANNED_WITH = {'keyboard': {'start': 53, 'end': 84}, 'wagon': {'structure': [[0, 2], [4, 6], [8, 10], [12, 14], [1, 3], [5, 7], [9, 11]], 'valid_positions': 12, 'wagon_2_stepper': 1880.0}, 'keystra': {'notes_bonus': 10, 'skid_bonus': 3, 'move_penalty': 1, 'time_penalty': 1, 'mode': 'compact'}, 'stepper': {'cruise_speed': 35000, 'accel': 250000}}
+
+SONGS = {
+		'showcase': (
+			b'MNC\x015\x1d\x00\x00\x00\x00\x00 \x03\x00\x00\x01\x00\x00\x00\x00\x1e \x03\x00'
+			b'\x00\xc8\x00\x00\x00\x00\x00\x00\x00\x00\xff\xe8\x03\x00\x00\xe8\x03\x00\x00D\x00\x00\x00\x00'
+			b'(\xd0\x07\x00\x00,\x01\x00\x00\x00\x00\x00\x00\x00\xff\xfc\x08\x00\x00X\x02\x00\x00\x10'
+			b'\x00\x00\x00\x002T\x0b\x00\x00\xb0\x04\x00\x00\x90\x08\x00\x00\x00<\x04\x10\x00\x00\x90'
+			b'\x01\x00\x00\x00\x00\x00\x00\x00\xff\x94\x11\x00\x00 \x03\x00\x00\x80H\x00\x00\x00F\xb4'
+			b'\x14\x00\x00\x90\x01\x00\x00\x00\x02\x00\x00\x00<D\x16\x00\x00\x90\x01\x00\x00\x00\x08\x00'
+			b'\x00\x00F\xd4\x17\x00\x00\xe8\x03\x00\x00\x00\x10\t\x00\x00P\xbc\x1b\x00\x00,\x01\x00'
+			b'\x00\x00\x00\x00\x00\x00\xff\xe8\x1c\x00\x00,\x01\x00\x00\x00@\x00\x00\x002\x14\x1e\x00'
+			b'\x00,\x01\x00\x00\x00\x00\x01\x00\x00<@\x1f\x00\x00,\x01\x00\x00\x00\x00\x04\x00\x00'
+			b'Fl \x00\x00X\x02\x00\x00\x00\x00\x08\x00\x00U\xc4"\x00\x00\xc8\x00\x00\x00\x00'
+			b'\x00\x00\x00\x00\xff\x8c#\x00\x00 \x03\x00\x00\x00@$\x00\x00K\xac&\x00\x00 '
+			b'\x03\x00\x00\x00\x00\x89\x00\x00A\xcc)\x00\x00\x90\x01\x00\x00\x00\x00\x00\x00\x00\xff\\'
+			b'+\x00\x00\xe8\x03\x00\x00\x00\x00$\x01\x00ZD/\x00\x00\xf4\x01\x00\x00\x00\x00\x08'
+			b'\x00\x00U81\x00\x00\xf4\x01\x00\x00\x00\x00 \x00\x00Z,3\x00\x00 \x03\x00'
+			b'\x00\x00\x00\x80\x00\x00_L6\x00\x00,\x01\x00\x00\x00\x00\x00\x00\x00\xffx7\x00'
+			b'\x00\xb0\x04\x00\x00\x00\x00\x00\x91\x00d(<\x00\x00\xe8\x03\x00\x00\x00\x00\x00\x80\x00'
+			b'_\x10@\x00\x00\xf4\x01\x00\x00\x00\x00\x00\x00\x00\xff\x04B\x00\x00\xdc\x05\x00\x00\x80'
+			b'H\x08\x00\x00F\x00\x00\x01\x01\x02\x02\x02\x04\x04\x04\x04\x04\x06\x06\x06\x06\x06\x07\x07'
+			b'\x07\t\t\t\t\t\x0b\x0b\x0b\x06\x06'
+		),
+		'original': (
+			b'MNC\x015!\x00\x00\x00\x00\x00F\x05\x00\x00\x00\x12\x01\x00\x00(F\x05\x00'
+			b'\x00\x96\x00\x00\x00\x00\x00\x00\x00\x00\xff\xdc\x05\x00\x00F\x05\x00\x00 \x12\x00\x00\x00'
+			b'-"\x0b\x00\x00\x96\x00\x00\x00\x00\x00\x00\x00\x00\xff\xb8\x0b\x00\x00\xe2\x04\x00\x00\x80'
+			b'H\x00\x00\x00<\x9a\x10\x00\x00\xfa\x00\x00\x00\x00\x00\x00\x00\x00\xff\x94\x11\x00\x00\xe2'
+			b'\x04\x00\x00\x00\x10\t\x00\x00Fv\x16\x00\x00\xfa\x00\x00\x00\x00\x00\x00\x00\x00\xffp'
+			b'\x17\x00\x00\x14\x05\x00\x00\x00B\x02\x00\x00A\x84\x1c\x00\x00\xc8\x00\x00\x00\x00\x00\x00'
+			b'\x00\x00\xffL\x1d\x00\x00\xe2\x04\x00\x00\x00\x10!\x00\x00K."\x00\x00\xfa\x00\x00'
+			b'\x00\x00\x00\x00\x00\x00\xff(#\x00\x00F\x05\x00\x00\x00\x8a\x04\x00\x002n(\x00'
+			b'\x00\x96\x00\x00\x00\x00\x00\x00\x00\x00\xff\x04)\x00\x00F\x05\x00\x00\x00I\x01\x00\x00'
+			b'7J.\x00\x00\x96\x00\x00\x00\x00\x00\x00\x00\x00\xff\xe0.\x00\x00\xe2\x04\x00\x00\x00'
+			b'\x12\x01\x00\x00F\xc23\x00\x00\xfa\x00\x00\x00\x00\x00\x00\x00\x00\xff\xbc4\x00\x00\xe2'
+			b'\x04\x00\x00\x00\x12\x02\x00\x00K\x9e9\x00\x00\xfa\x00\x00\x00\x00\x00\x00\x00\x00\xff\x98'
+			b':\x00\x00F\x05\x00\x00\x84\x08\x00\x00\x00<\xde?\x00\x00\x96\x00\x00\x00\x00\x00\x00'
+			b'\x00\x00\xfft@\x00\x00\xe2\x04\x00\x00\x90\x10\x00\x00\x00FVE\x00\x00\xfa\x00\x00'
+			b'\x00\x00\x00\x00\x00\x00\xffPF\x00\x00\xe2\x04\x00\x00 B\x00\x00\x00P2K\x00'
+			b'\x00\xfa\x00\x00\x00\x00\x00\x00\x00\x00\xff,L\x00\x00\xe2\x04\x00\x00\x00\x12\x01\x00\x00'
+			b'U\x0eQ\x00\x00\xfa\x00\x00\x00\x00\x00\x00\x00\x00\xff\x08R\x00\x00X\x02\x00\x00\x00'
+			b'\x8a\x04\x00\x00F`T\x00\x00\x96\x00\x00\x00\x00\x00\x00\x00\x00\xff\xf6T\x00\x00X'
+			b'\x02\x00\x00\x00\x08\x11\x00\x00<NW\x00\x00\x96\x00\x00\x00\x00\x00\x00\x00\x00\xff\xe4'
+			b'W\x00\x00F\x05\x00\x00\x00\x12\x01\x00\x002\x02\x02\x02\x02\x02\x02\x04\x04\x05\x05\x05'
+			b'\x05\x04\x04\x04\x04\x04\x04\x04\x04\x02\x02\x02\x02\x02\x02\x03\x03\x04\x04\x04\x04\x04\x04'
+		),
+		'simple': (
+			b'MNC\x015\x11\x00\x00\x00\x00\x00\x08\x07\x00\x00@"\x00\x00\x00(\x08\x07\x00'
+			b'\x00w\x01\x00\x00\x00\x00\x00\x00\x00\xff\x7f\x08\x00\x00\x08\x07\x00\x00D\x02\x00\x00\x00'
+			b'2\x87\x0f\x00\x00w\x01\x00\x00\x00\x00\x00\x00\x00\xff\xfe\x10\x00\x00\x08\x07\x00\x00\x12'
+			b'\x00\x00\x00\x00<\x06\x18\x00\x00w\x01\x00\x00\x00\x00\x00\x00\x00\xff}\x19\x00\x00\x08'
+			b'\x07\x00\x00\x10\t\x00\x00\x00F\x85 \x00\x00w\x01\x00\x00\x00\x00\x00\x00\x00\xff\xfc'
+			b'!\x00\x00\x08\x07\x00\x00@"\x00\x00\x00P\x04)\x00\x00w\x01\x00\x00\x00\x00\x00'
+			b'\x00\x00\xff{*\x00\x00\x08\x07\x00\x00D\x02\x00\x00\x00K\x831\x00\x00w\x01\x00'
+			b'\x00\x00\x00\x00\x00\x00\xff\xfa2\x00\x00\x08\x07\x00\x00\x12\x00\x00\x00\x00A\x02:\x00'
+			b'\x00w\x01\x00\x00\x00\x00\x00\x00\x00\xffy;\x00\x00\x08\x07\x00\x00\x10\t\x00\x00\x00'
+			b'7\x81B\x00\x00w\x01\x00\x00\x00\x00\x00\x00\x00\xff\xf8C\x00\x00\x08\x07\x00\x00\x00'
+			b'\x00\x00\x10\x00Z\x02\x02\x01\x01\x00\x00\x01\x01\x02\x02\x01\x01\x00\x00\x00\x00\x00\x00'
+		),
+		'range_test': (
+			b'MNC\x015\t\x00\x00\x00\x00\x00\xe8\x03\x00\x00\x01\x00\x00\x00\x002\xe8\x03\x00'
+			b'\x00\xe8\x03\x00\x00\x00\x00\x00\x00\x00\xff\xd0\x07\x00\x00\xe8\x03\x00\x00\x00\x00\x00\x80\x00'
+			b'F\xb8\x0b\x00\x00\xe8\x03\x00\x00\x00\x00\x00\x00\x00\xff\xa0\x0f\x00\x00\xe8\x03\x00\x00\x01'
+			b'\x00\x00\x00\x00<\x88\x13\x00\x00\xe8\x03\x00\x00\x00\x00\x00\x00\x00\xffp\x17\x00\x00\xe8'
+			b'\x03\x00\x00\x00\x00\x00\x80\x00PX\x1b\x00\x00\xe8\x03\x00\x00\x00\x00\x00\x00\x00\xff@'
+			b'\x1f\x00\x00\xe8\x03\x00\x00\x00\x00\x08\x00\x00K\x00\x00\x0b\x0b\x00\x00\x0b\x0b\x0b\x0b'
+		),
+}
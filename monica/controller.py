@@ -1,9 +1,16 @@
+import gc
+from array import array
 import device
 import config
 import monica
 import uasyncio
-from time import ticks_ms, ticks_add, ticks_diff
+from utils import log
 from .planner import plan_song as plan_method
+from .duty_table import DutyTable
+from .wire import VOLUME_NONE
+from .scheduler import PlaybackScheduler
+from .lead_times import LeadTimes
+from .telemetry import Telemetry
 
 
 async def home_all():
@@ -17,101 +24,145 @@ async def home_all():
 
 async def play_song_coro():
 	device.pump.go_to(volume_percent)
-	print(f"Setting pump to {volume_percent}% volume")
+	log.info("Setting pump to %d%% volume", volume_percent)
 	await device.pump.wait("ReachedTarget")
 	duties, path = plan_method()
+	table = DutyTable.from_duties(duties, path, monica.wagon)
+	del duties
 
-	# Go to initial position
-	position = path[0]
-	steps = monica.wagon.calculate_steps(position)
-	device.stepper.set_target(steps)
-	print("Waiting for stepper to reach initial position")
-	await device.stepper.wait("ReachedTarget")
-
-	print("Playing song")
-	song_start_ms = ticks_ms()
-	for i in range(len(duties)):
-		duty = duties[i]
-		next_pos = path[i + 1] # next_pos will make sense when the IK has functionality for moving in a set duration
-		next_steps = monica.wagon.calculate_steps(next_pos)
-		device.stepper.set_target(next_steps)
-		
-		if duty.chord is None:
-			device.fingers_rig.go_home()
-		else:
-			fingerings = monica.wagon.calculate_fingerings(duty.chord, position)
-			device.fingers_rig.play(fingerings)
-
-		# wait till duty is over
-		duty_end_ms = ticks_add(song_start_ms, duty.end_ms)
-		wait_ms = ticks_diff(duty_end_ms, ticks_ms())
-		print(f"Waiting for {wait_ms} ms to duty completion")
-		await uasyncio.sleep_ms(wait_ms)
-
-		position = next_pos
+	await _go_to_start(table)
+	await _play_rows(table, volume_percent)
 
 def cancel_song():
-	print("Cancelling song")
+	log.info("Cancelling song")
 	if play_song_task:
 		play_song_task.cancel() #type: ignore
 	device.fingers_rig.go_home()
 	device.pump.go_to(0)  # Set to 0% volume (silence)
-	print("Song cancelled")
+	log.info("Song cancelled")
 	device.servo_rig._encoder_timer.deinit()
-	print("Hacky: ServoRig _encoder_timer deinitialized from here")
+	log.debug("Hacky: ServoRig _encoder_timer deinitialized from here")
 
 async def play_song_with_plan(duties, path, volume_override=None):
 	"""Play a song with pre-planned duties and path"""
+	await play_table(DutyTable.from_duties(duties, path, monica.wagon), volume_override)
+
+async def _go_to_start(table: DutyTable):
+	device.stepper.set_target(table.steps[0])
+	log.info("Waiting for stepper to reach initial position")
+	await device.stepper.wait("ReachedTarget")
+
+def _flight_ms(seconds: float) -> int:
+	return int(seconds * 1000 + 0.999)
+
+# Command issue times for a table. With lead_compensation off every command goes out at its duty's start, like it used to
+def _lead_times(table: DutyTable, current_volume) -> LeadTimes:
+	if not lead_compensation:
+		no_flight = lambda origin, target: 0
+		return LeadTimes(table, current_volume, no_flight, no_flight, no_flight)
+	return LeadTimes(table, current_volume,
+		lambda from_code, to_code: _flight_ms(device.fingers_rig.code_flight_time(from_code, to_code)),
+		lambda from_volume, to_volume: _flight_ms(device.pump.flight_time(from_volume, to_volume)),
+		lambda from_pos, to_pos: _flight_ms(monica.wagon.flight_time(from_pos, to_pos)), retarget_ms)
+
+# Seconds the cart has for the move of each duty, from its issue until the next fingering is issued, where that leaves at
+# least gentle_slack_ms over the fastest move, so the stepper takes it gently (0 where it should rush)
+def _gentle_arrivals(table: DutyTable, lead_times: LeadTimes) -> array:
+	count = len(table)
+	arrivals = array('f', bytes(4 * count))
+	if not gentle_slack_ms:
+		return arrivals
+	path = table.path
+	for i in range(count - 1):
+		if path[i] != path[i + 1]:
+			window_ms = lead_times.fingers_ms[i + 1] - lead_times.stepper_ms[i] - gentle_margin_ms
+			if window_ms - _flight_ms(monica.wagon.flight_time(path[i], path[i + 1])) >= gentle_slack_ms:
+				arrivals[i] = window_ms/1000
+	return arrivals
+
+# The playback loop reads precomputed columns only: steps from the table, and command issue times from LeadTimes, so each
+# actuator arrives as its duty starts. Fingers, pump and stepper commands are merged by issue time, fingers first on ties,
+# and nothing is logged until the song is over. Every finger onset is recorded in telemetry
+async def _play_rows(table: DutyTable, current_volume):
+	global last_playback_stats
+	log.info("Playing song")
+	lead_times = _lead_times(table, current_volume)
+	steps = table.steps
+	fingers_ms = lead_times.fingers_ms
+	codes = lead_times.codes
+	pump_ms = lead_times.pump_ms
+	pump_volumes = lead_times.pump_volumes
+	stepper_ms = lead_times.stepper_ms
+	arrivals = _gentle_arrivals(table, lead_times)
+	count = len(table)
+	scheduler = PlaybackScheduler(count, spin_ms)
+	volume_changes = 0
+
+	fingers_next = 0
+	pump_next = 0
+	stepper_next = 0
+	telemetry.clear()
+	device.stepper.reset_timer_stats()
+	scheduler.start(lead_times.preroll_ms)
+	while stepper_next < count:
+		while pump_next < count and pump_volumes[pump_next] == VOLUME_NONE:
+			pump_next += 1
+		fingers_due = fingers_ms[fingers_next] if fingers_next < count else NEVER_MS
+		pump_due = pump_ms[pump_next] if pump_next < count else NEVER_MS
+
+		if fingers_due <= pump_due and fingers_due <= stepper_ms[stepper_next]:
+			code = codes[fingers_next]
+			lateness_ms = await scheduler.wait_onset(fingers_due)
+			if code:
+				device.fingers_rig.play_code(code)
+			else:
+				device.fingers_rig.go_home()
+			telemetry.record(fingers_next, fingers_due, fingers_due + lateness_ms,
+				int(device.stepper.aprox_position), device.encoder.counter, gc.mem_free())
+			fingers_next += 1
+		elif pump_due <= stepper_ms[stepper_next]:
+			await scheduler.wait_until(pump_due)
+			device.pump.go_to(pump_volumes[pump_next])
+			volume_changes += 1
+			pump_next += 1
+		else:
+			await scheduler.wait_until(stepper_ms[stepper_next])
+			device.stepper.set_target(steps[stepper_next + 1], arrivals[stepper_next] or None)
+			stepper_next += 1
+
+	# Hold the last duty till it is over
+	if count:
+		await scheduler.wait_until(table.end_ms(count - 1))
+
+	last_playback_stats = scheduler.stats()
+	last_playback_stats["preroll_ms"] = lead_times.preroll_ms
+	last_playback_stats["shortfall_ms"] = lead_times.shortfall_ms
+	last_playback_stats["stepper_timer"] = device.stepper.timer_stats()
+	log.info("Played %d duties, %d volume changes", count, volume_changes)
+	log.info("Onset lateness: %s", last_playback_stats)
+
+# Lateness stats of the last song played (see PlaybackScheduler.stats) with the stepper timer load, or None
+def playback_stats() -> dict | None:
+	return last_playback_stats
+
+async def play_table(table: DutyTable, volume_override=None):
+	"""Play a planned DutyTable"""
 	await home_all()
 	
 	# Set volume (use override or default)
 	target_volume = volume_override if volume_override is not None else volume_percent
 	device.pump.go_to(target_volume)
-	print(f"Setting pump to {target_volume}% volume")
+	log.info("Setting pump to %d%% volume", target_volume)
 	await device.pump.wait("ReachedTarget")
 
-	# Go to initial position
-	position = path[0]
-	steps = monica.wagon.calculate_steps(position)
-	device.stepper.set_target(steps)
-	print("Waiting for stepper to reach initial position")
-	await device.stepper.wait("ReachedTarget")
-
-	print("Playing song")
-	song_start_ms = ticks_ms()
-	current_volume = target_volume
-	
-	for i in range(len(duties)):
-		duty = duties[i]
-		next_pos = path[i + 1]
-		next_steps = monica.wagon.calculate_steps(next_pos)
-		device.stepper.set_target(next_steps)
-		
-		# Handle volume change if specified in duty
-		if duty.volume_percent is not None and duty.volume_percent != current_volume:
-			device.pump.go_to(duty.volume_percent)
-			current_volume = duty.volume_percent
-			print(f"Volume changed to {current_volume}%")
-		
-		if duty.chord is None:
-			device.fingers_rig.go_home()
-		else:
-			fingerings = monica.wagon.calculate_fingerings(duty.chord, position)
-			device.fingers_rig.play(fingerings)
-
-		# wait till duty is over
-		duty_end_ms = ticks_add(song_start_ms, duty.end_ms)
-		wait_ms = ticks_diff(duty_end_ms, ticks_ms())
-		print(f"Waiting for {wait_ms} ms to duty completion")
-		await uasyncio.sleep_ms(wait_ms)
-
-		position = next_pos
+	await _go_to_start(table)
+	await _play_rows(table, target_volume)
 
-	print("Song finished")
+	log.info("Song finished")
 	
 	# Disable encoder monitoring during cleanup to prevent false cancellations
 	device.servo_rig._encoder_timer.deinit()
-	print("Encoder monitoring disabled for cleanup")
+	log.info("Encoder monitoring disabled for cleanup")
 	
 	device.pump.go_to(0)  # Set to 0% volume (silence)
 	device.fingers_rig.go_home()
@@ -125,11 +176,11 @@ async def run():
 	play_song_task = uasyncio.create_task(play_song_coro())
 	device.stepper.register_callback("SensorCancel", cancel_song)
 	await play_song_task #type: ignore
-	print("Song finished")
+	log.info("Song finished")
 	
 	# Disable encoder monitoring during cleanup to prevent false cancellations
 	device.servo_rig._encoder_timer.deinit()
-	print("Encoder monitoring disabled for cleanup")
+	log.info("Encoder monitoring disabled for cleanup")
 	
 	device.pump.go_to(0)  # Set to 0% volume (silence)
 	device.fingers_rig.go_home()
@@ -140,6 +191,14 @@ async def run():
 
 
 volume_percent = config.controller["volume_percent"]
+spin_ms = config.controller["spin_ms"]
+lead_compensation = config.controller["lead_compensation"]
+gentle_slack_ms = config.controller["gentle_slack_ms"]
+gentle_margin_ms = config.controller["gentle_margin_ms"]
+retarget_ms = config.controller["retarget_ms"]
+NEVER_MS = 1 << 29
+telemetry = Telemetry(**config.telemetry)
+last_playback_stats = None
 
 play_song_task = None
 
@@ -41,18 +41,19 @@ class Duty:
 
 	@classmethod
 	def fill_with_silence(cls, duties: list['Duty']) -> list['Duty']:
-		sequence: list[Duty] = []
+		return list(cls.iter_with_silence(duties))
+
+	# Same as fill_with_silence, one Duty at a time, so duties can come from a generator of unknown length
+	@classmethod
+	def iter_with_silence(cls, duties):
 		time_ms = 0
 		for duty in duties:
 			if duty.start_ms < time_ms:
 				raise ValueError(f"Inconsistent duty order: {duty} starts at {duty.start_ms} ms, but no action expected at least until {time_ms} ms.")
 			
 			if duty.start_ms > time_ms:
-				sequence.append(cls.silence(time_ms, duty.start_ms - time_ms))
+				yield cls.silence(time_ms, duty.start_ms - time_ms)
 				time_ms = duty.start_ms
 			
-			sequence.append(duty)
+			yield duty
 			time_ms += duty.duration_ms
-		
-		return sequence
-
@@ -0,0 +1,136 @@
+import struct
+from array import array
+from monica import wire
+from monica.duty import Duty
+from utils.music.chord import Chord
+from utils.music.notes import Note
+
+
+# Fingerings are packed 2 bits per finger, first finger lowest: 0 sends the finger home, otherwise it is the fingering + 1.
+# FingersRig.play_code unpacks them the same way
+FINGERING_BITS = 2
+
+def fingering_code(fingerings: list[int | None]) -> int:
+	code = 0
+	shift = 0
+	for fingering in fingerings:
+		if fingering is not None:
+			code |= (fingering + 1) << shift
+		shift += FINGERING_BITS
+	return code
+
+# Moves a chord mask from one base note to another, notes falling below the new base are dropped
+def rebase_mask(mask: int, base: Note, new_base: Note) -> int:
+	if new_base >= base:
+		return mask >> (new_base - base)
+	return mask << (base - new_base)
+
+
+# A planned performance stored by columns, ready to be played. A list of Duty objects costs a slotted object and a Chord set
+# per duty, tens of KB for a long song on the Pico, while here every duty is a row across a few arrays (BYTES_PER_DUTY).
+# Besides the duty itself, each row keeps what playback needs precomputed: the fingering code at the position the wagon
+# holds during the duty, and steps for every position of the path, so the controller loop does no planning work at all.
+# Chord masks are relative to base, the wagon's (see Wagon.base), with the notes off the keyboard dropped like in the wire format
+class DutyTable:
+	__slots__ = ['base', 'start_ms', 'duration_ms', 'masks', 'skids', 'volumes', 'fingerings', 'path', 'steps']
+
+	BYTES_PER_DUTY = 4 + 4 + 4 + 1 + 1 + 4
+	BYTES_PER_POSITION = 1 + 4
+
+	def __init__(self, count: int, base: Note):
+		self.base = base
+		self.start_ms = array('I', bytes(4 * count))
+		self.duration_ms = array('I', bytes(4 * count))
+		self.masks = array('I', bytes(4 * count))
+		self.skids = array('b', bytes(count))
+		self.volumes = array('B', bytes(count))  # wire.VOLUME_NONE keeps the current volume
+		self.fingerings = array('I', bytes(4 * count))
+		self.path = array('B', bytes(count + 1))
+		self.steps = array('f', bytes(4 * (count + 1)))
+
+	def __len__(self) -> int:
+		return len(self.start_ms)
+
+	# Rows read as wire records: (start_ms, duration_ms, chord mask, skid, volume_percent or None)
+	def __getitem__(self, i: int) -> tuple:
+		return (self.start_ms[i], self.duration_ms[i], self.masks[i], self.skids[i], self.volume_percent(i))
+
+	def __iter__(self):
+		for i in range(len(self)):
+			yield self[i]
+
+	def end_ms(self, i: int) -> int:
+		return self.start_ms[i] + self.duration_ms[i]
+
+	def volume_percent(self, i: int) -> int | None:
+		volume = self.volumes[i]
+		return None if volume == wire.VOLUME_NONE else volume
+
+	def chord(self, i: int) -> Chord | None:
+		mask = self.masks[i]
+		return Chord.from_mask(mask, self.base) if mask else None
+
+	def memory_size(self) -> int:
+		return len(self) * self.BYTES_PER_DUTY + len(self.path) * self.BYTES_PER_POSITION
+
+	def _set(self, i: int, start_ms: int, duration_ms: int, mask: int, skid: int, volume_percent: int | None):
+		if duration_ms <= 0:
+			raise ValueError(f"Invalid duration: {duration_ms}")
+		self.start_ms[i] = start_ms
+		self.duration_ms[i] = duration_ms
+		self.masks[i] = mask & wire.MASK_BITS
+		self.skids[i] = skid
+		self.volumes[i] = wire.VOLUME_NONE if volume_percent is None else volume_percent
+
+	# Fills path, steps and fingerings once the duties are in. Fingerings go through the wagon memo, and each distinct
+	# (chord, position) pair is coded once
+	def _prepare(self, path: list[int], wagon):
+		count = len(self)
+		if len(path) != count + 1:
+			raise ValueError(f"Path length ({len(path)}) must be duties length + 1 ({count + 1})")
+
+		for i in range(count + 1):
+			self.path[i] = path[i]
+			self.steps[i] = wagon.calculate_steps(path[i])
+
+		codes: dict[int, int] = {}
+		positions = wagon.valid_positions
+		for i in range(count):
+			mask = self.masks[i]
+			if not mask:
+				continue
+			key = mask * positions + path[i]
+			code = codes.get(key)
+			if code is None:
+				code = fingering_code(wagon.mask_fingerings(mask, path[i]))
+				codes[key] = code
+			self.fingerings[i] = code
+
+	@classmethod
+	def from_duties(cls, duties: list[Duty], path: list[int], wagon) -> 'DutyTable':
+		table = cls(len(duties), wagon.base)
+		for i, duty in enumerate(duties):
+			table._set(i, duty.start_ms, duty.duration_ms, duty.chord.mask(table.base) if duty.chord else 0, duty.skid, duty.volume_percent)
+		table._prepare(path, wagon)
+		return table
+
+	# Straight from a wire payload to columns, without a single Duty or Chord in between. Payloads packed on another base
+	# are rebased to the wagon's
+	@classmethod
+	def from_packed(cls, data, wagon) -> 'DutyTable':
+		data = memoryview(data)
+		base, count = wire.unpack_header(data)
+		table = cls(count, wagon.base)
+		offset = wire.HEADER_SIZE
+		for i in range(count):
+			start_ms, duration_ms, mask, skid, volume = struct.unpack_from(wire.RECORD, data, offset)
+			offset += wire.RECORD_SIZE
+			if base != wagon.base:
+				mask = rebase_mask(mask, base, wagon.base)
+			table._set(i, start_ms, duration_ms, mask, skid, None if volume == wire.VOLUME_NONE else volume)
+		table._prepare(data[offset:], wagon)
+		return table
+
+	def to_duties(self) -> tuple[list[Duty], list[int]]:
+		return [Duty(start_ms, duration_ms, self.chord(i), skid, volume_percent)
+				for i, (start_ms, duration_ms, _, skid, volume_percent) in enumerate(self)], list(self.path)
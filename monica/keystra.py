@@ -1,6 +1,21 @@
 from monica.duty import Duty, TimeMS, Skid
 from monica.wagon import Wagon, Position, Quality
 from utils.math import *
+from array import array
+
+
+# Planning modes for Keystra.fill_and_explore, all of them only evaluate moves within the wagon's reach_radius for each
+# duty (in ascending order, as a full scan would), so planning is O(duties·positions·band) and not O(duties·positions²):
+# "choices" keeps a Choice object per position per duty, which is easy to inspect but costs a dozen heap objects per duty
+# "compact" keeps one signed byte of backpointer per position per duty and just two rows of qualities, for the same paths
+# "fixed" is compact, but scores with small ints scaled by QUALITY_SCALE instead of floats, which MicroPython has to box.
+#   Every step rounds down by less than 3 units, so the chosen path is worth at most 3/QUALITY_SCALE per duty less than
+#   the float optimum, and paths only differ from the float modes where candidates are that close.
+#   The inner loop only adds and compares small ints: bonuses and lengths are worked out once per duty into tables, whose
+#   entries stay small for durations of hours (and rows are renormalized every duty). The products that fill them do get
+#   boxed for durations past ~12 s, but that is a few allocations per duty and not per move
+PLANNING_MODES = ("choices", "compact", "fixed")
+QUALITY_SCALE = 1000
 
 
 # Choice represents an edge in the pathfinding, that is where it came from and the accumulated quality
@@ -19,8 +34,12 @@ class Choice:
 
 # Keystra turns a keyboard into a fun optimization problem
 class Keystra:
-	def __init__(self, wagon: Wagon, notes_bonus: float, skid_bonus: float, move_penalty: float, time_penalty: float):
+	def __init__(self, wagon: Wagon, notes_bonus: float, skid_bonus: float, move_penalty: float, time_penalty: float, mode: str = "choices"):
+		if mode not in PLANNING_MODES:
+			raise ValueError(f"Unknown planning mode: {mode}. Available modes: {PLANNING_MODES}")
+
 		self._wagon = wagon
+		self._mode = mode
 		self._positions = wagon.valid_positions
 		self._silence_quality : list[Quality] = [0.0] * self._positions
 
@@ -29,6 +48,23 @@ class Keystra:
 		self._move_penalty = move_penalty
 		self._time_penalty = time_penalty
 
+		if mode == "fixed":
+			# Flights in whole milliseconds, rounded up, so "flight_ms > duration_ms" is the same test as the float one
+			positions = self._positions
+			self._flight_ms = array('i', [
+					math.ceil(wagon.flight_time(prev_pos, next_pos) * 1000)
+						for prev_pos in range(positions) for next_pos in range(positions)
+				])
+			self._notes_bonus_fixed  = round(notes_bonus  * QUALITY_SCALE)
+			self._skid_bonus_fixed   = round(skid_bonus   * QUALITY_SCALE)
+			self._move_penalty_fixed = round(move_penalty * QUALITY_SCALE)
+			self._time_penalty_fixed = round(time_penalty * QUALITY_SCALE)
+			# Length penalty per |delta_pos|, refilled once per duty so the inner loop never takes a square root
+			self._length_table = array('i', bytes(4 * positions))
+			# Notes bonus per covering quality, without and with the skid bonus, refilled once per duty likewise
+			self._bonus_table = array('i', bytes(4 * (wagon.fingers + 1)))
+			self._skid_bonus_table = array('i', bytes(4 * (wagon.fingers + 1)))
+
 	def choice_quality(self, prev_time_ms: TimeMS, next_time_ms: TimeMS, prev_pos: Position, next_pos: Position, covering_quality: Quality, skid : Skid) -> Quality:
 		quality: Quality = 0
 
@@ -54,14 +90,24 @@ class Keystra:
 	# Returns the complete sequence and an associated list of positions (which is one longer)
 	def fill_and_explore(self, duties: list[Duty]) -> tuple[list[Duty], list[Position]]:
 		duties = Duty.fill_with_silence(duties)
+		if self._mode == "fixed":
+			path = self._explore_fixed(duties)
+		elif self._mode == "compact":
+			path = self._explore_compact(duties)
+		else:
+			path = self._explore_choices(duties)
+		return duties, path
+
+	def _explore_choices(self, duties: list[Duty]) -> list[Position]:
 		choices: list[list[Choice]] = [ [ Choice(-1, 0) ] * self._positions ]
 		for duty in duties:
 			next_choices: list[Choice] = list()
 			covering_qualities: list[Quality] = self._wagon.covering_qualities(duty.chord) if duty.chord else self._silence_quality
+			radius = self._wagon.reach_radius(duty.duration_ms)
 			for next_pos in range(self._positions):
 				max_path = -1
 				max_quality = -inf
-				for prev_pos in range(self._positions):
+				for prev_pos in range(max(0, next_pos - radius), min(self._positions, next_pos + radius + 1)):
 					choice_quality = self.choice_quality(duty.start_ms, duty.end_ms, prev_pos, next_pos, covering_qualities[prev_pos], duty.skid)
 					path_quality = choices[-1][prev_pos].quality + choice_quality
 					if path_quality > max_quality:
@@ -76,5 +122,172 @@ class Keystra:
 		for i in range(len(choices) - 1, 0, -1):
 			path[i - 1] = choices[i][path[i]].position
 
-		return duties, path
+		return path
+
+	# Same exploration as _explore_choices, but backpointers live in one flat array('b') (duty-major), and only the
+	# previous and next rows of qualities are kept, so planning memory is a few bytes per duty
+	def _explore_compact(self, duties: list[Duty]) -> list[Position]:
+		positions = self._positions
+		backpointers = array('b', bytes(len(duties) * positions))
+		qualities: list[Quality] = [0.0] * positions
+		next_qualities: list[Quality] = [0.0] * positions
+
+		offset = 0
+		for duty in duties:
+			self._compact_row(duty, qualities, next_qualities, backpointers, offset)
+			qualities, next_qualities = next_qualities, qualities
+			offset += positions
+
+		path : list[Position] = [-1] * (len(duties) + 1)
+		path[-1] = max(range(positions), key=lambda pos: qualities[pos])
+		for i in range(len(duties), 0, -1):
+			path[i - 1] = backpointers[(i - 1) * positions + path[i]]
+
+		return path
+
+
+	# Fills next_qualities and one row of backpointers (at offset) for a duty, from the qualities of the previous row
+	def _compact_row(self, duty: Duty, qualities: list[Quality], next_qualities: list[Quality], backpointers: array, offset: int):
+		positions = self._positions
+		covering_qualities: list[Quality] = self._wagon.covering_qualities(duty.chord) if duty.chord else self._silence_quality
+		radius = self._wagon.reach_radius(duty.duration_ms)
+		for next_pos in range(positions):
+			max_path = -1
+			max_quality = -inf
+			for prev_pos in range(max(0, next_pos - radius), min(positions, next_pos + radius + 1)):
+				choice_quality = self.choice_quality(duty.start_ms, duty.end_ms, prev_pos, next_pos, covering_qualities[prev_pos], duty.skid)
+				path_quality = qualities[prev_pos] + choice_quality
+				if path_quality > max_quality:
+					max_path = prev_pos
+					max_quality = path_quality
+			backpointers[offset + next_pos] = max_path
+			next_qualities[next_pos] = max_quality
+
+	# Fixed-lag planning for songs that are too long to plan at once, or that should start playing before planning is done.
+	# Duties come from any iterable (silences are filled in on the way), and each one is yielded back as (duty, position)
+	# once lag more duties have been explored. The committed position is the one on the best path known at that point,
+	# and paths that disagree with it are dropped, so later commits always continue from it.
+	# Once duties run out, the rest of the best path is flushed, ending with (None, position) for where the wagon stays.
+	# Scoring is the same as the "compact" mode, and with lag >= len(duties) the path is exactly fill_and_explore's.
+	# Memory is lag rows of backpointers and lag pending duties, whatever the song length.
+	def stream(self, duties, lag: int = 8):
+		if lag < 1:
+			raise ValueError(f"Invalid lag: {lag}")
+
+		positions = self._positions
+		backpointers = array('b', bytes(lag * positions))
+		pending: list[Duty] = [None] * lag
+		ancestors: list[Position] = [0] * positions
+		qualities: list[Quality] = [0.0] * positions
+		next_qualities: list[Quality] = [0.0] * positions
+
+		explored = 0   # Number of duties explored, so qualities are for position index explored
+		committed = 0  # Index of the next position to be yielded
+		for duty in Duty.iter_with_silence(duties):
+			row = explored % lag
+			pending[row] = duty
+			self._compact_row(duty, qualities, next_qualities, backpointers, row * positions)
+			qualities, next_qualities = next_qualities, qualities
+			explored += 1
+
+			if explored - committed < lag:
+				continue
+
+			# Follow every state back to the position index being committed, then keep only the descendants of the best one
+			for pos in range(positions):
+				ancestors[pos] = pos
+			for index in range(explored - 1, committed - 1, -1):
+				offset = (index % lag) * positions
+				for pos in range(positions):
+					if ancestors[pos] >= 0:
+						ancestors[pos] = backpointers[offset + ancestors[pos]]
+			best = max(range(positions), key=lambda pos: qualities[pos])
+			position = ancestors[best]
+			for pos in range(positions):
+				if ancestors[pos] != position:
+					qualities[pos] = -inf
+
+			yield pending[committed % lag], position
+			committed += 1
+
+		# Flush whatever is left of the best path
+		path : list[Position] = [-1] * (explored - committed + 1)
+		path[-1] = max(range(positions), key=lambda pos: qualities[pos])
+		for i in range(len(path) - 1, 0, -1):
+			index = committed + i - 1
+			path[i - 1] = backpointers[(index % lag) * positions + path[i]]
+		for i in range(len(path) - 1):
+			yield pending[(committed + i) % lag], path[i]
+		yield None, path[-1]
+
+	# Same exploration as _explore_compact with integer qualities in units of 1/QUALITY_SCALE. Terms mirror choice_quality:
+	# delta_time is duration_ms/1000, so (delta_time + 1) becomes (duration_ms + 1000)/1000 and time penalties duration_ms/1000
+	def _explore_fixed(self, duties: list[Duty]) -> list[Position]:
+		positions = self._positions
+		flight_ms = self._flight_ms
+		lengths = self._length_table
+		bonuses = self._bonus_table
+		skid_bonuses = self._skid_bonus_table
+		notes_bonus = self._notes_bonus_fixed
+		move_penalty = self._move_penalty_fixed
+		backpointers = array('b', bytes(len(duties) * positions))
+		qualities = [0] * positions
+		next_qualities = [0] * positions
+
+		offset = 0
+		for duty in duties:
+			duration_ms = duty.duration_ms
+			skid = duty.skid
+			covering_qualities: list[Quality] = self._wagon.covering_qualities(duty.chord) if duty.chord else self._silence_quality
+
+			time_penalty = self._time_penalty_fixed * duration_ms // 1000
+			time_penalty_2 = time_penalty * time_penalty
+			for delta_pos in range(positions):
+				move = move_penalty * delta_pos
+				lengths[delta_pos] = isqrt(move * move + time_penalty_2)
+			bonus_time = duration_ms + 1000
+			skid_bonus = bonus_time * self._skid_bonus_fixed
+			for covering_quality in range(1, len(bonuses)):
+				notes = bonus_time * notes_bonus * (covering_quality + 1)
+				bonuses[covering_quality] = notes // 1000
+				skid_bonuses[covering_quality] = (notes + skid_bonus) // 1000
+
+			radius = self._wagon.reach_radius(duration_ms)
+			row_max = None
+			for next_pos in range(positions):
+				max_path = -1
+				max_quality = None
+				first_pos = max(0, next_pos - radius)
+				flight_index = first_pos * positions + next_pos
+				for prev_pos in range(first_pos, min(positions, next_pos + radius + 1)):
+					if flight_ms[flight_index] <= duration_ms:
+						delta_pos = next_pos - prev_pos
+						quality = qualities[prev_pos] - lengths[delta_pos if delta_pos >= 0 else -delta_pos]
+						covering_quality = covering_qualities[prev_pos]
+						if covering_quality > 0:
+							# Mirrors choice_quality, where staying put with no skid also counts as the wanted skid
+							if delta_pos == skid:
+								quality += skid_bonuses[covering_quality]
+							elif delta_pos == 0:
+								quality += bonuses[covering_quality]
+						if max_quality is None or quality > max_quality:
+							max_path = prev_pos
+							max_quality = quality
+					flight_index += positions
+				backpointers[offset + next_pos] = max_path
+				next_qualities[next_pos] = max_quality
+				if row_max is None or max_quality > row_max:
+					row_max = max_quality
+
+			# Shifting a whole row keeps every comparison and keeps the ints small over long songs
+			for pos in range(positions):
+				next_qualities[pos] -= row_max
+			qualities, next_qualities = next_qualities, qualities
+			offset += positions
+
+		path : list[Position] = [-1] * (len(duties) + 1)
+		path[-1] = max(range(positions), key=lambda pos: qualities[pos])
+		for i in range(len(duties), 0, -1):
+			path[i - 1] = backpointers[(i - 1) * positions + path[i]]
 
+		return path
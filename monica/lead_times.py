@@ -0,0 +1,65 @@
+from array import array
+from monica.wire import VOLUME_NONE
+
+
+EARLIEST_MS = -(1 << 29)  # Before anything, still a small int on the Pico
+
+
+# When to issue each duty's actuator commands, in song ms, so that the actuators arrive as the duty starts instead of
+# starting to move then. Each actuator goes by its own flight estimate, given as a function returning whole ms:
+#   finger_flight_ms(from_code, to_code)      fingers between packed fingering codes (0 is every finger home)
+#   pump_flight_ms(from_volume, to_volume)    pump between volume percentages
+#   stepper_flight_ms(from_pos, to_pos)       wagon between positions
+# plus retarget_ms, how long the stepper command itself takes (Stepper.set_target works the whole move out), during which
+# the playback loop can't issue anything else: the cart is only counted on from then on, so no fingering is due meanwhile.
+# Leads are cut short where they would break the safety ordering, arriving late rather than unsafely:
+#   - The cart moves during a duty from path[i] to path[i + 1], never before the duty starts, nor before the fingers are home
+#     for a silence, nor before the duty's own fingering was issued
+#   - Fingers never press before the cart is estimated to have arrived where they play
+#   - Each actuator's commands keep their order, and the pump never changes before the previous duty started
+# Issue times may be negative for the first duties, the song clock has to start preroll_ms later to honor them
+class LeadTimes:
+	__slots__ = ['fingers_ms', 'codes', 'pump_ms', 'pump_volumes', 'stepper_ms', 'preroll_ms', 'shortfall_ms']
+
+	def __init__(self, table, volume_percent: int, finger_flight_ms, pump_flight_ms, stepper_flight_ms, retarget_ms: int = 0):
+		count = len(table)
+		self.fingers_ms = array('i', bytes(4 * count))
+		self.codes = array('I', bytes(4 * count))  # What the fingers play, 0 being home for silences
+		self.pump_ms = array('i', bytes(4 * count))
+		self.pump_volumes = array('B', bytes(count))  # VOLUME_NONE where the volume doesn't change
+		self.stepper_ms = array('i', bytes(4 * count))
+		self.shortfall_ms = 0  # Total ms the fingers are planned to arrive late, because of the safety ordering
+
+		start_ms = table.start_ms
+		path = table.path
+		code = 0
+		volume = volume_percent
+		fingers_ms = pump_ms = stepper_ms = EARLIEST_MS
+		arrival_ms = EARLIEST_MS  # When the cart is estimated to hold path[i], the controller starts with it there
+		earliest_ms = 0
+		for i in range(count):
+			onset_ms = start_ms[i]
+			next_code = table.fingerings[i] if table.masks[i] else 0
+
+			finger_lead_ms = finger_flight_ms(code, next_code)
+			fingers_ms = max(onset_ms - finger_lead_ms, arrival_ms, fingers_ms)
+			self.shortfall_ms += max(0, fingers_ms + finger_lead_ms - onset_ms)
+			self.fingers_ms[i] = fingers_ms
+			self.codes[i] = next_code
+			earliest_ms = min(earliest_ms, fingers_ms)
+
+			next_volume = table.volumes[i]
+			if next_volume != VOLUME_NONE and next_volume != volume:
+				pump_ms = max(onset_ms - pump_flight_ms(volume, next_volume), start_ms[i - 1] if i else EARLIEST_MS, pump_ms)
+				self.pump_ms[i] = pump_ms
+				self.pump_volumes[i] = next_volume
+				volume = next_volume
+				earliest_ms = min(earliest_ms, pump_ms)
+			else:
+				self.pump_volumes[i] = VOLUME_NONE
+
+			stepper_ms = max(onset_ms, fingers_ms + finger_lead_ms if next_code == 0 else fingers_ms, stepper_ms)
+			self.stepper_ms[i] = stepper_ms
+			arrival_ms = stepper_ms + retarget_ms + stepper_flight_ms(path[i], path[i + 1])
+			code = next_code
+		self.preroll_ms = -earliest_ms
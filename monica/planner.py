@@ -1,46 +1,97 @@
 import monica
+from utils import log
 from .songwriter import monica_showcase as song
 
 
 def plan_song():
 	"""Plan the default showcase song"""
-	print("=== Monica Showcase Performance ===")
+	log.info("=== Monica Showcase Performance ===")
 	s = song()
-	print(f"song length: {len(s)}")
-	print(s)
+	log.info("song length: %d", len(s))
+	log.debug("Song: %s", s)
 	duties, path = monica.keystra.fill_and_explore(s)
-	print(f"duties length: {len(duties)}")
-	print(f"path length: {len(path)}")
-	print("Planned path:", path)
+	log.info("duties length: %d", len(duties))
+	log.info("path length: %d", len(path))
+	log.info("Planned path: %s", path)
 	return duties, path
 
 def plan_song_by_name(song_name="showcase"):
 	"""Plan a specific song by name"""
-	from .songwriter import monica_showcase, por_lo_que_yo_te_quiero, song1, song6
-	
-	songs = {
-		"showcase": monica_showcase,
-		"original": por_lo_que_yo_te_quiero, 
-		"simple": song1,
-		"range_test": song6
-	}
+	from .songwriter import SONGS as songs
 	
 	if song_name not in songs:
-		print(f"Unknown song '{song_name}'. Available: {list(songs.keys())}")
+		log.warning("Unknown song '%s'. Available: %s", song_name, list(songs.keys()))
 		song_name = "showcase"
 	
-	print(f"=== Planning song: {song_name} ===")
+	log.info("=== Planning song: %s ===", song_name)
 	song_func = songs[song_name]
 	s = song_func()
-	print(f"Song length: {len(s)} duties")
+	log.info("Song length: %d duties", len(s))
 	
 	duties, path = monica.keystra.fill_and_explore(s)
-	print(f"Planned: {len(duties)} duties, {len(path)} positions")
-	print(f"Performance time: ~{duties[-1].end_ms/1000:.1f} seconds")
-	print(f"Cart positions used: {sorted(set(path))}")
+	log.info("Planned: %d duties, %d positions", len(duties), len(path))
+	log.info("Performance time: ~%.1f seconds", duties[-1].end_ms / 1000)
+	log.info("Cart positions used: %s", sorted(set(path)))
 	
 	return duties, path
 
+# Everything a plan depends on besides the song itself. Compiled songs are only played while it matches what they were
+# compiled with. The memo size doesn't change plans, so it is left out
+def plan_settings() -> dict:
+	import config
+	wagon = dict(config.wagon)
+	wagon.pop("memo_size", None)
+	stepper = {"cruise_speed": config.stepper["cruise_speed"], "accel": config.stepper["accel"]}
+	if config.stepper.get("jerk") is not None:
+		stepper["jerk"] = config.stepper["jerk"]
+	return {
+		"keyboard": config.keyboard,
+		"wagon": wagon,
+		"keystra": config.keystra,
+		"stepper": stepper,
+	}
+
+# Settings equality with some slack for floats, which the Pico computes in single precision
+def _same_settings(a, b) -> bool:
+	if isinstance(a, float) or isinstance(b, float):
+		return abs(a - b) <= 1e-5 * max(abs(a), abs(b), 1)
+	if isinstance(a, dict):
+		return isinstance(b, dict) and len(a) == len(b) and all(key in b and _same_settings(a[key], b[key]) for key in a)
+	if isinstance(a, (list, tuple)):
+		return isinstance(b, (list, tuple)) and len(a) == len(b) and all(_same_settings(x, y) for x, y in zip(a, b))
+	return a == b
+
+def compiled_table(song_name):
+	"""DutyTable of a song compiled on the host, or None if it wasn't compiled or the config changed since"""
+	try:
+		from . import compiled_songs
+	except ImportError:
+		return None
+	data = compiled_songs.SONGS.get(song_name)
+	if data is None:
+		return None
+	if not _same_settings(compiled_songs.PLANNED_WITH, plan_settings()):
+		log.warning("Compiled songs are out of date with the config, planning on the device")
+		return None
+
+	from .duty_table import DutyTable
+	table = DutyTable.from_packed(data, monica.wagon)
+	log.info("=== Compiled song: %s ===", song_name)
+	log.info("Compiled: %d duties, %d positions", len(table), len(table.path))
+	return table
+
+def plan_table_by_name(song_name="showcase"):
+	"""Plan a specific song by name, as a DutyTable ready to play. Compiled songs skip planning altogether"""
+	from .duty_table import DutyTable
+	table = compiled_table(song_name)
+	if table is not None:
+		return table
+
+	duties, path = plan_song_by_name(song_name)
+	table = DutyTable.from_duties(duties, path, monica.wagon)
+	log.info("Duty table: %d bytes", table.memory_size())
+	return table
+
 def test_all_keys():
 	import config
 	from monica.duty import Chord, Duty
@@ -0,0 +1,43 @@
+import uasyncio
+from time import ticks_ms, ticks_add, ticks_diff
+from utils.stats import Samples
+
+
+# Fires duty onsets against the absolute song clock. Every deadline is ticks_add(song_start_ms, start_ms) of its duty, never
+# "now + something", so a late onset doesn't push back the ones after it. uasyncio wakes a sleeper late by however long the
+# other tasks hold the loop, so the scheduler sleeps until spin_ms before a deadline and polls the clock for the rest.
+# The lateness of every onset (fire time - deadline, in ms) is recorded, see stats()
+class PlaybackScheduler:
+	def __init__(self, capacity: int, spin_ms: int = 2):
+		self._spin_ms = spin_ms
+		self._start_ms = ticks_ms()
+		self.lateness = Samples(capacity)
+
+	# The song clock starts preroll_ms from now, so commands due before the song starts (negative song ms) can still be honored
+	def start(self, preroll_ms: int = 0):
+		self._start_ms = ticks_add(ticks_ms(), preroll_ms)
+		self.lateness.clear()
+
+	def deadline(self, song_ms: int) -> int:
+		return ticks_add(self._start_ms, song_ms)
+
+	# Waits for a point of the song clock and returns how late it came back, in ms (0 when on time)
+	async def wait_until(self, song_ms: int) -> int:
+		deadline_ms = self.deadline(song_ms)
+		sleep_ms = ticks_diff(deadline_ms, ticks_ms()) - self._spin_ms
+		if sleep_ms > 0:
+			await uasyncio.sleep_ms(sleep_ms)
+		while ticks_diff(deadline_ms, ticks_ms()) > 0:
+			pass
+		return ticks_diff(ticks_ms(), deadline_ms)
+
+	# Same as wait_until for an onset, recording its lateness
+	async def wait_onset(self, song_ms: int) -> int:
+		lateness_ms = await self.wait_until(song_ms)
+		self.lateness.record(lateness_ms)
+		return lateness_ms
+
+	def stats(self) -> dict:
+		stats = self.lateness.summary("ms")
+		stats["late"] = self.lateness.count_above(0)
+		return stats
@@ -154,3 +154,12 @@ def monica_showcase():
 	print(f"Monica showcase song created: {len(duties)} duties, {duties[-1].end_ms/1000:.1f} seconds")
 	return duties
 
+
+
+# Songs the Pico plays by name. local_webserver/compile_songs.py compiles these same songs into monica/compiled_songs.py
+SONGS = {
+		"showcase"		: monica_showcase
+	,	"original"		: por_lo_que_yo_te_quiero
+	,	"simple"		: song1
+	,	"range_test"	: song6
+}
@@ -0,0 +1,67 @@
+import struct
+import binascii
+from array import array
+
+
+# Playback telemetry, one row per duty onset: the duty index, when it was planned and when it actually happened (song ms),
+# the stepper position estimate (steps), the encoder counter and the free memory (bytes).
+# Rows go into a ring of preallocated columns, so recording is a few integer stores and never allocates. Every row gets a
+# sequence number counting from the start of the song, and dumps return the rows after a given one, so a host polling
+# during a performance only receives what is new. Dumps are compact: the rows packed as RECORD, base64 encoded
+FIELDS = ("duty", "planned_ms", "actual_ms", "position", "encoder", "mem_free")
+RECORD = "<Hiiiii"
+RECORD_SIZE = struct.calcsize(RECORD)
+
+class Telemetry:
+	def __init__(self, capacity: int):
+		if capacity < 1:
+			raise ValueError(f"Invalid telemetry capacity: {capacity}")
+
+		self._capacity = capacity
+		self._columns = [array('i', bytes(4 * capacity)) for _ in FIELDS]
+		self._recorded = 0
+
+	@property
+	def capacity(self) -> int:
+		return self._capacity
+
+	# Rows recorded since the song started, including those overwritten since
+	@property
+	def recorded(self) -> int:
+		return self._recorded
+
+	def clear(self):
+		self._recorded = 0
+
+	def record(self, duty: int, planned_ms: int, actual_ms: int, position: int, encoder: int, mem_free: int):
+		slot = self._recorded % self._capacity
+		columns = self._columns
+		columns[0][slot] = duty
+		columns[1][slot] = planned_ms
+		columns[2][slot] = actual_ms
+		columns[3][slot] = position
+		columns[4][slot] = encoder
+		columns[5][slot] = mem_free
+		self._recorded += 1
+
+	# Rows with a sequence number above after (-1 for all still in the ring), at most limit of them, oldest first
+	def dump(self, after: int = -1, limit: int = 64) -> dict:
+		first = max(after + 1, self._recorded - self._capacity, 0)
+		count = max(0, min(self._recorded - first, limit))
+		data = bytearray(count * RECORD_SIZE)
+		for i in range(count):
+			slot = (first + i) % self._capacity
+			struct.pack_into(RECORD, data, i * RECORD_SIZE, *[column[slot] for column in self._columns])
+		return {
+			"fields": FIELDS,
+			"first": first,
+			"count": count,
+			"recorded": self._recorded,
+			"lost": max(0, first - after - 1),
+			"data": binascii.b2a_base64(data).decode().strip(),
+		}
+
+# Rows of a dump as tuples ordered like FIELDS, for the host
+def unpack_rows(dump: dict) -> list[tuple]:
+	data = binascii.a2b_base64(dump["data"])
+	return [struct.unpack_from(RECORD, data, i * RECORD_SIZE) for i in range(dump["count"])]
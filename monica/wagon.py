@@ -1,61 +1,171 @@
 from utils.music.keyboard import Keyboard, Key
 from utils.music.notes import Note
 from utils.music.chord import Chord
+from array import array
+import sys
 
 
 # Position is the wagon's position index, with 0 being the first white key. Every increment represent a shift of one white key (two Keyboard Keys)
 Position = int
 Quality = float
 
+# Flights are stored in single precision on the Pico, where floats are single precision anyway. The host builds this same
+# Wagon to plan, and keeps the agent's doubles so its plans don't drift from the agent's flight times
+FLIGHT_TYPECODE = 'f' if sys.implementation.name == "micropython" else 'd'
+
 # This is the bridge between musical abstraction and physical world
 class Wagon:
-	def __init__(self, keyboard: Keyboard, flight_time, structure: list[list[Key]], valid_positions: int, wagon_2_stepper: float) -> None:
+	def __init__(self, keyboard: Keyboard, flight_time, structure: list[list[Key]], valid_positions: int, wagon_2_stepper: float, memo_size: int = 32) -> None:
+		if memo_size < 1:
+			raise ValueError(f"Invalid memo size: {memo_size}")
+
 		self._keyboard = keyboard
-		self._flight_time = flight_time
 		self._structure = structure
 		self._valid_positions = valid_positions
 		self._wagon_2_stepper = wagon_2_stepper
 		
 		# The given structure is assumed to represent the actionable keys in the leftmost valid position
 		# eg. normally it would start in 0, but if the first were a black key it should be 1 or -1 (-1 representing a legally out of bounds black key)
-		# For each Position we translate the structure by two Keys (from white to white) and sample the actual note spans of each finger
-		self._spans: list[list[list[Note]]] = [
+		# For each Position we translate the structure by two Keys (from white to white) and sample the actual note spans of each finger.
+		# Notes are kept as bits relative to the first note of the keyboard (see Chord.mask), so that covering a chord is one AND
+		# per finger, and fingering it is a lookup of the first finger note bit the chord has
+		self._base: Note = keyboard.first_note
+		self._finger_bits: list[list[list[int]]] = [
 				[
 					[
-						note for key in finger if isinstance(note := keyboard.get_note(2 * position + key), Note)
+						1 << (note - self._base) for key in finger if isinstance(note := keyboard.get_note(2 * position + key), Note)
 					] for finger in structure
 				] for position in range(0, valid_positions)
 			]
+		self._finger_masks: list[list[int]] = [
+				[ sum(bits) for bits in fingers ] for fingers in self._finger_bits
+			]
+
+		# Songs repeat the same chords constantly, so covering qualities and fingerings are memoized per chord mask.
+		# Entries are [qualities, fingerings per position (filled on demand), last use], and the least recently used
+		# one is evicted past memo_size. MicroPython dicts don't keep order, hence the explicit clock
+		self._memo: dict[int, list] = {}
+		self._memo_size = memo_size
+		self._memo_clock = 0
+		self.memo_hits = 0
+		self.memo_misses = 0
+
+		# There are only valid_positions² distinct flights, so they are solved once and stored row-major in a flat float array
+		# (see FLIGHT_TYPECODE). The planner then looks them up without building a single Trajectory
+		self._flight_times = array(FLIGHT_TYPECODE, [
+				flight_time(self.calculate_steps(next_pos), self.calculate_steps(prev_pos))
+					for prev_pos in range(valid_positions) for next_pos in range(valid_positions)
+			])
+
+		# Fastest flight covering at least each distance, in whole ms rounded down. reach_radius uses it to bound the moves
+		# worth evaluating for a duty, and rounding down means it can only let through too many, never cut a feasible one
+		self._reach_ms = array('i', bytes(4 * valid_positions))
+		fastest_ms = None
+		for distance in range(valid_positions - 1, -1, -1):
+			for prev_pos in range(valid_positions):
+				for next_pos in (prev_pos - distance, prev_pos + distance):
+					if 0 <= next_pos < valid_positions:
+						flight_ms = int(self.flight_time(prev_pos, next_pos) * 1000)
+						if fastest_ms is None or flight_ms < fastest_ms:
+							fastest_ms = flight_ms
+			self._reach_ms[distance] = fastest_ms
 
 	@property
 	def valid_positions(self) -> int:
 		return self._valid_positions
 	
+	# Covering qualities go from 0 to this, a finger each
+	@property
+	def fingers(self) -> int:
+		return len(self._structure)
+
 	def calculate_steps(self, position: Position) -> float:
 		return position * self._wagon_2_stepper
 
-	def _span_quality(self, chord: Chord, span: list[list[Note]]) -> Quality:
-		# Simple quality measure: how many notes can be played by a given span
-		return sum(chord.overlaps(set(finger)) for finger in span)
+	# Chord masks below are relative to this note, see Chord.mask
+	@property
+	def base(self) -> Note:
+		return self._base
+
+	def _memo_entry(self, mask: int) -> list:
+		self._memo_clock += 1
+		entry = self._memo.get(mask)
+		if entry is not None:
+			self.memo_hits += 1
+			entry[2] = self._memo_clock
+			return entry
+
+		self.memo_misses += 1
+		if len(self._memo) >= self._memo_size:
+			oldest_mask = None
+			oldest_use = None
+			for memo_mask, memo_entry in self._memo.items():
+				if oldest_use is None or memo_entry[2] < oldest_use:
+					oldest_mask = memo_mask
+					oldest_use = memo_entry[2]
+			del self._memo[oldest_mask]
+		entry = [self._covering_qualities(mask), [None] * self._valid_positions, self._memo_clock]
+		self._memo[mask] = entry
+		return entry
+
+	def memo_stats(self) -> dict:
+		lookups = self.memo_hits + self.memo_misses
+		return {
+			"hits": self.memo_hits,
+			"misses": self.memo_misses,
+			"hit_rate": self.memo_hits / lookups if lookups else 0,
+			"size": len(self._memo),
+			"max_size": self._memo_size,
+		}
 
+	# The returned list is shared with the memo, callers must not modify it
 	def covering_qualities(self, chord: Chord) -> list[Quality]:
-		return list(self._span_quality(chord, span) for span in self._spans)
+		return self._memo_entry(chord.mask(self._base))[0]
+
+	def _covering_qualities(self, mask: int) -> list[Quality]:
+		# Simple quality measure: how many fingers can play a note of the chord in each position
+		qualities: list[Quality] = []
+		for finger_masks in self._finger_masks:
+			quality = 0
+			for finger_mask in finger_masks:
+				if mask & finger_mask:
+					quality += 1
+			qualities.append(quality)
+		return qualities
 	
-	# Given the intended chord and the wagon position, returns the best fingering choice for each finger
+	# Given the intended chord and the wagon position, returns the best fingering choice for each finger.
+	# The returned list is shared with the memo, callers must not modify it
 	def calculate_fingerings(self, chord: Chord, position: Position) -> list[int | None]:
-		# Returns the index of the first finger that can play a note in the chord, if any
+		return self.mask_fingerings(chord.mask(self._base), position)
+
+	# Same as calculate_fingerings for a chord mask relative to base, for callers that never build the Chord
+	def mask_fingerings(self, mask: int, position: Position) -> list[int | None]:
+		fingerings_per_position = self._memo_entry(mask)[1]
+		fingerings = fingerings_per_position[position]
+		if fingerings is None:
+			fingerings = self._calculate_fingerings(mask, position)
+			fingerings_per_position[position] = fingerings
+		return fingerings
+
+	def _calculate_fingerings(self, mask: int, position: Position) -> list[int | None]:
+		# Each finger takes the first of its notes that is in the chord, if any
 		# Used for telling what position the finger servo should go to
-		def fingering(finger: list[Note]) -> int | None:
-			for i, note in enumerate(finger):
-				if note in chord:
-					return i
-			return None
-		
-		span = self._spans[position]
-		return list(fingering(finger) for finger in span)
+		fingerings: list[int | None] = []
+		for bits in self._finger_bits[position]:
+			fingering = None
+			for i, bit in enumerate(bits):
+				if mask & bit:
+					fingering = i
+					break
+			fingerings.append(fingering)
+		return fingerings
 
-	def flight_time(self, prev_pos: Position, next_pos: Position):
-		from_steps = self.calculate_steps(prev_pos)
-		to_steps   = self.calculate_steps(next_pos)
-		return self._flight_time(to_steps, from_steps)
+	def flight_time(self, prev_pos: Position, next_pos: Position) -> float:
+		return self._flight_times[prev_pos * self._valid_positions + next_pos]
 
+	# Largest |next_pos - prev_pos| that might be flown within duration_ms, any farther move is surely too slow
+	def reach_radius(self, duration_ms: int) -> int:
+		radius = self._valid_positions - 1
+		while self._reach_ms[radius] > duration_ms:
+			radius -= 1
+		return radius
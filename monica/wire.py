@@ -0,0 +1,86 @@
+import struct
+import config
+from monica.duty import Duty
+from utils.music.chord import Chord
+from utils.music.notes import Note
+
+
+# Packed performance format, shared by the Pico and the local webserver:
+#   header:  magic "MNC", format version, chord mask base note, duty count        "<3sBBH"  (7 bytes)
+#   records: start_ms, duration_ms, chord mask, skid, volume per duty             "<IIIbB"  (14 bytes each)
+#   path:    one unsigned byte per position, duty count + 1 of them
+# Chord masks follow Chord.mask (bit i is base + i, 0 is a silence) and a volume of VOLUME_NONE keeps the current one.
+# The base is the first note of the keyboard, like the Wagon's, and notes off the keyboard are dropped: they can't be
+# played anyway, and what's left always fits the mask however wide the performance is.
+# Any change to the layout has to bump FORMAT_VERSION, so a Pico never plays a payload it would misread
+FORMAT_VERSION = 1
+FORMAT_NAME = "packed-v1"
+MAGIC = b"MNC"
+HEADER = "<3sBBH"
+RECORD = "<IIIbB"
+HEADER_SIZE = struct.calcsize(HEADER)
+RECORD_SIZE = struct.calcsize(RECORD)
+VOLUME_NONE = 255
+KEYBOARD_BASE = config.keyboard["start"]
+MASK_BITS = 0xFFFFFFFF  # Notes further than this from the base are past the keyboard (F3 to C6 is 32 notes)
+
+
+def packed_size(count: int) -> int:
+	return HEADER_SIZE + count * RECORD_SIZE + count + 1
+
+# Packs (start_ms, duration_ms, chord mask, skid, volume_percent or None) records and their path
+def pack_records(records, path: list[int], base: Note) -> bytes:
+	count = len(records)
+	if len(path) != count + 1:
+		raise ValueError(f"Path length ({len(path)}) must be duties length + 1 ({count + 1})")
+
+	data = bytearray(packed_size(count))
+	struct.pack_into(HEADER, data, 0, MAGIC, FORMAT_VERSION, base, count)
+	offset = HEADER_SIZE
+	for start_ms, duration_ms, mask, skid, volume_percent in records:
+		struct.pack_into(RECORD, data, offset, start_ms, duration_ms, mask & MASK_BITS, skid, VOLUME_NONE if volume_percent is None else volume_percent)
+		offset += RECORD_SIZE
+	data[offset:] = bytes(path)
+	return bytes(data)
+
+def pack_duties(duties: list[Duty], path: list[int], base: Note = KEYBOARD_BASE) -> bytes:
+	return pack_records([
+			(duty.start_ms, duty.duration_ms, duty.chord.mask(base) if duty.chord else 0, duty.skid, duty.volume_percent)
+				for duty in duties
+		], path, base)
+
+# Checks the header and returns the chord mask base and the duty count
+def unpack_header(data) -> tuple[Note, int]:
+	if len(data) < HEADER_SIZE:
+		raise ValueError(f"Packed performance too short: {len(data)} bytes")
+
+	magic, version, base, count = struct.unpack_from(HEADER, data, 0)
+	if magic != MAGIC:
+		raise ValueError("Not a packed performance")
+	if version != FORMAT_VERSION:
+		raise ValueError(f"Unsupported packed performance version {version}, expected {FORMAT_VERSION}")
+	if len(data) != packed_size(count):
+		raise ValueError(f"Packed performance of {count} duties should be {packed_size(count)} bytes, got {len(data)}")
+	return base, count
+
+# Decodes straight into Duty objects, one Chord per distinct mask
+def unpack_duties(data) -> tuple[list[Duty], list[int]]:
+	data = memoryview(data)
+	base, count = unpack_header(data)
+
+	chords: dict[int, Chord] = {}
+	duties: list[Duty] = []
+	offset = HEADER_SIZE
+	for _ in range(count):
+		start_ms, duration_ms, mask, skid, volume_percent = struct.unpack_from(RECORD, data, offset)
+		offset += RECORD_SIZE
+		chord = None
+		if mask:
+			chord = chords.get(mask)
+			if chord is None:
+				chord = Chord.from_mask(mask, base)
+				chords[mask] = chord
+		duties.append(Duty(start_ms, duration_ms, chord, skid, None if volume_percent == VOLUME_NONE else volume_percent))
+
+	path = list(data[offset:])
+	return duties, path
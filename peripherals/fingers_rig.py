@@ -8,6 +8,9 @@ FINGERING_TARGETS = {
 	None: "Home"
 }
 
+# Targets by packed fingering code, see monica.duty_table.fingering_code
+CODE_TARGETS = ("Home", "Left", "Right", "Home")
+
 class FingersRig(Rig):
 	def __init__(self, fingers: list[StandardServo], move_wait_ms: int):
 		super().__init__()
@@ -27,6 +30,21 @@ class FingersRig(Rig):
 	def play(self, fingerings: list):
 		for finger, fingering in zip(self._fingers, fingerings):
 			finger.go_to(FINGERING_TARGETS[fingering])
+
+	# Same as play, with the fingerings packed 2 bits per finger, first finger lowest
+	def play_code(self, code: int):
+		for finger in self._fingers:
+			finger.go_to(CODE_TARGETS[code & 3])
+			code >>= 2
+
+	# Seconds until every finger has moved from one packed fingering code to another, the slowest finger sets it
+	def code_flight_time(self, from_code: int, to_code: int) -> float:
+		flight_time = 0
+		for finger in self._fingers:
+			flight_time = max(flight_time, finger.flight_time(CODE_TARGETS[from_code & 3], CODE_TARGETS[to_code & 3]))
+			from_code >>= 2
+			to_code >>= 2
+		return flight_time
 	
 	async def cautionary_wait(self):
 		await uasyncio.sleep_ms(self._move_wait_ms)
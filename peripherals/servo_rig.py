@@ -1,6 +1,7 @@
 from . import Rig, Stepper, Button, FuzzyEncoder
 import uasyncio
 from machine import Timer
+from utils import log
 
 
 # A servo rig manages a stepper motor and its associated limit switches and encoder, with a servo-like movement profile
@@ -34,7 +35,7 @@ class ServoRig(Rig):
 		return self._stepper_2_encoder * self._stepper.aprox_position
 
 	def _encoder_cancel(self):
-		print("Encoder cancel")
+		log.warning("Encoder cancel")
 		self._sensor_cancel()
 		# No longer homes automatically, but will cancel the current operation. Old code:
 		# # Choose a safe fast track by using the minimum position reported by the stepper and the encoder, and then making it shorter
@@ -44,13 +45,13 @@ class ServoRig(Rig):
 		# self.go_home(track)
 	
 	def _lower_limit_cancel(self):
-		print("Lower limit cancel")
+		log.warning("Lower limit cancel")
 		self._sensor_cancel()
 		# No longer homes automatically, but will cancel the current operation. Old code:
 		# self.go_home(None)
 	
 	def _upper_limit_cancel(self):
-		print("Upper limit cancel")
+		log.warning("Upper limit cancel")
 		self._sensor_cancel()
 		# No longer homes automatically, but will cancel the current operation. Old code:
 		# self.go_home(self._homing_max_track)
@@ -63,7 +64,7 @@ class ServoRig(Rig):
 	def go_home(self, fast_track: float | None = None):
 		self._stepper.disengage()
 		self._callbacks_off()
-		print(f"Homing: fast_track: {fast_track}")
+		log.info("Homing: fast_track: %s", fast_track)
 		uasyncio.create_task(self._homing_coro(fast_track))
 
 	# TODO: should accept a position estimation and handle all homing alternatives
@@ -87,12 +88,12 @@ class ServoRig(Rig):
 			await home.wait("Stable")
 		
 		if not home.is_pressed:
-			self._stepper._set_velocity(-self._homing_vel)
+			self._set_homing_velocity(-self._homing_vel)
 			await home.wait("StablePress")
 		
-		self._stepper._set_velocity(self._homing_vel)
+		self._set_homing_velocity(self._homing_vel)
 		await home.wait("StableRelease")
-		self._stepper._set_velocity(0)
+		self._set_homing_velocity(0)
 
 		self._stepper.declare_position(-self._homing_margin)
 		self._stepper.set_target(0)
@@ -102,6 +103,12 @@ class ServoRig(Rig):
 		self._stepper._trigger("Homed")
 		self._callbacks_on()
 
+	# Homing drives the stepper without a target, so its timer isn't running to keep track of the position: the distance
+	# covered at the previous velocity is counted here instead, and aprox_position stays valid throughout
+	def _set_homing_velocity(self, vel: int):
+		self._stepper._update_position()
+		self._stepper._set_velocity(vel)
+
 	def _callbacks_on(self):
 		self._lower_LS.register_callback("Interrupt", self._lower_limit_cancel)
 		self._upper_LS.register_callback("Interrupt", self._upper_limit_cancel)
@@ -120,7 +127,9 @@ class ServoRig(Rig):
 	def _encoder_update(self, _):
 		expected_encoder = self.expected_encoder
 		if not self._encoder.is_within_tolerance(expected_encoder):
-			print(f"Encoder out of sync: Expected counter: {expected_encoder}, Counter: {self._encoder.counter}, Tolerance: {self._encoder.tolerance}, Uncertain updates: {self._encoder._uncertain_updates}")
+			# The log takes three arguments per message
+			log.warning("Encoder out of sync: Expected counter: %s, Counter: %d", expected_encoder, self._encoder.counter)
+			log.warning("Encoder out of sync: Tolerance: %s, Uncertain updates: %d", self._encoder.tolerance, self._encoder.unresolved_updates)
 			self._encoder_cancel()
 	
 	def __del__(self):
@@ -1,6 +1,7 @@
 from . import EventfulPeripheral
 from machine import Pin, PWM
 import uasyncio
+from utils import log
 
 
 # TODO: Explain better
@@ -80,7 +81,7 @@ class StandardServo(EventfulPeripheral):
 			raise ValueError("Servo in uncertain state, needs homing first")
 		
 		if self.is_moving:
-			print("Servo is already moving, cancelling current movement")
+			log.debug("Servo is already moving, cancelling current movement")
 			self.cancel_movement()
 		
 		self._start_movement(target)
@@ -111,21 +112,33 @@ class StandardServo(EventfulPeripheral):
 		# Convert to 0-1 range for servo
 		return servo_percent / 100.0
 	
-	def _start_movement(self, target: float | str | int):
-		event = "ReachedHome" if target == "Home" else "ReachedTarget"
-
+	# Numeric position (0-1) of a target as go_to takes it: a named position, a volume percentage (int) or a position (float)
+	def _resolve_target(self, target: float | str | int) -> float:
 		if isinstance(target, str):
 			if target not in self._named_positions:
 				raise ValueError(f"Target position {target} not found in named positions")
-			target = self._named_positions[target]
+			return self._named_positions[target]
 		elif isinstance(target, int):
 			# Handle percentage input (0-100) with volume rescaling
 			if not 0 <= target <= 100:
 				raise ValueError("Percentage must be between 0 and 100")
-			target = self._map_volume_percentage(target)
+			return self._map_volume_percentage(target)
 		elif not 0 <= target <= 1:
 			raise ValueError("Target position must be between 0 and 1")
-		
+		return target
+
+	# Estimated time to move between two targets, in seconds, by the same model the movement uses. None as origin is unknown,
+	# which counts as a full flight
+	def flight_time(self, origin: float | str | int | None, target: float | str | int) -> float:
+		return self._flight_time(None if origin is None else self._resolve_target(origin), self._resolve_target(target))
+
+	def _flight_time(self, origin: float | None, target: float) -> float:
+		flight_portion = 1 if origin is None else abs(target - origin)
+		return self._max_flight_time * flight_portion
+
+	def _start_movement(self, target: float | str | int):
+		event = "ReachedHome" if target == "Home" else "ReachedTarget"
+		target = self._resolve_target(target)
 		self._moving_task = uasyncio.create_task(self._movement_coro(target, event))
 
 	async def _movement_coro(self, target: float, event: str):
@@ -133,8 +146,7 @@ class StandardServo(EventfulPeripheral):
 		self._idle_position = None
 
 		target_duty = int((1 - target) * self._min_duty + target * self._max_duty)
-		flight_portion = 1 if origin is None else abs(target - origin)
-		duration = self._max_flight_time * flight_portion
+		duration = self._flight_time(origin, target)
 
 		self._engage(target_duty)
 		await uasyncio.sleep(duration)
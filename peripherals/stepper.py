@@ -1,13 +1,15 @@
 from . import EventfulPeripheral
-from utils.linear_kinematics.simple_agent import SimpleAgent
+from utils.linear_kinematics.stepper_agent import stepper_agent
 from machine import Pin, PWM
-from time import ticks_ms, ticks_add
+from time import ticks_ms, ticks_add, ticks_diff
+from array import array
 from math import trunc
 from utils.time import elapsed
 from machine import Timer
 
 
 MAX_DUTY = 32768
+MIN_VELOCITY = 8  # Slower than this (steps/s) the stepper is stopped
 
 MODE_SETTINGS = {
 	 1: (0, 0, 0),
@@ -20,7 +22,8 @@ MODE_SETTINGS = {
 
 class Stepper(EventfulPeripheral):
 	def __init__(self, pin_mode0: int, pin_mode1: int, pin_mode2: int, stepping_mode: int, pin_engage: int, pin_dir: int, pin_step: int,
-			dir_0_is_positive: bool, cruise_speed : float, accel : float, interval_ms: int, pwm_duty: int = MAX_DUTY):
+			dir_0_is_positive: bool, cruise_speed : float, accel : float, interval_ms: int, pwm_duty: int = MAX_DUTY,
+			schedule_ticks: int = 0, cruise_interval_ms: int | None = None, jerk: float | None = None):
 		super().__init__()
 
 		self._pin_mode0 = Pin(pin_mode0, Pin.OUT)
@@ -38,15 +41,31 @@ class Stepper(EventfulPeripheral):
 		self._pwm_duty = pwm_duty
 
 		self._dir_0_is_positive = dir_0_is_positive
-		self._ik_agent = SimpleAgent(cruise_speed, accel)
+		self._ik_agent = stepper_agent(cruise_speed, accel, jerk)
 
-		self.declare_position(0)
-		self._register_events("Engaged", "Disengaged", "ReachedTarget")
-		self.disengage()
+		# With schedule_ticks, set_target works out the velocity and position of every tick of the move up front, and update
+		# only looks them up, instead of sampling the trajectory. Moves longer than the schedule, and whatever is left to correct
+		# once it runs out, are followed by sampling the trajectory on every tick
+		self._schedule = array('i', bytes(4 * schedule_ticks))
+		self._schedule_positions = array('i', bytes(4 * schedule_ticks))  # In thousandths of a step
+		self._schedule_len = 0
+		# Falling behind or ahead of the trajectory (late callbacks, time spent retargeting) is made up for, but changing the
+		# velocity at most as much as accelerating does over a tick
+		self._max_correction = int(accel * interval_ms/1000)
 
+		# The timer only runs while there is a target, every interval_ms, or every cruise_interval_ms while the velocity holds
 		self._interval_ms = interval_ms
+		self._cruise_interval_ms = interval_ms if cruise_interval_ms is None else cruise_interval_ms
+		self._cruise_from_ms = 0
+		self._cruise_until_ms = 0
 		self._timer = Timer() # type: ignore
-		self._timer.init(period=interval_ms, callback=self.update)
+		self._timer_period_ms = 0  # 0 while stopped
+		self._update_callback = self.update  # Bound once, so rearming the timer doesn't allocate
+		self.reset_timer_stats()
+
+		self.declare_position(0)
+		self._register_events("Engaged", "Disengaged", "ReachedTarget")
+		self.disengage()
 
 
 	@property
@@ -75,15 +94,17 @@ class Stepper(EventfulPeripheral):
 	
 	@property
 	def aprox_position(self) -> float:
-		return self._position + elapsed(self._position_ms, ticks_ms()) * self._velocity
+		return (self._position_msteps + ticks_diff(ticks_ms(), self._position_ms) * self._velocity)/1000
 
+	# The position is dead reckoned in thousandths of a step, which is what ms times steps/s gives, so the timer callback
+	# keeps it (and follows the schedule) with small ints only
 	def declare_position(self, pos: float):
-		self._position = pos
+		self._position_msteps = round(pos * 1000)
 		self._position_ms = ticks_ms()
 	
 	def _update_position(self):
 		now_ms = ticks_ms()
-		self._position += elapsed(self._position_ms, now_ms) * self._velocity
+		self._position_msteps += ticks_diff(now_ms, self._position_ms) * self._velocity
 		self._position_ms = now_ms
 
 	def _set_velocity(self, vel: int):
@@ -98,9 +119,11 @@ class Stepper(EventfulPeripheral):
 	
 	def _clear_target(self):
 		assert self._velocity == 0, f"Trying to clear target while velocity is non-zero: {self._velocity}"
+		self._stop_timer()
 		self._target = None
 		self._trajectory = None
 		self._trajectory_start_ms = None
+		self._schedule_len = 0
 	
 	def _engage(self):
 		self._set_velocity(0)
@@ -114,38 +137,136 @@ class Stepper(EventfulPeripheral):
 		self._clear_target()
 		self._trigger("Disengaged")
 	
-	def set_target(self, target: float):
+	# With arrival_s, the stepper takes the gentlest trajectory that still gets there in arrival_s seconds from now, and
+	# otherwise (or if it can't make it in that time) the fastest one
+	def set_target(self, target: float, arrival_s: float | None = None):
 		# Set target to None to block race conditions against the Timer, who will just skip a cycle
 		self._target = None
 		if not self.is_engaged:
 			self._engage()
 		self._update_position()
-		self._trajectory = self._ik_agent.calculate_trajectory(self._position, target, self._velocity, 0)
 		self._trajectory_start_ms = self._position_ms
+		# Restart the timer so it ticks in step with the new trajectory, not with the old one. Ticks while this is
+		# still working out the schedule are skipped, and the time lost is then made up for
+		self._stop_timer()
+		self._run_timer(self._interval_ms)
+		position = self._position_msteps/1000
+		if arrival_s is None:
+			self._trajectory = self._ik_agent.calculate_trajectory(position, target, self._velocity, 0)
+		else:
+			self._trajectory = self._ik_agent.calculate_trajectory_in(position, target, self._velocity, 0, arrival_s)
+		self._schedule_len = max(0, self._trajectory.fill_velocities(self._schedule, self._interval_ms, MIN_VELOCITY,
+			self._schedule_positions))
+		self._set_cruise_window()
+		self._update_position()
+		retarget_ms = ticks_diff(self._position_ms, self._trajectory_start_ms)
+		if retarget_ms > self._retarget_ms:
+			self._retarget_ms = retarget_ms
+		self._follow_trajectory(retarget_ms, self._interval_ms)
+		self._target_msteps = round(target * 1000)
 		self._target = target
 
+	# The longest stretch of the trajectory at constant velocity, in ms from its start, rounded inwards
+	def _set_cruise_window(self):
+		trajectory = self._trajectory
+		self._cruise_from_ms = self._cruise_until_ms = 0
+		for i in range(len(trajectory)):
+			node = trajectory[i]
+			if node.acceleration == 0:
+				until = trajectory[i + 1].time if i + 1 < len(trajectory) else trajectory.time
+				from_ms = int(node.time * 1000) + 1
+				until_ms = int(until * 1000)
+				if until_ms - from_ms > self._cruise_until_ms - self._cruise_from_ms:
+					self._cruise_from_ms = from_ms
+					self._cruise_until_ms = until_ms
+
+	def _run_timer(self, period_ms: int):
+		if period_ms != self._timer_period_ms:
+			if not self._timer_period_ms:
+				self._timer_started_ms = ticks_ms()
+			self._timer.init(mode=Timer.PERIODIC, period=period_ms, callback=self._update_callback)
+			self._timer_period_ms = period_ms
+
+	def _stop_timer(self):
+		if self._timer_period_ms:
+			self._timer.deinit()
+			self._timer_period_ms = 0
+			self._timer_active_ms += ticks_diff(ticks_ms(), self._timer_started_ms)
+
+	def reset_timer_stats(self):
+		self._callbacks = 0
+		self._retarget_ms = 0
+		self._timer_active_ms = 0
+		self._timer_stats_ms = self._timer_started_ms = ticks_ms()
+
+	# Timer callbacks since reset_timer_stats, how long the timer ran meanwhile, and the longest set_target took
+	# (the controller's retarget_ms should cover it)
+	def timer_stats(self) -> dict:
+		now_ms = ticks_ms()
+		elapsed_ms = ticks_diff(now_ms, self._timer_stats_ms)
+		active_ms = self._timer_active_ms
+		if self._timer_period_ms:
+			active_ms += ticks_diff(now_ms, self._timer_started_ms)
+		return {
+			"callbacks": self._callbacks,
+			"elapsed_ms": elapsed_ms,
+			"active_ms": active_ms,
+			"per_second": round(self._callbacks * 1000/elapsed_ms, 1) if elapsed_ms > 0 else 0,
+			"retarget_ms": self._retarget_ms,
+		}
+
+	# Sets the velocity the trajectory has for the coming tick, corrected by how far the position is from the trajectory's,
+	# spread over the period_ms until the next callback. Along the schedule it is all small int math: thousandths of a step
+	# over ms are steps/s
+	def _follow_trajectory(self, move_ms: int, period_ms: int) -> int:
+		tick = move_ms // self._interval_ms
+		if tick < self._schedule_len:
+			vel = self._schedule[tick]
+			expected_msteps = self._schedule_positions[tick] + vel * (move_ms - tick * self._interval_ms)
+		else:
+			expected_position = self._trajectory.position_at(elapsed(self._trajectory_start_ms, self._position_ms))
+			next_position_ms = ticks_add(self._position_ms, self._interval_ms)
+			next_position = self._trajectory.position_at(elapsed(self._trajectory_start_ms, next_position_ms))
+			vel = trunc((next_position - expected_position) * 1000/self._interval_ms)
+			expected_msteps = round(expected_position * 1000)
+		error_msteps = expected_msteps - self._position_msteps
+		correction = error_msteps // period_ms if error_msteps >= 0 else -(-error_msteps // period_ms)
+		if correction > self._max_correction:
+			correction = self._max_correction
+		elif correction < -self._max_correction:
+			correction = -self._max_correction
+		vel += correction
+		if abs(vel) < MIN_VELOCITY:
+			vel = 0
+		if vel != self._velocity:
+			self._set_velocity(vel)
+		return vel
+
 	def update(self, timer):
+		self._callbacks += 1
 		self._update_position()
 		if self._target is not None:
 			assert self._trajectory is not None and self._trajectory_start_ms is not None
-			next_position_ms = ticks_add(self._position_ms, self._interval_ms)
-			next_position_time = elapsed(self._trajectory_start_ms, next_position_ms)
-			next_position = self._trajectory.sample(next_position_time).position
-			vel = trunc((next_position - self._position) * 1000/self._interval_ms)
-			if abs(vel) < 8:
-				vel = 0
-			self._set_velocity(vel)
+			# Wake up less often while cruising, as long as the next callback still comes before the velocity changes
+			move_ms = ticks_diff(self._position_ms, self._trajectory_start_ms)
+			if self._cruise_from_ms <= move_ms and move_ms + self._cruise_interval_ms + self._interval_ms <= self._cruise_until_ms:
+				period_ms = self._cruise_interval_ms
+			else:
+				period_ms = self._interval_ms
+			vel = self._follow_trajectory(move_ms, period_ms)
 		
-			if abs(self._position - self._target) <= 0.5 and vel == 0:
+			if abs(self._position_msteps - self._target_msteps) <= 500 and vel == 0:
 				self.disengage()
 				self._trigger("ReachedTarget")
+			else:
+				self._run_timer(period_ms)
 
 	def debug(self):
-		print(f"{type(self).__name__}: estimated position: {self.aprox_position}, target: {self._target}, velocity: {self._velocity}, ETA: {self.ETA}")
+		print(f"{type(self).__name__}: estimated position: {self.aprox_position}, target: {self._target}, velocity: {self._velocity}, ETA: {self.ETA}, timer: {self.timer_stats()}")
 
 	def reset(self):
 		super().reset()
-		self._timer.deinit()
+		self._stop_timer()
 		self._pwm.deinit()
 		self._pin_engage(1)
 		self._pin_dir.init(Pin.IN)
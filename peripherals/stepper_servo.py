@@ -1,4 +1,5 @@
 from . import Stepper, Button, RotaryEncoder
+from utils import log
 
 
 # TODO: Pasar acá el codigo de servo rig
@@ -19,9 +20,9 @@ class StepperServo(Stepper):
 
 	def _lower_LS_handler(self):
 		self.disengage()
-		print("Lower limit switch pressed")
+		log.warning("Lower limit switch pressed")
 
 	def _upper_LS_handler(self):
 		self.disengage()
-		print("Upper limit switch pressed")
+		log.warning("Upper limit switch pressed")
 
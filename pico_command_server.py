@@ -4,6 +4,7 @@ import json
 import device
 import monica
 import gc
+from utils import log
 from network_init import network_manager
 
 class PicoCommandServer:
@@ -63,7 +64,7 @@ class PicoCommandServer:
             try:
                 client_socket, addr = self.server_socket.accept()
                 client_socket.setblocking(False)
-                print(f"Command client: {addr[0]}")
+                log.debug("Command client: %s", addr[0])
                 uasyncio.create_task(self._handle_command_client(client_socket))
             except OSError:
                 await uasyncio.sleep(0.1)
@@ -90,21 +91,26 @@ class PicoCommandServer:
                             break
                     else:
                         # Connection closed by client
-                        print("Client closed connection")
+                        log.debug("Client closed connection")
                         return
                 except OSError as e:
                     timeout_count += 1
                     await uasyncio.sleep(0.01)
             
             if not data:
-                print("No command data received")
+                log.warning("No command data received")
                 return
             
+            # Commands are one JSON line, optionally followed by a binary payload of "payload_size" bytes
+            newline = data.find(b'\n')
+            payload = None
+            if newline >= 0:
+                data, payload = data[:newline], data[newline + 1:]
+            
             try:
                 command_str = data.decode().strip()
-                print(f"Command: {command_str}")
             except UnicodeDecodeError:
-                print("Invalid UTF-8 data received")
+                log.warning("Invalid UTF-8 data received")
                 await self._send_response(client_socket, {"error": "Invalid UTF-8 data"})
                 return
             
@@ -112,20 +118,30 @@ class PicoCommandServer:
             try:
                 command = json.loads(command_str)
             except json.JSONDecodeError as e:
-                print(f"JSON decode error: {e}")
+                log.warning("JSON decode error: %s", e)
                 await self._send_response(client_socket, {"error": f"Invalid JSON: {str(e)}"})
                 return
+            # Never the command itself, a performance sent as JSON is tens of KB
+            log.debug("Command %s, %d bytes", command.get("type"), len(command_str))
+            
+            payload_size = command.get("payload_size")
+            if payload_size:
+                payload = await self._read_payload(client_socket, payload, payload_size)
+                if payload is None:
+                    await self._send_response(client_socket, {"error": f"Incomplete payload, expected {payload_size} bytes"})
+                    return
+                command["payload"] = payload
             
             # Execute command
             try:
                 response = await self._execute_command(command)
                 await self._send_response(client_socket, response)
             except Exception as e:
-                print(f"Command execution error: {e}")
+                log.error("Command execution error: %s", e)
                 await self._send_response(client_socket, {"error": f"Execution error: {str(e)}"})
             
         except Exception as e:
-            print(f"Client handler error: {e}")
+            log.error("Client handler error: %s", e)
             try:
                 await self._send_response(client_socket, {"error": f"Server error: {str(e)}"})
             except:
@@ -137,6 +153,29 @@ class PicoCommandServer:
                 pass  # Ignore close errors
             gc.collect()
     
+    async def _read_payload(self, client_socket, received, payload_size):
+        """Read the rest of a binary payload into one preallocated buffer, None if the client stops short"""
+        payload = bytearray(payload_size)
+        view = memoryview(payload)
+        size = min(len(received or b""), payload_size)
+        view[:size] = received[:size]
+        timeout_count = 0
+        max_timeouts = 100  # 1 second without data
+        
+        while size < payload_size and timeout_count < max_timeouts:
+            try:
+                chunk = client_socket.recv(min(1024, payload_size - size))
+                if not chunk:
+                    break
+                view[size:size + len(chunk)] = chunk
+                size += len(chunk)
+                timeout_count = 0
+            except OSError:
+                timeout_count += 1
+                await uasyncio.sleep(0.01)
+        
+        return payload if size == payload_size else None
+    
     async def _execute_command(self, command):
         """Execute a command and return response"""
         cmd_type = command.get("type")
@@ -147,6 +186,7 @@ class PicoCommandServer:
                 "position": self.current_position,
                 "volume_percent": self.current_volume_percent,
                 "memory": gc.mem_free(),
+                "chord_memo": monica.wagon.memo_stats(),
                 "fingers": {
                     "states": self.finger_states,
                     "all_home": all(self.finger_states),
@@ -154,9 +194,19 @@ class PicoCommandServer:
                 }
             }
         
+        elif cmd_type == "playback_stats":
+            # Onset lateness of the last song played, None until one has finished
+            from monica.controller import playback_stats
+            return {"success": True, "stats": playback_stats()}
+        
+        elif cmd_type == "telemetry":
+            # Onset rows of the current or last song after sequence number "after", packed (see monica/telemetry.py)
+            from monica.controller import telemetry
+            return {"success": True, "telemetry": telemetry.dump(command.get("after", -1), command.get("limit", 64))}
+        
         elif cmd_type == "play_performance":
             song_name = command.get("song", "showcase")  # Default to showcase
-            print(f"Starting Monica performance: {song_name}")
+            log.info("Starting Monica performance: %s", song_name)
             uasyncio.create_task(self._run_performance(song_name))
             return {"success": True, "message": f"Performance '{song_name}' started"}
         
@@ -164,10 +214,33 @@ class PicoCommandServer:
             song_name = command.get("song", "showcase")
             duties_dict = command.get("duties", [])
             path = command.get("path", [])
-            print(f"Starting Monica performance with pre-processed pathing: {song_name}")
+            log.info("Starting Monica performance with pre-processed pathing: %s", song_name)
             uasyncio.create_task(self._run_performance_with_pathing(song_name, duties_dict, path))
             return {"success": True, "message": f"Performance '{song_name}' started with local pathing"}
         
+        elif cmd_type == "capabilities":
+            # Lets the local webserver pick the most compact performance format this firmware understands
+            from monica.wire import FORMAT_NAME, FORMAT_VERSION
+            return {
+                "success": True,
+                "formats": ["json", FORMAT_NAME],
+                "wire_version": FORMAT_VERSION
+            }
+        
+        elif cmd_type == "play_performance_packed":
+            song_name = command.get("song", "showcase")
+            payload = command.get("payload")
+            if payload is None:
+                return {"error": "Missing packed payload"}
+            try:
+                from monica.duty_table import DutyTable
+                table = DutyTable.from_packed(payload, monica.wagon)
+            except ValueError as e:
+                return {"error": f"Invalid packed performance: {e}"}
+            log.info("Starting Monica performance with packed pathing: %s", song_name)
+            uasyncio.create_task(self._run_planned_performance(song_name, table))
+            return {"success": True, "message": f"Performance '{song_name}' started with local pathing"}
+        
         elif cmd_type == "list_songs":
             # Return available songs
             songs = {
@@ -184,7 +257,7 @@ class PicoCommandServer:
             if finger is not None and position is not None:
                 # Safety check: ensure target finger is at home first
                 if not self.finger_states[finger]:
-                    print(f"Safety: Finger {finger} not at home, moving to neutral first")
+                    log.info("Safety: Finger %d not at home, moving to neutral first", finger)
                     device.fingers[finger].go_home()
                     await uasyncio.sleep_ms(50)  # Brief wait for safety
                 
@@ -211,7 +284,7 @@ class PicoCommandServer:
             if finger is not None and position is not None:
                 # Safety check: ensure target finger is at home first
                 if not self.finger_states[finger]:
-                    print(f"Safety: Finger {finger} not at home, moving to neutral first")
+                    log.info("Safety: Finger %d not at home, moving to neutral first", finger)
                     device.fingers[finger].go_home()
                     await uasyncio.sleep_ms(50)  # Brief wait for safety
                 
@@ -232,7 +305,7 @@ class PicoCommandServer:
                 new_pos = max(0, min(monica.wagon.valid_positions - 1, 
                                    self.current_position + direction))
                 if new_pos != self.current_position:
-                    print(f"Moving cart from position {self.current_position} to {new_pos}")
+                    log.info("Moving cart from position %d to %d", self.current_position, new_pos)
                     steps = monica.wagon.calculate_steps(new_pos)
                     device.stepper.set_target(steps)
                     await device.stepper.wait("ReachedTarget")
@@ -275,7 +348,7 @@ class PicoCommandServer:
             return {"error": "Missing direction or volume_percent"}
         
         elif cmd_type == "home_all":
-            print("Homing all systems with safety checks...")
+            log.info("Homing all systems with safety checks...")
             await self._init_hardware()
             self.current_position = 0
             self.current_volume_percent = 0  # Set to 0% (silence)
@@ -289,18 +362,18 @@ class PicoCommandServer:
     async def _run_performance(self, song_name):
         """Run Monica performance with selected song"""
         try:
-            from monica.planner import plan_song_by_name
-            from monica.controller import play_song_with_plan
+            from monica.planner import plan_table_by_name
+            from monica.controller import play_table
             
-            print(f"Planning performance: {song_name}")
-            duties, path = plan_song_by_name(song_name)
+            log.info("Planning performance: %s", song_name)
+            table = plan_table_by_name(song_name)
             
-            print(f"Starting performance: {len(duties)} duties, {len(path)} positions")
-            await play_song_with_plan(duties, path)
-            print(f"Performance '{song_name}' completed")
+            log.info("Starting performance: %d duties, %d positions", len(table), len(table.path))
+            await play_table(table)
+            log.info("Performance '%s' completed", song_name)
             
         except Exception as e:
-            print(f"Error during performance '{song_name}': {e}")
+            log.error("Error during performance '%s': %s", song_name, e)
     
     async def _run_performance_with_pathing(self, song_name, duties_dict, path):
         """Run Monica performance with pre-processed pathing from local webserver"""
@@ -308,8 +381,8 @@ class PicoCommandServer:
             from monica.duty import Duty
             from monica.controller import play_song_with_plan
             
-            print(f"Using pre-processed pathing for: {song_name}")
-            print(f"Received: {len(duties_dict)} duties, {len(path)} positions")
+            log.info("Using pre-processed pathing for: %s", song_name)
+            log.info("Received: %d duties, %d positions", len(duties_dict), len(path))
             
             # Convert duties_dict back to Duty objects
             duties = []
@@ -328,14 +401,28 @@ class PicoCommandServer:
                 )
                 duties.append(duty)
             
-            print(f"Starting performance with local pathing: {len(duties)} duties, {len(path)} positions")
+            log.info("Starting performance with local pathing: %d duties, %d positions", len(duties), len(path))
             await play_song_with_plan(duties, path)
-            print(f"Performance '{song_name}' completed with local pathing")
+            log.info("Performance '%s' completed with local pathing", song_name)
             
         except Exception as e:
-            print(f"Error during performance with local pathing '{song_name}': {e}")
+            log.error("Error during performance with local pathing '%s': %s", song_name, e)
             # Fall back to regular performance
-            print("Falling back to Pico pathing...")
+            log.info("Falling back to Pico pathing...")
+            await self._run_performance(song_name)
+    
+    async def _run_planned_performance(self, song_name, table):
+        """Run Monica performance from a DutyTable already decoded"""
+        try:
+            from monica.controller import play_table
+            
+            log.info("Starting performance with local pathing: %d duties, %d positions", len(table), len(table.path))
+            await play_table(table)
+            log.info("Performance '%s' completed with local pathing", song_name)
+            
+        except Exception as e:
+            log.error("Error during performance with local pathing '%s': %s", song_name, e)
+            log.info("Falling back to Pico pathing...")
             await self._run_performance(song_name)
     
     async def _return_finger_home(self, finger):
@@ -354,7 +441,7 @@ class PicoCommandServer:
                 fingers_to_home.append(i)
         
         if fingers_to_home:
-            print(f"Safety: Moving fingers {fingers_to_home} to home position first")
+            log.info("Safety: Moving fingers %s to home position first", fingers_to_home)
             
             # Move all non-home fingers to home
             for finger in fingers_to_home:
@@ -363,7 +450,7 @@ class PicoCommandServer:
             
             # Wait for fingers to reach home position
             await uasyncio.sleep_ms(100)  # Brief wait for safety
-            print("All fingers now at neutral position")
+            log.info("All fingers now at neutral position")
         
         return len(fingers_to_home)
     
@@ -379,15 +466,15 @@ class PicoCommandServer:
                 try:
                     sent = client_socket.send(response_bytes[total_sent:])
                     if sent == 0:
-                        print("Socket connection broken during send")
+                        log.warning("Socket connection broken during send")
                         break
                     total_sent += sent
                 except OSError as e:
-                    print(f"Send error: {e}")
+                    log.warning("Send error: %s", e)
                     break
                     
         except Exception as e:
-            print(f"Response send error: {e}")
+            log.error("Response send error: %s", e)
     
     def stop(self):
         """Stop the command server with proper cleanup"""
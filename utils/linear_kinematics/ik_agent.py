@@ -12,10 +12,61 @@ class IKAgent:
 		raise NotImplementedError()
 
 	# Outputs just the duration of a simplified IK problem given initial/final positions with naught initial/final velocities
-	# Ideally overload with a more efficient custom implementation
+	# Ideally overload with a more efficient custom implementation (see SimpleAgent), which should return a plain float
+	# without building trajectories and agree with calculate_trajectory(p0, p1, 0, 0).time
 	def flight_time(self, p0: float, p1: float) -> float:
 		return self.calculate_trajectory(p0, p1, 0, 0).time
 
+	# The same kind of agent slowed down k times: velocities divided by k and accelerations by k**2 (jerks by k**3 and so on),
+	# so that its moves between rests take exactly k times longer
+	def scaled(self, k: float) -> 'IKAgent':
+		raise NotImplementedError()
+
+	# The gentlest trajectory that still arrives in duration seconds, instead of as soon as possible, for moves with time to
+	# spare. It is this agent's trajectory slowed down by the largest k that makes it on time: between rests k is duration
+	# over the fastest time. Otherwise there is no closed form: the move time grows faster than k once the initial velocity has
+	# to be braked, so k is bracketed by doubling and then found by false position, aiming half a tolerance early.
+	# Each try builds a trajectory, and set_target runs this in the playback loop, so there are at most max_tries of them
+	# (measured on the host: 5 tries typically, a fifth of the moving starts ending up more than tolerance early). Playback
+	# rarely gets here, LeadTimes issues the stepper's moves once the cart is estimated to have arrived.
+	# It is never late: if the fastest trajectory doesn't make it (or there is nothing to move) that is what's returned,
+	# and when out of tries the gentlest one found on time
+	def calculate_trajectory_in(self, p0: float, p1: float, v0: float, v1: float, duration: float, tolerance: float = 0.001,
+			max_tries: int = 6) -> Trajectory:
+		fastest = self.calculate_trajectory(p0, p1, v0, v1)
+		if fastest.time >= duration or not len(fastest):
+			return fastest
+		if v0 == 0 and v1 == 0:
+			return self.scaled(duration/fastest.time).calculate_trajectory(p0, p1, v0, v1)
+
+		aim = duration - tolerance/2
+		# Bracketing k, with the move times less aim at both ends, and the gentlest trajectory found on time
+		low, low_error, on_time = 1.0, fastest.time - aim, fastest
+		high = high_error = None
+		side = 0
+		k = duration/fastest.time
+		for _ in range(max_tries):
+			trajectory = self.scaled(k).calculate_trajectory(p0, p1, v0, v1)
+			if trajectory.time > duration:
+				high, high_error = k, trajectory.time - aim
+				if side > 0:
+					low_error /= 2  # Illinois: the low end keeps being kept, so lean away from it
+				side = 1
+			else:
+				low, low_error, on_time = k, trajectory.time - aim, trajectory
+				if duration - trajectory.time <= tolerance:
+					break
+				if side < 0 and high is not None:
+					high_error /= 2
+				side = -1
+			if high is None:
+				k *= 2
+			else:
+				k = low + (high - low) * low_error/(low_error - high_error)
+				if not low < k < high:
+					k = (low + high)/2
+		return on_time
+
 	def __str__(self) -> str:
 		raise NotImplementedError(f"Please implement the string casting of this IKAgent: {type(self)}")
 	
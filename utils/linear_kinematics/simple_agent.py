@@ -16,6 +16,7 @@ class SimpleAgent(IKAgent):
 		
 		self._cruise_speed = cruise_speed
 		self._accel = accel
+		self._cruise_speed_2 = cruise_speed**2
 	
 	def __str__(self) -> str:
 		return f"Simple Linear IK Agent: cruise_speed: {self._cruise_speed}, accel: {self._accel}"
@@ -23,6 +24,9 @@ class SimpleAgent(IKAgent):
 	def __repr__(self) -> str:
 		return self.__str__()
 
+	def scaled(self, k: float) -> 'SimpleAgent':
+		return SimpleAgent(self._cruise_speed/k, self._accel/k**2)
+
 	# Minimizes duration given a target speed and acceleration.
 	# Expected to always be feasible, and should investigate if unfeasibility conditions are found.
 	def calculate_trajectory(self, p0: float, p1: float, v0: float, v1: float) -> Trajectory:
@@ -42,10 +46,27 @@ class SimpleAgent(IKAgent):
 		
 		return t
 
+	# Closed form of calculate_trajectory(p0, p1, 0, 0).time, which the planner asks for constantly.
+	# Resting at both ends there are no bound segments, and only the primary or the dual problem has H >= 0,
+	# with H = A * |p1 - p0|. The same float operations are kept so both ways agree exactly, but no Trajectory is built
+	def flight_time(self, p0: float, p1: float) -> float:
+		A = self._accel
+		H = A * (p1 - p0) if p1 > p0 else A * (p0 - p1)
+
+		if H <= self._cruise_speed_2:
+			b = sqrt(H)/A
+			return b + b
+
+		M = self._cruise_speed
+		b = M/A
+		return b + (H - self._cruise_speed_2)/(A * M) + b
+
 	# Minimizes duration by accelerating and the decelerating. Unfeasibility should be expected.
 	def _accel_then_decel(self, p0: float, p1: float, v0: float, v1: float) -> Trajectory | None:
 		M = self._cruise_speed
 		A = self._accel
+		start_p = p0
+		start_v = v0
 		
 		# Initial segment: return to bounds
 		a = 0
@@ -66,12 +87,12 @@ class SimpleAgent(IKAgent):
 		if H < 0:
 			return None
 
-		if H <= M**2:
+		if H <= self._cruise_speed_2:
 			vm = sqrt(H)
 			c = 0
 		else:
 			vm = M
-			c = (H - M**2)/(A * M)
+			c = (H - self._cruise_speed_2)/(A * M)
 
 		b = (vm - v0)/A
 		d = (vm - v1)/A
@@ -79,7 +100,7 @@ class SimpleAgent(IKAgent):
 		if b < 0 or d < 0:
 			return None
 		
-		trajectory = Trajectory(0, p0, v0)
+		trajectory = Trajectory(0, start_p, start_v)
 		if a > 0: trajectory.extend(a, -A)
 		if b > 0: trajectory.extend(b,  A)
 		if c > 0: trajectory.extend(c)
@@ -1 +1,74 @@
-# Copy simple_agent.py and make the final ramp more pronounced and break the initial ramp in segments of different acceleration
\ No newline at end of file
+from utils.linear_kinematics.simple_agent import SimpleAgent
+from utils.linear_kinematics.trajectory import Trajectory
+from math import ceil
+
+
+# Jerk limited (S-curve) version of SimpleAgent, so the acceleration ramps up and down at jerk instead of jumping, which
+# the stepper follows without skipping steps at higher cruise_speed and accel.
+# The profile is SimpleAgent's velocity averaged over a sliding window of ramp seconds: the acceleration then changes
+# linearly, the velocity never exceeds cruise_speed nor the acceleration accel, and every move takes exactly ramp longer.
+# The jerk is SimpleAgent's jumps in acceleration over ramp, and those reach 2 * accel going straight from accelerating to
+# decelerating, so ramp = 2 * accel/jerk. Averaging covers (v0 + v1) * ramp/2 more distance, taken off the target beforehand.
+# Trajectories only hold constant accelerations, so each ramp is laid out in ramp_steps steps, each of two halves holding the
+# acceleration at 1/6 and 5/6 of the step. That pair reaches the same velocity and position as the linear change does,
+# so the trajectory passes exactly through the S-curve at the end of every step, and ends exactly at p1
+class SCurveAgent(SimpleAgent):
+	def __init__(self, cruise_speed: float, accel: float, jerk: float, ramp_steps: int = 2) -> None:
+		super().__init__(cruise_speed, accel)
+
+		if not jerk > 0:
+			raise ValueError("jerk should be a positive number")
+		if ramp_steps < 1:
+			raise ValueError("ramp_steps should be at least 1")
+
+		self._jerk = jerk
+		self._ramp = 2 * accel/jerk
+		self._ramp_steps = ramp_steps
+
+	def __str__(self) -> str:
+		return f"S-Curve Linear IK Agent: cruise_speed: {self._cruise_speed}, accel: {self._accel}, jerk: {self._jerk}"
+
+	def scaled(self, k: float) -> 'SCurveAgent':
+		return SCurveAgent(self._cruise_speed/k, self._accel/k**2, self._jerk/k**3, self._ramp_steps)
+
+	def calculate_trajectory(self, p0: float, p1: float, v0: float, v1: float) -> Trajectory:
+		return self._smoothed(super().calculate_trajectory(p0, p1 - (v0 + v1) * self._ramp/2, v0, v1))
+
+	# Same as SimpleAgent's, plus the ramp. Moves nowhere still take no time
+	def flight_time(self, p0: float, p1: float) -> float:
+		time = super().flight_time(p0, p1)
+		return time + self._ramp if time > 0 else time
+
+	# The trajectory with its velocity averaged over the last ramp seconds, before its start the velocity being the initial one
+	def _smoothed(self, base: Trajectory) -> Trajectory:
+		if not len(base):
+			return base
+
+		ramp = self._ramp
+		start = base.start
+		end = base.time
+		v0 = base[0].velocity
+		v1 = base.final_state.velocity
+		velocity = lambda t: v0 if t <= start else v1 if t >= end else base.sample(t).velocity
+		acceleration = lambda t: (velocity(t) - velocity(t - ramp))/ramp
+
+		# The acceleration is linear between these
+		breaks = sorted(set([n.time for n in base] + [n.time + ramp for n in base] + [end, end + ramp]))
+		step = ramp/self._ramp_steps
+		trajectory = Trajectory(start, base[0].position, v0)
+		for t0, t1 in zip(breaks, breaks[1:]):
+			if acceleration(t0) == acceleration(t1):
+				trajectory.extend(t1 - t0, acceleration(t0))
+				continue
+			steps = ceil((t1 - t0)/step - 1e-9)
+			dt = (t1 - t0)/steps
+			for k in range(steps):
+				t = t0 + k * dt
+				trajectory.extend(dt/2, acceleration(t + dt/6))
+				trajectory.extend(dt/2, acceleration(t + 5 * dt/6))
+		return trajectory
+
+
+# The stepper's IK agent: jerk limited when a jerk is configured, SimpleAgent otherwise
+def stepper_agent(cruise_speed: float, accel: float, jerk: float | None = None) -> SimpleAgent:
+	return SimpleAgent(cruise_speed, accel) if jerk is None else SCurveAgent(cruise_speed, accel, jerk)
@@ -1,4 +1,5 @@
 from utils.linear_kinematics.node import Node
+from math import trunc
 
 # A trajectory is composed by a final state (with no acceleration) and a path of Nodes, whose lifespan lasts until the next one
 # This is built through piece-wise constant acceleration instructions, so velocity is piece-wise linear and continuous, and position piece-wise quadratic and C^1
@@ -9,6 +10,7 @@ class Trajectory:
 		self._pos = pos
 		self._vel = vel
 		self._path = [] if path is None else path
+		self._cursor = 0  # Index of the path node position_at last sampled from
 	
 	@property
 	def time(self) -> float:
@@ -50,6 +52,52 @@ class Trajectory:
 		
 		return base.extrapolate(t)
 
+	# Same position as sample(t).position, without building Nodes, for the stepper timer. Successive times are expected to
+	# go forward, so the segment is found by advancing a cursor from the last one, O(1) per call instead of a scan.
+	# Going back in time rewinds the cursor to the start, which is correct but pays for a scan once
+	def position_at(self, t: float) -> float:
+		if t >= self._time:
+			return self._pos + (t - self._time) * self._vel
+
+		path = self._path
+		i = self._cursor
+		if i >= len(path) or path[i].time > t:
+			i = 0
+			if not path or path[0].time > t:
+				raise ValueError(f"Sampling time {t} is before the start of trajectory {self}")
+		last = len(path) - 1
+		while i < last and path[i + 1].time <= t:
+			i += 1
+		self._cursor = i
+
+		n = path[i]
+		dt = t - n.time
+		return n.position + dt * (n.velocity + (n.velocity + dt * n.acceleration))/2
+
+	# Fills velocities with the whole velocity schedule of the trajectory, the steps/s to hold over each tick of interval_ms
+	# from its start so as to be at the trajectory's position by the end of the tick. Velocities are truncated to whole steps/s
+	# as the PWM takes them, and those below min_velocity are 0, each tick making up for the rounding of the previous ones.
+	# With positions, each tick's position at its start, following the schedule, goes there too in thousandths of a step
+	# (rounded), so they fit an array('i').
+	# Returns the number of ticks filled, or -1 if they don't fit in velocities (which is then left as it was)
+	def fill_velocities(self, velocities, interval_ms: int, min_velocity: int = 8, positions=None) -> int:
+		start = self.start
+		count = int((self._time - start) * 1000/interval_ms) + 1
+		if count > len(velocities) or (positions is not None and count > len(positions)):
+			return -1
+
+		position = self.position_at(start)
+		for i in range(count):
+			next_position = self.position_at(start + (i + 1) * interval_ms/1000)
+			vel = trunc((next_position - position) * 1000/interval_ms)
+			if abs(vel) < min_velocity:
+				vel = 0
+			velocities[i] = vel
+			if positions is not None:
+				positions[i] = round(position * 1000)
+			position += vel * interval_ms/1000
+		return count
+
 	def __bool__(self) -> bool:
 		return True
 
@@ -0,0 +1,144 @@
+import time
+from array import array
+
+
+# Leveled logging that keeps print off the hot paths. A log call stores its level, time, message and up to three arguments
+# in a preallocated ring, and formatting (message % arguments) and printing happen later, when drain() runs, normally from
+# drain_task. So a call below the level costs one comparison, and a logged one a few slot stores, no f-string, no serial IO.
+# Pass the arguments, don't format them: log.info("Volume %d%%", volume), not log.info(f"Volume {volume}%").
+# When the ring is full the oldest messages are overwritten, and drain reports how many were lost.
+# Debug messages in tight loops can also be wrapped in `if __debug__:`, which mpy-cross -O1 compiles out altogether
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+OFF = 100
+
+LEVELS = {"debug": DEBUG, "info": INFO, "warning": WARNING, "error": ERROR, "off": OFF}
+LEVEL_NAMES = {DEBUG: "DEBUG", INFO: "INFO", WARNING: "WARNING", ERROR: "ERROR"}
+
+_UNSET = object()  # Marks arguments not given, so None can still be logged
+
+# ticks_ms on the Pico, a plain ms clock when the module is loaded on a host
+_ticks_ms = getattr(time, "ticks_ms", None) or (lambda: int(time.monotonic() * 1000) & 0x3FFFFFFF)
+
+
+class Logger:
+	def __init__(self, capacity: int = 64, level: int | str = INFO, clock=_ticks_ms, output=print, drain_ms: int = 200):
+		self._clock = clock
+		self._output = output
+		self.drain_ms = drain_ms
+		self.set_level(level)
+		self.resize(capacity)
+
+	def set_level(self, level: int | str):
+		if isinstance(level, str):
+			if level not in LEVELS:
+				raise ValueError(f"Unknown log level: {level}")
+			level = LEVELS[level]
+		self.level = level
+
+	def enabled(self, level: int) -> bool:
+		return level >= self.level
+
+	# Drops whatever is pending
+	def resize(self, capacity: int):
+		if capacity < 1:
+			raise ValueError(f"Invalid log capacity: {capacity}")
+		self._capacity = capacity
+		self._levels = bytearray(capacity)
+		self._ticks = array('i', bytes(4 * capacity))
+		self._messages = [None] * capacity
+		self._args = [None] * (3 * capacity)
+		self._head = 0
+		self._count = 0
+		self.dropped = 0
+
+	@property
+	def pending(self) -> int:
+		return self._count
+
+	def _write(self, level: int, message: str, a, b, c):
+		slot = (self._head + self._count) % self._capacity
+		if self._count == self._capacity:
+			self._head = (self._head + 1) % self._capacity
+			self.dropped += 1
+		else:
+			self._count += 1
+		self._levels[slot] = level
+		self._ticks[slot] = self._clock()
+		self._messages[slot] = message
+		args = self._args
+		args[3 * slot] = a
+		args[3 * slot + 1] = b
+		args[3 * slot + 2] = c
+
+	def log(self, level: int, message: str, a=_UNSET, b=_UNSET, c=_UNSET):
+		if level >= self.level:
+			self._write(level, message, a, b, c)
+
+	def debug(self, message: str, a=_UNSET, b=_UNSET, c=_UNSET):
+		if DEBUG >= self.level:
+			self._write(DEBUG, message, a, b, c)
+
+	def info(self, message: str, a=_UNSET, b=_UNSET, c=_UNSET):
+		if INFO >= self.level:
+			self._write(INFO, message, a, b, c)
+
+	def warning(self, message: str, a=_UNSET, b=_UNSET, c=_UNSET):
+		if WARNING >= self.level:
+			self._write(WARNING, message, a, b, c)
+
+	def error(self, message: str, a=_UNSET, b=_UNSET, c=_UNSET):
+		if ERROR >= self.level:
+			self._write(ERROR, message, a, b, c)
+
+	def _format(self, slot: int) -> str:
+		message = self._messages[slot]
+		args = tuple(arg for arg in self._args[3 * slot:3 * slot + 3] if arg is not _UNSET)
+		if args:
+			try:
+				message = message % args
+			except (TypeError, ValueError):
+				message = f"{message} {args}"
+		return f"[{self._ticks[slot]}] {LEVEL_NAMES.get(self._levels[slot], self._levels[slot])}: {message}"
+
+	# Formats and outputs up to limit pending messages (all by default), oldest first, and returns how many
+	def drain(self, limit: int | None = None) -> int:
+		if self.dropped:
+			dropped = self.dropped
+			self.dropped = 0
+			self._output(f"[log] {dropped} messages lost, the ring was full")
+		count = self._count if limit is None else min(limit, self._count)
+		for _ in range(count):
+			slot = self._head
+			line = self._format(slot)
+			self._messages[slot] = None
+			self._args[3 * slot] = self._args[3 * slot + 1] = self._args[3 * slot + 2] = None  # Let go of the arguments
+			self._head = (self._head + 1) % self._capacity
+			self._count -= 1
+			self._output(line)
+		return count
+
+	# Drains a few messages at a time every drain_ms, off the hot paths, for uasyncio.create_task
+	async def drain_task(self, batch: int = 8):
+		import uasyncio
+		while True:
+			while self.drain(batch):
+				await uasyncio.sleep_ms(0)
+			await uasyncio.sleep_ms(self.drain_ms)
+
+
+# Global instance, with module level shortcuts: from utils import log; log.info("...")
+logger = Logger()
+debug = logger.debug
+info = logger.info
+warning = logger.warning
+error = logger.error
+drain = logger.drain
+
+def configure(level: int | str = INFO, capacity: int = 64, drain_ms: int = 200):
+	logger.set_level(level)
+	logger.drain_ms = drain_ms
+	if capacity != logger._capacity:
+		logger.resize(capacity)
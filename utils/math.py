@@ -9,3 +9,14 @@ def sign(r: float) -> float:
 def length(x: float, y: float) -> float:
 	return math.sqrt(x*x + y*y)
 
+
+# Integer square root (floor) by Newton's method, so integer-only code never goes through floats
+def isqrt(n: int) -> int:
+	if n <= 0:
+		return 0
+	x = n
+	y = (x + 1) >> 1
+	while y < x:
+		x = y
+		y = (x + n // x) >> 1
+	return x
@@ -17,6 +17,10 @@ class Chord:
 		"dominant7": {0, 4, 7, 10},
 		}
 
+	# Songs reuse a few voicings many times, so from_text hands out one shared Chord per text, up to this many texts
+	INTERN_LIMIT = 64
+	_interned: dict = {}
+
 	def __init__(self, *notes):
 		if not notes:
 			raise TypeError("No notes provided")
@@ -26,6 +30,9 @@ class Chord:
 		if not all(isinstance(n, int) for n in self._notes):
 			raise ValueError("All notes should be intergers")
 
+		self._mask = 0
+		self._mask_base = None
+
 	@property
 	def notes(self):
 		return self._notes
@@ -53,9 +60,40 @@ class Chord:
 		intervals = cls.INTERVALS[chord_type]
 		return cls(root_note + i for i in intervals)
 
+	# Bitmask with bit i set when base + i is in the chord (notes below base are left out). It is computed once per base,
+	# and a keyboard base keeps the bits within the keyboard range (F3 to C6 is 32 notes). MicroPython's small ints only
+	# hold 30 bits, so masks with B5 or C6 (bits 30 and 31) are boxed. Those are only handled while planning: once per chord
+	# here and in the wagon's memo, and once per duty building the DutyTable, while playback goes by fingering codes.
+	# test_chord_bitmask reports how many duties carry one
+	def mask(self, base: Note) -> int:
+		if self._mask_base != base:
+			mask = 0
+			for n in self._notes:
+				if n >= base:
+					mask |= 1 << (n - base)
+			self._mask = mask
+			self._mask_base = base
+		return self._mask
+
+	@classmethod
+	def from_mask(cls, mask: int, base: Note):
+		notes = []
+		i = 0
+		while mask:
+			if mask & 1:
+				notes.append(base + i)
+			mask >>= 1
+			i += 1
+		return cls(notes)
+
 	@classmethod
 	def from_text(cls, text):
-		return cls(name_2_note(name) for name in text.split("_"))
+		chord = cls._interned.get(text)
+		if chord is None:
+			chord = cls(name_2_note(name) for name in text.split("_"))
+			if len(cls._interned) < cls.INTERN_LIMIT:
+				cls._interned[text] = chord
+		return chord
 
 	def __str__(self) -> str:
 		return '_'.join(note_2_full_name(n) for n in sorted(self.notes))
@@ -0,0 +1,51 @@
+from array import array
+
+
+# Preallocated integer samples (eg. lateness in ms), so recording allocates nothing in a time critical loop.
+# Samples past capacity are counted as dropped rather than stored
+class Samples:
+	def __init__(self, capacity: int):
+		self._values = array('i', bytes(4 * capacity))
+		self._count = 0
+		self.dropped = 0
+
+	def __len__(self) -> int:
+		return self._count
+
+	def record(self, value: int):
+		if self._count < len(self._values):
+			self._values[self._count] = value
+			self._count += 1
+		else:
+			self.dropped += 1
+
+	def clear(self):
+		self._count = 0
+		self.dropped = 0
+
+	def count_above(self, threshold: int) -> int:
+		above = 0
+		for i in range(self._count):
+			if self._values[i] > threshold:
+				above += 1
+		return above
+
+	# Nearest rank percentile, p in 0..100
+	def percentile(self, p: int) -> int | None:
+		if not self._count:
+			return None
+		ordered = sorted(self._values[:self._count])
+		return ordered[max(0, (p * self._count + 99) // 100 - 1)]
+
+	# Summary with every key suffixed by unit, eg. {"count": 3, "min_ms": 0, "mean_ms": 1.0, "max_ms": 2, "p95_ms": 2}
+	def summary(self, unit: str = "") -> dict:
+		suffix = "_" + unit if unit else ""
+		summary = {"count": self._count, "dropped": self.dropped}
+		if not self._count:
+			return summary
+		values = self._values[:self._count]
+		summary["min" + suffix] = min(values)
+		summary["mean" + suffix] = sum(values) / self._count
+		summary["max" + suffix] = max(values)
+		summary["p95" + suffix] = self.percentile(95)
+		return summary